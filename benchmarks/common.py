@@ -0,0 +1,63 @@
+'''
+Helpers shared by the benchmarks. The scraper is imported from scholar_scraper.py in the repository root, which does not start a run, as
+the run only starts when the program itself is executed.
+'''
+
+import importlib
+import os.path
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def load_scraper():
+    '''
+    Imports scholar_scraper.py from the repository root.
+
+    Returns:
+        scraper (module): the scraper module
+    '''
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    return importlib.import_module('scholar_scraper')
+
+def read_fixture(name):
+    '''
+    Reads one of the saved Google Scholar pages in benchmarks/fixtures.
+
+    Parameters:
+        name (str): name of the page, without .html
+
+    Returns:
+        html (str): html of the page
+    '''
+    with open(os.path.join(FIXTURES, name + '.html'), encoding='utf-8') as f:
+        return f.read()
+
+def measure(func, repeat):
+    '''
+    Times a function, and measures the peak memory it allocates (with tracemalloc) on a separate run, so that tracing does not slow the timed runs.
+
+    Parameters:
+        func (function): function to measure, called with no arguments
+        repeat (int): number of timed runs
+
+    Returns:
+        seconds (float): mean time of one run, in seconds
+        peak (int): peak memory allocated by one run, in bytes
+    '''
+    func() #warm up
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        func()
+    seconds = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return seconds, peak
@@ -0,0 +1,99 @@
+'''
+Benchmarks format_dfs on a synthetic combined dataset (by default 200,000 papers and 2,000 academics), comparing version 1.1 of the program,
+which formatted dates and generated ids one row at a time, with the current version, which does every column in one go. It also checks that
+both give every paper and academic the same 8 digit id and the same publication date.
+
+Usage:
+    python benchmarks/format_benchmark.py [--papers N] [--repeat N]
+'''
+
+import argparse
+import io
+import random
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+
+from common import load_scraper, measure
+
+## Version 1.1 of the program, kept for comparison
+
+def legacy_format_dfs(scraper, paper_df, academic_df):
+    formatted_paper_df = paper_df.copy()
+    formatted_academic_df = academic_df.copy()
+
+    formatted_paper_df['Publication date'] = formatted_paper_df['Publication date'].apply(scraper.format_date)
+
+    formatted_paper_df['PaperID'] = formatted_paper_df[['Title']].sum(axis=1).apply(scraper.generate_id)
+    formatted_academic_df['AcademicID'] = formatted_academic_df[['Academic', 'Affiliation']].sum(axis=1).apply(scraper.generate_id)
+
+    temp_cols = formatted_paper_df.columns.to_list()
+    index = formatted_paper_df.columns.get_loc('PaperID')
+    formatted_paper_df = formatted_paper_df[temp_cols[index:index+1] + temp_cols[0:index] + temp_cols[index+1:]]
+
+    temp_cols = formatted_academic_df.columns.to_list()
+    index = formatted_academic_df.columns.get_loc('AcademicID')
+    formatted_academic_df = formatted_academic_df[temp_cols[index:index+1] + temp_cols[0:index] + temp_cols[index+1:]]
+
+    return formatted_paper_df, formatted_academic_df
+
+def synthetic_dataset(papers, academics):
+    '''
+    Makes paper and academic dataframes shaped like the scraper's, before formatting.
+
+    Parameters:
+        papers (int): number of papers
+        academics (int): number of academics
+
+    Returns:
+        paper_df (pandas df)
+        academic_df (pandas df)
+    '''
+    rnd = random.Random(1)
+    words = 'a study of the stochastic boundary layer flow finite element method for nonlinear waves on graphs spectral theory'.split()
+    dates = ['2021/3/4', '2019/11', '2008', '', np.nan]
+
+    paper_df = pd.DataFrame({
+        'Title': [' '.join(rnd.choices(words, k=rnd.randint(4, 12))) + f' {i}' for i in range(papers)],
+        'Citations': [rnd.choice(['', str(rnd.randint(1, 500))]) for _ in range(papers)],
+        'Year': [str(rnd.randint(1990, 2023)) for _ in range(papers)],
+        'Paper url': [f'https://scholar.google.com/citations?view_op=view_citation&citation_for_view=X:{i}' for i in range(papers)],
+        'Publication date': [rnd.choice(dates) for _ in range(papers)],
+    })
+    academic_df = pd.DataFrame({
+        'Academic': [f'Academic {i}' for i in range(academics)],
+        'Affiliation': [f'University {i % 50}' for i in range(academics)],
+        'Citations': [str(rnd.randint(1, 90000)) for _ in range(academics)],
+    })
+
+    return paper_df, academic_df
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks formatting the paper and academic dataframes.')
+    parser.add_argument('--papers', type=int, default=200000, help='number of papers in the synthetic dataset (default: 200000)')
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed runs of each version (default: 3)')
+    args = parser.parse_args()
+
+    scraper = load_scraper()
+    paper_df, academic_df = synthetic_dataset(args.papers, max(1, args.papers // 100))
+    print(f'Synthetic dataset of {len(paper_df)} papers and {len(academic_df)} academics\n')
+
+    with redirect_stdout(io.StringIO()): #format_dfs reports its progress
+        legacy_papers, legacy_academics = legacy_format_dfs(scraper, paper_df, academic_df)
+        papers, academics = scraper.format_dfs(paper_df, academic_df)
+
+        legacy_seconds, legacy_peak = measure(lambda: legacy_format_dfs(scraper, paper_df, academic_df), args.repeat)
+        seconds, peak = measure(lambda: scraper.format_dfs(paper_df, academic_df), args.repeat)
+
+    same = (legacy_papers['PaperID'].equals(papers['PaperID']) and legacy_academics['AcademicID'].equals(academics['AcademicID'])
+            and legacy_papers['Publication date'].equals(papers['Publication date']))
+    print(f'Same ids and dates: {same}')
+    print(f'Distinct ids: {papers["PaperID"].nunique()} of 8 digits, {papers["PaperKey"].nunique()} of 63 bits\n')
+
+    print(f'{"version":<10}{"ms":>10}{"peak MiB":>10}   speedup')
+    print(f'{"1.1":<10}{legacy_seconds*1000:>10.0f}{legacy_peak/2**20:>10.1f}')
+    print(f'{"current":<10}{seconds*1000:>10.0f}{peak/2**20:>10.1f}   x{legacy_seconds/seconds:.1f}')
+
+if __name__ == '__main__':
+    main()
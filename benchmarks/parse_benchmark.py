@@ -0,0 +1,75 @@
+'''
+Benchmarks parsing the saved Google Scholar pages in benchmarks/fixtures: the time to parse each type of page, the time to parse it and extract
+what the scraper reads from it, and the peak memory this allocates, with and without lxml and the page strainers. If selectolax is installed, the time it takes
+just to parse each page is shown for comparison (the scraper's extraction is written against bs4, so it cannot be run on selectolax's tree).
+
+Usage:
+    python benchmarks/parse_benchmark.py [--repeat N]
+'''
+
+import argparse
+import io
+from contextlib import redirect_stdout
+
+from bs4 import BeautifulSoup
+
+from common import load_scraper, read_fixture, measure
+
+def extractors(scraper):
+    '''
+    Gets the functions the scraper uses to read each type of page.
+
+    Parameters:
+        scraper (module): the loaded scraper
+
+    Returns:
+        extractors (dict): list of functions taking a soup, for each page type
+    '''
+    return {
+        'search': [scraper.get_profile_url],
+        'profile': [scraper.get_paper_table, scraper.get_academic_table],
+        'paper': [scraper.parse_paper_details],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks parsing Google Scholar pages.')
+    parser.add_argument('--repeat', type=int, default=20, help='number of timed runs of each case (default: 20)')
+    args = parser.parse_args()
+
+    scraper = load_scraper()
+    parsers = ['html.parser']
+    if scraper.HTML_PARSER != 'html.parser':
+        parsers.append(scraper.HTML_PARSER)
+
+    print(f'{"page":<9}{"parser":<13}{"strainer":<12}{"parse ms":>10}{"total ms":>10}{"peak KiB":>10}   speedup')
+    for page_type, funcs in extractors(scraper).items():
+        html = read_fixture(page_type)
+        baseline = None
+
+        for parser in parsers:
+            for strained in [False, True]:
+                strainer = scraper.get_strainer(page_type) if strained else None
+
+                def parse():
+                    return BeautifulSoup(html, parser, parse_only=strainer)
+
+                def run():
+                    soup = parse()
+                    for func in funcs:
+                        func(soup)
+
+                with redirect_stdout(io.StringIO()): #get_academic_table reports its progress
+                    parse_seconds = measure(parse, args.repeat)[0]
+                    seconds, peak = measure(run, args.repeat)
+                baseline = baseline or seconds
+                print(f'{page_type:<9}{parser:<13}{"yes" if strained else "no":<12}{parse_seconds*1000:>10.2f}{seconds*1000:>10.2f}{peak/1024:>10.0f}   x{baseline/seconds:.1f}')
+
+        try:
+            from selectolax.parser import HTMLParser
+        except ImportError:
+            continue
+        seconds, peak = measure(lambda: HTMLParser(html), args.repeat)
+        print(f'{page_type:<9}{"selectolax":<13}{"no":<12}{seconds*1000:>10.2f}{"-":>10}{peak/1024:>10.0f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+'''
+Benchmarks the whole pipeline for one query (dfs_by_query: search, profile pages, every paper page, formatting) offline, by replaying
+recorded pages instead of fetching them from Google Scholar. Synthetic small, medium and large (2,000 paper) profiles are recorded from the
+saved pages in benchmarks/fixtures, and replayed under the request budget with a simulated latency and throttling (see ReplayFetcher).
+
+Each profile is run in its own process, so that its peak RSS (resident memory) is its own, and its papers per second, pages per second and
+time spent in each stage (see Metrics) are reported. Results can be saved with --save, and compared against saved results with --compare,
+which exits with status 1 if any profile got slower or used more memory by more than --tolerance.
+
+Usage:
+    python benchmarks/pipeline_benchmark.py [--profiles small medium large] [--latency SECONDS] [--throttle FRACTION]
+                                            [--max-in-flight N] [--save FILE] [--compare FILE] [--tolerance FRACTION]
+'''
+
+import argparse
+import io
+import json
+import os
+import os.path
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout, redirect_stderr
+
+from common import load_scraper, read_fixture
+
+try:
+    import resource
+except ImportError: #not available on Windows, where peak RSS is not reported
+    resource = None
+
+#Number of papers in each synthetic profile
+PROFILES = {'small': 20, 'medium': 200, 'large': 2000}
+
+QUERY = 'jane doe york'
+
+#Stages shown in the table of stage times, in order
+STAGES = ['fetch', 'budget_wait', 'load', 'parse', 'paper_list', 'paper_details', 'format']
+
+def profile_pages(scraper, papers):
+    '''
+    Makes the pages of a synthetic profile's list of papers, from the rows of the saved profile page. Each paper is given its own title and
+    url, and the last page has fewer than PROFILE_PAGE_SIZE papers, as on Google Scholar.
+
+    Parameters:
+        scraper (module): the scraper module
+        papers (int): number of papers in the profile
+
+    Returns:
+        pages (list str): html of each page
+        paper_urls (list str): url of each paper's page
+    '''
+    html = read_fixture('profile')
+    head, rest = html.split('<tbody id="gsc_a_b">', 1)
+    body, tail = rest.split('</tbody>', 1)
+    rows = re.findall(r'<tr class="gsc_a_tr">.*?</tr>', body)
+
+    pages = list()
+    paper_urls = list()
+    page = list()
+    for i in range(papers):
+        row = rows[i % len(rows)]
+        row = re.sub(r'citation_for_view=([^:"]+):[^"&]+', fr'citation_for_view=\1:{i:010d}', row)
+        row = re.sub(r'class="gsc_a_at">([^<]*)<', fr'class="gsc_a_at">\1 {i}<', row)
+        page.append(row)
+        paper_urls.append('https://scholar.google.com' + re.search(r'href="([^"]+)" class="gsc_a_at"', row).group(1).replace('&amp;', '&'))
+
+        if len(page) == scraper.PROFILE_PAGE_SIZE:
+            pages.append(page)
+            page = list()
+    pages.append(page) #the last page, with fewer than PROFILE_PAGE_SIZE papers (possibly none)
+
+    return [head + '<tbody id="gsc_a_b">' + ''.join(page) + '</tbody>' + tail for page in pages], paper_urls
+
+def record_profile(scraper, directory, papers):
+    '''
+    Records the pages of a synthetic profile to a directory, as they would be saved by --record, for QUERY to be replayed from.
+
+    Parameters:
+        scraper (module): the scraper module
+        directory (str): directory to record the pages to
+        papers (int): number of papers in the profile
+
+    Returns:
+        pages (int): number of pages recorded
+    '''
+    os.makedirs(directory, exist_ok=True)
+
+    def record(url, page_type, html):
+        with open(scraper.recording_path(directory, url, page_type), 'w', encoding='utf-8') as file:
+            file.write(html)
+
+    search_url = scraper.get_scholar_search_url(QUERY)
+    search_html = read_fixture('search')
+    record(search_url, 'search', search_html)
+
+    profile_url = scraper.get_profile_url(scraper.parse_page(search_html, 'search'))
+    pages, paper_urls = profile_pages(scraper, papers)
+    for idx, html in enumerate(pages):
+        record(scraper.get_profile_page_url(profile_url, idx * scraper.PROFILE_PAGE_SIZE), 'profile', html)
+
+    #Every paper has the same page, so it is only written once and linked to from the rest
+    paper_path = os.path.join(directory, 'paper.html')
+    with open(paper_path, 'w', encoding='utf-8') as file:
+        file.write(read_fixture('paper'))
+    for url in paper_urls:
+        path = scraper.recording_path(directory, url, 'paper')
+        try:
+            os.link(paper_path, path)
+        except OSError:
+            shutil.copyfile(paper_path, path)
+
+    return 1 + len(pages) + len(paper_urls)
+
+def peak_rss():
+    '''
+    Gets the peak resident memory of this process so far, in bytes, or None if it cannot be measured here.
+    '''
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024 #kilobytes, except on macOS
+
+def run_profile(args):
+    '''
+    Records and replays one profile in this process, and prints its results as JSON.
+    '''
+    scraper = load_scraper()
+    scraper.pd.DataFrame, scraper.np.ndarray #imported on first use, so import them now rather than while timing
+    directory = tempfile.mkdtemp(prefix='pipeline benchmark ')
+    try:
+        record_profile(scraper, directory, PROFILES[args.run])
+
+        fetcher = scraper.make_fetcher(replay=directory, replay_latency=args.latency, replay_throttle=args.throttle, max_in_flight=args.max_in_flight,
+                                       max_rate=args.max_rate, backoff=args.backoff, jitter=0.0)
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()): #progress messages and bars
+            paper_df, academic_df = scraper.dfs_by_query(QUERY, fetcher, sheets=False)
+        seconds = time.perf_counter() - start
+        fetcher.close()
+
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    totals = fetcher.metrics.totals()
+    stages = dict()
+    for stage in totals['stages']:
+        stages[stage['stage']] = stages.get(stage['stage'], 0) + stage['seconds']
+
+    pages = totals['counters'].get('pages_fetched', 0)
+    print(json.dumps({'profile': args.run, 'papers': len(paper_df), 'pages': pages, 'seconds': seconds, 'papers_per_second': len(paper_df) / seconds,
+                      'pages_per_second': pages / seconds, 'retries': totals['counters'].get('retries', 0), 'peak_rss': peak_rss(), 'stages': stages}))
+
+def compare(results, baseline, tolerance):
+    '''
+    Compares results with saved baseline results, printing every profile that got slower or used more memory by more than tolerance.
+
+    Parameters:
+        results (list dict): results of this run
+        baseline (list dict): saved results to compare with
+        tolerance (float): fraction by which a profile may be slower or use more memory
+
+    Returns:
+        regressed (bool): whether any profile regressed
+    '''
+    saved = {result['profile']: result for result in baseline}
+    regressed = False
+
+    print(f'\n{"profile":<10}{"papers/s":>20}{"peak RSS MiB":>20}')
+    for result in results:
+        if result['profile'] not in saved:
+            continue
+        old = saved[result['profile']]
+        slower = result['papers_per_second'] < old['papers_per_second'] * (1 - tolerance)
+        bigger = result['peak_rss'] is not None and old['peak_rss'] is not None and result['peak_rss'] > old['peak_rss'] * (1 + tolerance)
+        regressed = regressed or slower or bigger
+
+        speed = f'{old["papers_per_second"]:.0f} -> {result["papers_per_second"]:.0f}'
+        memory = f'{old["peak_rss"]/2**20:.0f} -> {result["peak_rss"]/2**20:.0f}' if result['peak_rss'] is not None and old['peak_rss'] is not None else 'n/a'
+        flags = ' '.join(flag for flag, failed in [('SLOWER', slower), ('BIGGER', bigger)] if failed)
+        print(f'{result["profile"]:<10}{speed:>20}{memory:>20}   {flags}')
+
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks scraping whole profiles offline, from replayed pages.')
+    parser.add_argument('--profiles', nargs='+', choices=list(PROFILES), default=list(PROFILES), help='profiles to run (default: all)')
+    parser.add_argument('--latency', type=float, default=0.0, help='average seconds each replayed page takes to load (default: 0)')
+    parser.add_argument('--throttle', type=float, default=0.0, help='fraction of page loads that come back throttled (default: 0)')
+    parser.add_argument('--max-in-flight', type=int, default=4, help='maximum number of pages loaded at once (default: 4)')
+    parser.add_argument('--max-rate', type=float, default=1000, help='maximum pages of each type loaded per second (default: 1000)')
+    parser.add_argument('--backoff', type=float, default=0.1, help='seconds to wait after the first throttled page (default: 0.1)')
+    parser.add_argument('--save', metavar='FILE', default=None, help='save the results to FILE as JSON')
+    parser.add_argument('--compare', metavar='FILE', default=None, help='compare the results with results saved by --save, and exit with status 1 on a regression')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='fraction by which a profile may be slower or use more memory than in --compare (default: 0.2)')
+    parser.add_argument('--run', choices=list(PROFILES), default=None, help=argparse.SUPPRESS) #runs one profile, in a process started by main
+    args = parser.parse_args()
+
+    if args.run is not None:
+        run_profile(args)
+        return
+
+    results = list()
+    for profile in args.profiles:
+        command = [sys.executable, os.path.abspath(__file__), '--run', profile, '--latency', str(args.latency), '--throttle', str(args.throttle),
+                   '--max-in-flight', str(args.max_in_flight), '--max-rate', str(args.max_rate), '--backoff', str(args.backoff)]
+        output = subprocess.run(command, stdout=subprocess.PIPE, check=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f'Replayed with {args.latency}s latency, {args.throttle:.0%} throttled, {args.max_in_flight} pages in flight\n')
+    print(f'{"profile":<10}{"papers":>8}{"pages":>8}{"seconds":>10}{"papers/s":>10}{"pages/s":>10}{"retries":>9}{"peak RSS MiB":>14}')
+    for result in results:
+        rss = f'{result["peak_rss"]/2**20:.0f}' if result['peak_rss'] is not None else 'n/a'
+        print(f'{result["profile"]:<10}{result["papers"]:>8}{result["pages"]:>8}{result["seconds"]:>10.2f}{result["papers_per_second"]:>10.1f}'
+              f'{result["pages_per_second"]:>10.1f}{result["retries"]:>9}{rss:>14}')
+
+    print(f'\n{"seconds in stage":<18}' + ''.join(f'{result["profile"]:>10}' for result in results))
+    for stage in STAGES:
+        print(f'{stage:<18}' + ''.join(f'{result["stages"].get(stage, 0):>10.2f}' for result in results))
+    print('(paper pages are fetched and parsed on several threads at once, so their stages add up to more than the time taken)')
+
+    if args.save is not None:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=1)
+
+    if args.compare is not None:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.tolerance):
+            print('\nPerformance regressed.')
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
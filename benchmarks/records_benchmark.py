@@ -0,0 +1,154 @@
+'''
+Benchmarks building the paper and academic dataframes for a synthetic 5,000 paper profile (50 copies of the saved profile page, and the saved
+paper page's details for every paper). Each table is built the way version 1.1 of the program did, writing into the dataframe cell by cell,
+and the current way, gathering rows first and making each dataframe once. Pages are parsed before timing starts, so only building the
+tables is measured.
+
+Usage:
+    python benchmarks/records_benchmark.py [--papers N] [--repeat N]
+'''
+
+import argparse
+import io
+import warnings
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+
+from common import load_scraper, read_fixture, measure
+
+## Version 1.1 of the program, kept for comparison
+
+def legacy_paper_table(soup):
+    l = list()
+    o = {}
+
+    allPapers = soup.find("table",{"id":"gsc_a_t"}).find_all("tr")
+    for paper in allPapers:
+        try:
+            o["Title"]=paper.find("a",{"class":"gsc_a_at"}).text
+        except:
+            o["Title"]=None
+        try:
+            o["Citations"]=paper.find("a",{"class":"gsc_a_ac gs_ibl"}).text
+        except:
+            o["Citations"]=None 
+        try:
+            o["Year"]=paper.find("span",{"class":"gsc_a_h gsc_a_hc gs_ibl"}).text
+        except:
+            o["Year"]=None
+        try:
+            o["Paper url"]= "https://scholar.google.com" + paper.find("a","gsc_a_at").get("href")
+        except:
+            o["Paper url"]=None
+        l.append(o)
+        o={}
+
+    paper_df = pd.DataFrame(l)
+    paper_df.dropna(axis=0, inplace=True, ignore_index=True)
+    return paper_df
+
+def legacy_paper_list(soups):
+    return pd.concat([legacy_paper_table(soup) for soup in soups], ignore_index=True)
+
+def legacy_paper_details(paper_df, details):
+    detailed_paper_df = paper_df.copy()
+    for column in ['Google Scholar profile name', 'Publication date', 'Journal', 'Source', 'Conference', 'Authors', 'Primary author', 'Supporting authors']:
+        detailed_paper_df[column] = np.nan
+
+    for idx, paper in enumerate(details):
+        detailed_paper_df['Google Scholar profile name'] = paper['Google Scholar profile name']
+        for field in ['Publication date', 'Journal', 'Authors', 'Source', 'Conference']:
+            if not pd.isna(paper[field]):
+                detailed_paper_df[field][idx] = paper[field]
+        try:
+            detailed_paper_df['Authors'][idx] = detailed_paper_df['Authors'][idx].split(', ')
+            detailed_paper_df['Primary author'][idx] = detailed_paper_df['Authors'][idx][0]
+        except:
+            detailed_paper_df['Authors'][idx] = np.nan
+            detailed_paper_df['Primary author'][idx] = np.nan
+        try:
+            if len(detailed_paper_df['Authors'][idx]) > 1:
+                detailed_paper_df['Supporting authors'][idx] = detailed_paper_df['Authors'][idx][1:]
+        except:
+            detailed_paper_df['Supporting authors'][idx] = np.nan
+
+    return detailed_paper_df
+
+def legacy_academic_table(soup):
+    academic_df = pd.DataFrame(columns = ['Academic', 'Affiliation', 'Citations','h-index','i10-index'], index=[0])
+    academic_df['Academic'][0] = soup.find("div",{"id":"gsc_prf_inw"}).text
+    academic_df['Affiliation'][0] = soup.find("a",{"class":"gsc_prf_ila"}).text
+
+    sidePanel = soup.find("div",{"id":"gsc_rsb_cit"})
+    for row in sidePanel.find("tbody").find_all("tr"):
+        academic_df[row.find("a",{"class":"gsc_rsb_f gs_ibl"}).text][0] = row.find("td",{"class":"gsc_rsb_std"}).text
+
+    hist_labs = sidePanel.find_all("span", {"class":"gsc_g_t"})
+    hist_vals = sidePanel.find_all("a", {"class":"gsc_g_a"})
+    real_year_index = [int(val.get("style").split(':')[-1]) for val in hist_vals]
+    num_years = int(hist_labs[-1].text) - int(hist_labs[0].text) + 1
+    has_citations = [1 if index in real_year_index else 0 for index in reversed(range(1, num_years+1))]
+    counter = 0
+    for idx, item in enumerate(has_citations):
+        if item == 1:
+            has_citations[idx] = hist_vals[counter].text
+            counter += 1
+
+    for year, cite_count in zip(hist_labs, has_citations):
+        academic_df["Citations in " + str(year.text)] = np.nan
+        academic_df["Citations in " + str(year.text)] = cite_count
+
+    return academic_df
+
+## Current version of the program
+
+def current_paper_list(scraper, soups):
+    rows = list()
+    for soup in soups:
+        rows.extend(scraper.paper_rows(soup))
+    return pd.DataFrame.from_records(rows, columns=scraper.PAPER_TABLE_COLUMNS)
+
+def raw_details(details):
+    '''
+    Undoes the splitting of authors, to give the details as they are read from the page, which the legacy code then splits itself.
+    '''
+    raw = dict(details)
+    raw['Authors'] = ', '.join(details['Authors'])
+    return raw
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks building the paper and academic dataframes.')
+    parser.add_argument('--papers', type=int, default=5000, help='number of papers in the synthetic profile (default: 5000)')
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed runs of each case (default: 3)')
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore') #the legacy code triggers a SettingWithCopyWarning for every cell it writes
+    scraper = load_scraper()
+
+    profile = scraper.parse_page(read_fixture('profile'), 'profile')
+    soups = [profile] * max(1, args.papers // scraper.PROFILE_PAGE_SIZE)
+    details = scraper.parse_paper_details(scraper.parse_page(read_fixture('paper'), 'paper'))
+
+    paper_df = current_paper_list(scraper, soups)
+    all_details = [dict(details) for _ in range(len(paper_df))]
+    all_raw_details = [raw_details(details) for _ in range(len(paper_df))]
+    print(f'Synthetic profile of {len(paper_df)} papers\n')
+
+    cases = [
+        ('paper table', lambda: legacy_paper_list(soups), lambda: current_paper_list(scraper, soups)),
+        ('paper details', lambda: legacy_paper_details(paper_df, all_raw_details), lambda: scraper.add_paper_details(paper_df, all_details)),
+        ('academic table', lambda: legacy_academic_table(profile), lambda: scraper.get_academic_table(profile)),
+    ]
+
+    print(f'{"table":<16}{"version":<10}{"ms":>10}{"peak KiB":>10}   speedup')
+    for name, legacy, current in cases:
+        with redirect_stdout(io.StringIO()): #get_academic_table reports its progress
+            legacy_seconds, legacy_peak = measure(legacy, args.repeat)
+            seconds, peak = measure(current, args.repeat)
+        print(f'{name:<16}{"1.1":<10}{legacy_seconds*1000:>10.1f}{legacy_peak/1024:>10.0f}')
+        print(f'{name:<16}{"current":<10}{seconds*1000:>10.1f}{peak/1024:>10.0f}   x{legacy_seconds/seconds:.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+'''
+Benchmarks how long the program takes to start: running "scholar-scraper.py --help" in a fresh Python process, which reads the command line
+options and exits without scraping anything, compared with starting Python and doing nothing.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--repeat N]
+'''
+
+import argparse
+import os.path
+import statistics
+import subprocess
+import sys
+import time
+
+from common import ROOT
+
+def time_command(command, repeat):
+    '''
+    Runs a command repeatedly and gets its median wall clock time.
+
+    Parameters:
+        command (list str): command to run
+        repeat (int): number of runs
+
+    Returns:
+        seconds (float): median time of a run, in seconds
+    '''
+    times = list()
+    for i in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the startup time of the program.')
+    parser.add_argument('--repeat', type=int, default=10, help='number of runs of each command (default: 10)')
+    args = parser.parse_args()
+
+    python = time_command([sys.executable, '-c', 'pass'], args.repeat)
+    help = time_command([sys.executable, os.path.join(ROOT, 'scholar-scraper.py'), '--help'], args.repeat)
+
+    print(f'{"command":<32}{"ms":>8}')
+    print(f'{"python -c pass":<32}{python*1000:>8.0f}')
+    print(f'{"scholar-scraper.py --help":<32}{help*1000:>8.0f}')
+    print(f'{"startup of the program":<32}{(help - python)*1000:>8.0f}')
+
+if __name__ == '__main__':
+    main()
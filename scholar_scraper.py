@@ -0,0 +1,4305 @@
+## Import relevant packages
+import importlib
+import importlib.util
+
+class LazyModule:
+    '''
+    Stands in for a module that is only imported the first time one of its attributes is used. Heavy packages (pandas, selenium, pyarrow
+    etc.) are imported this way, so that the program starts quickly and only pays for the packages a run actually uses, e.g. --help imports
+    none of them and a run without --format parquet never imports pyarrow.
+
+    Parameters:
+        name (str): name of the module, e.g. 'pyarrow.parquet'
+        setup (function): called with the module once it has been imported, or None
+    '''
+
+    def __init__(self, name, setup=None):
+        self._name = name
+        self._setup = setup
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            module = importlib.import_module(self._name)
+            if self._setup is not None:
+                self._setup(module)
+            self._module = module
+        return getattr(self._module, attr)
+
+def set_pandas_options(pd):
+    pd.set_option('display.max_rows', None)
+    pd.set_option('display.max_columns', None)
+    pd.set_option('display.width', None)
+    pd.set_option('display.max_colwidth', None)
+
+pd = LazyModule('pandas', setup=set_pandas_options)
+np = LazyModule('numpy')
+
+from datetime import datetime, timedelta
+import hashlib
+
+import glob
+
+import time
+
+from colorama import init as colorama_init
+from colorama import Fore
+from colorama import Style
+
+webdriver = LazyModule('selenium.webdriver')
+
+#Both fetch backends identify themselves with the same browser user agent, so they look like the same client to Google Scholar
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36'
+
+requests = LazyModule('requests')
+from urllib.parse import urlsplit, parse_qs
+
+#lxml parses html several times quicker than Python's built in parser, so it is used whenever it is installed
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') is not None else 'html.parser'
+
+pa = LazyModule('pyarrow')
+pq = LazyModule('pyarrow.parquet')
+
+import os
+import os.path
+import sys
+import subprocess
+
+import argparse
+import atexit
+import random
+import math
+import queue
+import threading
+import tempfile
+import shutil
+import zlib
+import json
+import sqlite3
+import csv
+import ast
+from array import array
+import re
+from io import StringIO
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+## Defining useful functions
+
+#Types of page that are fetched, each of which can be routed to a different fetch backend
+PAGE_TYPES = ['search', 'profile', 'paper']
+
+#Text that every complete page of each type contains. Pages without it (e.g. an error or "unusual traffic" page) are not cached.
+PAGE_MARKERS = {'search': 'gs_ai_pho', 'profile': 'gsc_a_t', 'paper': 'gsc_vcpb'}
+
+#CSS selectors of an element every complete page of each type contains, which a browser waits for after loading the page
+PAGE_SELECTORS = {'search': '.gs_ai_pho', 'profile': '#gsc_a_t', 'paper': '#gsc_vcpb'}
+
+#Text found on the pages Google Scholar serves instead of the page requested when it thinks it is being scraped, and the CSS selector of
+#their CAPTCHA forms. HTTP responses with THROTTLE_STATUSES are treated the same way.
+THROTTLE_MARKERS = ['unusual traffic', 'gs_captcha_f', 'g-recaptcha', 'captcha-form']
+THROTTLE_SELECTOR = '#gs_captcha_f, #captcha-form, .g-recaptcha'
+THROTTLE_STATUSES = [429, 503]
+
+#How long a cached page of each type stays fresh, in seconds. Papers rarely change, but profiles gain citations all the time.
+CACHE_TTLS = {'search': 30*24*60*60, 'profile': 12*60*60, 'paper': 90*24*60*60}
+
+def page_strainer(ids=(), classes=()):
+    '''
+    Makes a SoupStrainer which keeps only the elements (and everything inside them) that have one of the given ids or classes, so that
+    the rest of a page (scripts, styles, menus etc.) is never built into a tree.
+
+    Parameters:
+        ids (list): ids of the elements to keep
+        classes (list): classes of the elements to keep
+
+    Returns:
+        strainer (SoupStrainer): strainer to pass to BeautifulSoup as parse_only
+    '''
+    def keep(tag, attrs=None):
+        if attrs is None: #newer versions of bs4 pass the tag itself rather than its name and attributes
+            attrs = tag.attrs
+        tag_classes = attrs.get('class') or []
+        if isinstance(tag_classes, str):
+            tag_classes = tag_classes.split()
+        return attrs.get('id') in ids or any(c in classes for c in tag_classes)
+
+    from bs4 import SoupStrainer
+    return SoupStrainer(keep)
+
+#The parts of each type of page that are read, as the ids and classes of the elements to keep (see page_strainer). Everything else on the
+#page is skipped while parsing.
+PAGE_PARTS = {
+    'search': ([], ['gsc_1usr', 'gs_ai_pho']), #each search result, with the link to its profile
+    'profile': (['gsc_prf_i', 'gsc_rsb_cit', 'gsc_rsb_co', 'gsc_a_t'], []), #name and affiliation, citation panel, co-authors and table of papers
+    'paper': (['gsc_vcpb'], ['gs_bdy_sb_sec']), #paper's details and the academic's name in the side bar
+}
+
+PAGE_STRAINERS = dict() #page type -> strainer, made when first needed (see get_strainer)
+
+#Default number of worker threads for each stage of a query (see query_stages) with --pipeline. Details uses two, as fetching the papers of
+#one query while the next query's profile is listed keeps the request budget busy.
+PIPELINE_WORKERS = {'resolve': 1, 'list': 1, 'details': 2, 'format': 1}
+
+def get_strainer(page_type):
+    '''
+    Gets the SoupStrainer for a type of page (see PAGE_PARTS).
+
+    Parameters:
+        page_type (str): one of PAGE_TYPES
+
+    Returns:
+        strainer (SoupStrainer): strainer to pass to BeautifulSoup as parse_only
+    '''
+    if page_type not in PAGE_STRAINERS:
+        PAGE_STRAINERS[page_type] = page_strainer(*PAGE_PARTS[page_type])
+    return PAGE_STRAINERS[page_type]
+
+#Number of papers requested per page of a profile's list of papers, which is the most Google Scholar will return at once
+PROFILE_PAGE_SIZE = 100
+
+#Columns of the table of papers listed on a profile, in the order paper_rows extracts them
+PAPER_TABLE_COLUMNS = ['Title', 'Citations', 'Year', 'Paper url']
+
+#Additional columns gathered from each paper's own page, in the order they are added to the paper table
+PAPER_DETAIL_COLUMNS = ['Google Scholar profile name', 'Publication date', 'Journal', 'Source', 'Conference', 'Authors', 'Primary author', 'Supporting authors']
+
+def parse_page(html, page_type):
+    '''
+    Parses the html of a page with bs4, using the quickest parser available (see HTML_PARSER) and building only the parts of the page that
+    are read (see PAGE_PARTS).
+
+    Parameters:
+        html (str): html of the page
+        page_type (str): type of the page, one of PAGE_TYPES
+
+    Returns:
+        soup (bs4): parsed html data for the page
+    '''
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, HTML_PARSER, parse_only=get_strainer(page_type))
+
+def get_scholar_search_url(search):
+    '''
+    Gets the Google Scholar search results for user inputted first and last names 
+
+    Parameters:
+        first_name (str): first name
+        last_name (str): last name
+
+    Returns:
+        search_url (str): url of search query
+    '''
+    s = search.split(" ")
+    query = ""
+    for i in s:
+        query = query + "+" + i
+
+    query = query[1:]
+
+    url = "https://scholar.google.com/citations?hl=en&view_op=search_authors&mauthors=" + query + "&btnG="
+    
+    return url
+
+def generate_id(s):
+    '''
+    Generates a unique hash id for each column based on a string input which will be the paper title. 
+
+    Parameters:
+        s (str): a string input, which will be made up of multiple columns of a dataframe 'added' (concatenated) together
+
+    Returns:
+        An 8 digit hash that uniquely identifies the string entered, and hence the row of a dataframe it represents
+    '''
+    return int.from_bytes(hashlib.sha256(s.encode('utf-8')).digest(), 'big') % 10**8
+
+def generate_key(s):
+    '''
+    Generates the wide key of a string, the same as the key generate_ids gives it: the top 63 bits of its hash, which (unlike the 8 digit id
+    of generate_id) is practically never shared by two different strings, so it is what papers and academics are identified by.
+
+    Parameters:
+        s (str): a string input, e.g. a paper's title
+
+    Returns:
+        A 63 bit hash that identifies the string entered
+    '''
+    return int.from_bytes(hashlib.sha256(s.encode('utf-8')).digest()[:8], 'big') >> 1
+
+def format_date(s):
+    '''
+    If a date does not contian a '/', it is likely in the form YYYY, so add the following '/1/1' to make compatable with datetime YYYY/mm/dd
+
+    Parameters:
+        s (str or numerical type): a string or numerical form of a date
+
+    Returns:
+        A date representing s in the form YYYY/mm/dd.
+    '''
+    s= str(s)
+    n = s.count('/')
+    
+    if n == 2: #date is currently in form YYYY/mm/dd
+        return s 
+    elif n == 1: #date is currently in form YYYY/mm
+        return s + '/1'
+    elif len(s) == 4: #date is currently in form YYYY
+        return s + '/1/1'
+    else: #there is no date information
+        return ''
+    
+def generate_ids(values):
+    '''
+    Generates the ids of many strings at once. Each string gets both its 8 digit id (the same as generate_id gives), which is kept so that ids
+    match those in existing results, and a wider 63 bit key, which is far less likely to be shared by two different strings. Each distinct
+    string is only hashed once, and the ids are worked out from the hashes with numpy rather than one Python int at a time.
+
+    Parameters:
+        values (pandas series): strings to generate ids for
+
+    Returns:
+        ids (numpy array): 8 digit id of each string
+        keys (numpy array): 63 bit key of each string
+    '''
+    codes, uniques = pd.factorize(values)
+    digests = b''.join(hashlib.sha256(s.encode('utf-8')).digest() for s in uniques)
+    words = np.frombuffer(digests, dtype='>u8').astype(np.uint64).reshape(-1, 4) #each 256 bit hash as four 64 bit words, most significant first
+
+    #The hash modulo 10**8, worked out a word at a time: each word's remainder times the remainder of its place value (2**192, 2**128, 2**64, 1)
+    m = 10**8
+    places = np.array([pow(2, 64*k, m) for k in [3, 2, 1, 0]], dtype=np.uint64)
+    ids = ((words % np.uint64(m)) * places).sum(axis=1) % np.uint64(m)
+
+    keys = words[:, 0] >> np.uint64(1) #top 63 bits, so the key fits in a signed 64 bit integer
+
+    return ids.astype(np.int64)[codes], keys.astype(np.int64)[codes]
+
+def format_dates(dates):
+    '''
+    Standardises many publication dates at once, in the same way as format_date: YYYY/mm/dd is kept, YYYY/mm becomes YYYY/mm/1, YYYY becomes
+    YYYY/1/1, and anything else becomes ''.
+
+    Parameters:
+        dates (pandas series): dates as strings (or numbers, or NaN)
+
+    Returns:
+        dates (pandas series): dates in the form YYYY/mm/dd, or ''
+    '''
+    dates = dates.astype(str)
+    slashes = dates.str.count('/')
+    formatted = np.select([slashes == 2, slashes == 1, dates.str.len() == 4], [dates, dates + '/1', dates + '/1/1'], '')
+    return pd.Series(formatted, index=dates.index, dtype=object)
+
+def parse_dates(dates):
+    '''
+    Parses standardised publication dates (see format_dates) into real dates, with NaT for those that are missing.
+
+    Parameters:
+        dates (pandas series): dates in the form YYYY/mm/dd, or ''
+
+    Returns:
+        dates (pandas series): dates as datetime64
+    '''
+    return pd.to_datetime(dates, format='%Y/%m/%d', errors='coerce')
+
+def citation_counts(citations):
+    '''
+    Converts numbers of citations, as read from a page or a csv, to whole numbers, with a blank (<NA>) for papers that have no citations.
+
+    Parameters:
+        citations (pandas series): numbers of citations, as strings or numbers
+
+    Returns:
+        citations (pandas series): numbers of citations, as Int64
+    '''
+    return pd.to_numeric(citations, errors='coerce').astype('Int64')
+
+def read_existing_csv(kind='academics'):
+    '''
+    Reads in the most recent existing 'all academics YYYY-mm-dd.csv' (or 'all papers YYYY-mm-dd.csv') file from the root directory.
+
+    Parameters:
+        kind (str): 'academics' or 'papers'
+
+    Returns:
+        exist_df (pandas df): the existing database as a pandas dataframe, or None if there is no existing file.
+    '''
+    paths = sorted(glob.glob(f'all {kind} *.csv')) #dates are YYYY-mm-dd, so the last file is the most recent
+    if len(paths) == 0:
+        return None
+
+    exist_df = pd.read_csv(paths[-1])
+    return exist_df
+
+def load_known_papers():
+    '''
+    Loads the papers from the most recent 'all papers YYYY-mm-dd.csv' file, indexed by PaperKey, so that an incremental run can skip fetching
+    the details of papers it already has.
+
+    Returns:
+        known_papers (pandas df): the existing papers indexed by PaperKey, or None if there are no existing results.
+    '''
+    exist_df = read_existing_csv('papers')
+    if exist_df is None:
+        return None
+
+    exist_df['Citations'] = citation_counts(exist_df['Citations']) #stops blank citations turning counts into floats
+    exist_df['PaperKey'] = generate_ids(exist_df['Title'])[1] #results from before PaperKey was added do not have it
+    known_papers = exist_df.set_index('PaperKey')
+    print(f'{Fore.BLUE}--> Incremental run: {known_papers.index.nunique()} papers found in existing results.{Style.RESET_ALL}')
+
+    return known_papers
+
+def paper_rows(soup):
+    '''
+    Gets the rows of the table of academic papers from the html data, as tuples of their 'Title', number of 'Citations', 'Year' of publication,
+    and the individual 'Paper url' (see PAPER_TABLE_COLUMNS). Rows missing any of these, such as the table's header, are skipped.
+
+    Parameters:
+        soup (bs4): parsed html data for the academics page
+
+    Returns:
+        rows (list tuple): one tuple per paper
+    '''
+    rows = list()
+
+    allPapersContainer = soup.find("table",{"id":"gsc_a_t"}) #find the table of papers
+    allPapers = allPapersContainer.find_all("tr") #extract all papers from within that panel 
+
+    for paper in allPapers:
+        link = paper.find("a",{"class":"gsc_a_at"}) #the title links to the paper's page
+        citations = paper.find("a",{"class":"gsc_a_ac gs_ibl"})
+        year = paper.find("span",{"class":"gsc_a_h gsc_a_hc gs_ibl"})
+        if link is None or link.get("href") is None or citations is None or year is None:
+            continue
+
+        rows.append((link.text, citations.text, year.text, "https://scholar.google.com" + link.get("href")))
+
+    return rows
+
+def get_paper_table(soup):
+    '''
+    Get's the table of academic papers from the html data. This contains their 'Title', number of 'Citations', 'Year' of publication, and the individual 'Paper url'
+    which will be used by a later function to gather further details of the paper.
+
+    Parameters:
+        soup (bs4): parsed html data for the academics page
+
+    Returns:
+        paper_df (pandas df): dataframe of the papers
+    '''
+    return pd.DataFrame.from_records(paper_rows(soup), columns=PAPER_TABLE_COLUMNS)
+
+def get_profile_page_url(profile_url, start):
+    '''
+    Gets the url of one page of a profile's list of papers, holding up to PROFILE_PAGE_SIZE papers starting from the start'th paper.
+
+    Parameters:
+        profile_url (str): url of the profile page
+        start (int): offset of the first paper on the page
+
+    Returns:
+        page_url (str): url of the page of papers
+    '''
+    return profile_url + f'&cstart={start}&pagesize={PROFILE_PAGE_SIZE}'
+
+def get_paper_list(profile_url, fetcher, known_ids=None):
+    '''
+    Gets the table of all of an academic's papers (see paper_rows) by fetching their profile's list of papers in pages of the largest size
+    Google Scholar allows, rather than clicking "Show More" until every paper is shown. Each page is parsed as soon as it arrives, and pages are
+    fetched until one comes back with fewer than PROFILE_PAGE_SIZE papers, i.e. the last page.
+
+    If known_ids is given, pages also stop being fetched after the first page containing a known paper. Papers are sorted by year, so every
+    paper further down the list is also likely to be known already.
+
+    Parameters:
+        profile_url (str): url of the profile page
+        fetcher (PageFetcher): fetcher used to load each page
+        known_ids (set): PaperKeys of papers in existing results, or None to list every paper
+
+    Returns:
+        paper_df (pandas df): dataframe of all the academic's papers
+        first_soup (bs4): parsed html data for the first page, which also holds the academic's information
+    '''
+    rows = list() #rows of every page, made into a dataframe once they have all been gathered
+    first_soup = None
+    start = 0
+
+    while True:
+        resp = fetcher.fetch(get_profile_page_url(profile_url, start), 'profile')
+        with fetcher.metrics.stage('parse', 'profile'):
+            soup=parse_page(resp, 'profile')
+            page_rows = paper_rows(soup)
+        if first_soup is None:
+            first_soup = soup
+
+        rows.extend(page_rows)
+
+        listed = soup.find("table",{"id":"gsc_a_t"}).find_all("tr",{"class":"gsc_a_tr"}) #rows as listed, before empty rows are skipped
+        if len(listed) < PROFILE_PAGE_SIZE:
+            break
+        if known_ids is not None and any(generate_key(row[0]) in known_ids for row in page_rows):
+            print(f'{Fore.GREEN}-->{Style.RESET_ALL}', 'Reached papers that already exist in previous results.')
+            break
+        start += PROFILE_PAGE_SIZE
+
+    paper_df = pd.DataFrame.from_records(rows, columns=PAPER_TABLE_COLUMNS)
+    print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'A list of all papers has been successfully stored.')
+
+    return paper_df, first_soup
+    
+def check_new_papers(known_ids, new_papers):
+    '''
+    Goes through the papers dataframe before extra details have been gathered and checks which papers do not already exist in the old database.
+
+    Parameters: 
+        known_ids (set): PaperKeys of the papers in the old database
+        new_papers (pandas df): the new dataframe of (potentially) new academics papers
+
+    Returns:
+        is_new (pandas series): True for each paper whose PaperKey is not in known_ids
+    '''
+    new_keys = pd.Series(generate_ids(new_papers['Title'])[1], index=new_papers.index)
+    return ~new_keys.isin(known_ids)
+
+def add_known_papers(f_paper_df, seen_df, known_papers, academic):
+    '''
+    Adds an academic's papers that already exist in previous results to their newly scraped papers. Papers that were listed on the profile
+    again keep their previously gathered details, but take their number of citations (and year and url) from the profile, and are listed
+    under this academic even if their details were gathered for another. The academic's papers further down the profile, which were not
+    listed again, are carried over unchanged.
+
+    Parameters:
+        f_paper_df (pandas df): formatted dataframe of the academic's new papers
+        seen_df (pandas df): papers listed on the profile that already exist in previous results, before extra details have been gathered
+        known_papers (pandas df): the existing papers indexed by PaperKey (see load_known_papers)
+        academic (str): the academic's Google Scholar profile name
+
+    Returns:
+        combined_paper_df (pandas df): the new papers, followed by the updated and carried over papers
+    '''
+    previous = known_papers[known_papers['Google Scholar profile name'] == academic]
+
+    #Details are taken from the academic's own previous rows where possible, otherwise from whichever academic's row has the paper
+    lookup = pd.concat([known_papers, previous])
+    lookup = lookup[~lookup.index.duplicated(keep='last')]
+
+    seen_ids = generate_ids(seen_df['Title'])[1].tolist()
+    updated = lookup.loc[seen_ids].copy()
+    for column in ['Citations', 'Year', 'Paper url']:
+        updated[column] = seen_df[column].to_list()
+    updated['Citations'] = citation_counts(updated['Citations'])
+    updated['Google Scholar profile name'] = academic #a paper found under another academic is now listed on this academic's profile too
+
+    listed_ids = set(seen_ids) | set(f_paper_df['PaperKey'])
+    carried = previous[~previous.index.isin(listed_ids)]
+    carried = carried[~carried.index.duplicated(keep='last')] #the latest row of a paper written more than once
+
+    print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'{len(updated)} papers updated and {len(carried)} papers carried over from previous results.')
+
+    combined_paper_df = pd.concat([f_paper_df, updated.reset_index(), carried.reset_index()], ignore_index=True)
+    return combined_paper_df[f_paper_df.columns]
+
+def get_academic_table(soup):
+    '''
+    Get's the academics information from the html data. This will grab their name as 'Academic', university 'Affiliation', their total number of 'Citations', 
+    their 'h-index' and 'i10-index', and then will breakdown their citations per year as far back as they are stored on Google Scholar.
+
+    Parameters:
+        soup (bs4): parsed html data for the academics page
+    '''
+    
+    #The academic's details are gathered into a dictionary of columns, which is made into a dataframe once at the end
+    academic = dict.fromkeys(['Academic', 'Affiliation', 'Citations','h-index','i10-index'], np.nan)
+
+    #Grabs the name and university affiliation from the top of the page (deals with capitalization, full names etc
+    academic['Academic'] = soup.find("div",{"id":"gsc_prf_inw"}).text
+    try:
+        academic['Affiliation'] = soup.find("a",{"class":"gsc_prf_ila"}).text
+    except:
+        print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f"{Fore.RED}No affiliation found.{Style.RESET_ALL}")
+        academic['Affiliation'] = "None"
+
+    #Finds the html data associated with the info panel on the right
+    sidePanel = soup.find("div",{"id":"gsc_rsb_cit"})
+    table = sidePanel.find("tbody") #table with total citations
+    rows = table.find_all("tr")
+
+    for row in rows:
+        field = row.find("a",{"class":"gsc_rsb_f gs_ibl"}).text
+        
+        try:
+            academic[field] = row.find("td",{"class":"gsc_rsb_std"}).text 
+        except:
+            academic[field] = None
+            
+
+    #Gets citations per year from the hover-over info on the histogram
+    #####
+    #There is a complication here because not every year has citations, and year labels and values are not intrinsically linked.
+    #Thus need to ensure the lists are the same length, and pair them up
+    hist_labs = sidePanel.find_all("span", {"class":"gsc_g_t"})
+    hist_vals = sidePanel.find_all("a", {"class":"gsc_g_a"}) 
+
+    min_year = int(hist_labs[0].text)
+    max_year = int(hist_labs[-1].text)
+    num_years = int(max_year-min_year+1)
+
+    
+    #Years from min_year to max_year are indexed in the html from 28 to 1
+    #If an index value is not present, then 0 citations
+    #This loop stores only the index values for years with citation.
+    real_year_index = list()
+    for val in hist_vals:
+        year_index = val.get("style")
+        year_index = year_index.split(':')[-1] #splits style value at every : and keeps only the last one, the index
+        real_year_index.append(int(year_index))    
+
+    
+    #List of all possible indices to compare against
+    all_possible_indices = list()
+    for x in reversed(range(num_years)):
+        all_possible_indices.append(x+1)
+        
+
+    #Creating a binary list the length of all_possible_indices. If there WAS an index in the html, assign 1. If not, 0
+    has_citations = list()
+    for possible_index in all_possible_indices:
+        if possible_index in real_year_index:
+            has_citations.append(1)
+        else:
+            has_citations.append(0)
+
+    
+    #Now can run through the binary array and if 1, can assign relavnt value and if 0, will skip.
+    #Will count through the histogram values inside the loop, since that list is smaller (as missing values were omitted)
+    hist_val_counter = 0
+    for idx, item in enumerate(has_citations):
+        if item == 1:
+            has_citations[idx] = hist_vals[hist_val_counter].text
+            hist_val_counter += 1
+        else:
+            continue
+
+    
+    #Can now finally assign a column and value for each year and citation count
+    for year, cite_count in zip(hist_labs, has_citations):
+        academic["Citations in " + str(year.text)] = cite_count
+
+    academic_df = pd.DataFrame([academic])
+    
+    print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'Total citation details have been successully stored.')
+
+    
+    return academic_df
+
+def is_throttled(html, page_type, status=None):
+    '''
+    Checks whether Google Scholar served a CAPTCHA, "unusual traffic" or rate limit page instead of the page requested. Pages that contain
+    what every complete page of their type contains (see PAGE_MARKERS) are never counted, in case e.g. a paper's title mentions unusual traffic.
+
+    Parameters:
+        html (str): html of the page
+        page_type (str): one of PAGE_TYPES
+        status (int): HTTP status of the response, or None if it is not known (e.g. for a page loaded in Chrome)
+
+    Returns:
+        throttled (bool): True if the page was throttled
+    '''
+    if status in THROTTLE_STATUSES:
+        return True
+    return PAGE_MARKERS[page_type] not in html and any(marker in html for marker in THROTTLE_MARKERS)
+
+class ThrottledError(Exception):
+    '''
+    Raised when a page is still throttled after every retry allowed by the RequestBudget.
+    '''
+
+class Metrics:
+    '''
+    Timings and counts for each stage of a run, so that the time a slow run took can be put down to e.g. starting Chrome, waiting for the
+    request budget, loading pages, parsing, formatting or writing the outputs. Stages are timed with stage() (or add_time()) and events
+    such as pages fetched or retries are counted with count(). Each only takes a lock and adds to a few numbers, so metrics are always
+    gathered, and a summary table is printed by report().
+
+    If a path is given the metrics are also written to it, either as JSON lines (a line for each stage as it finishes, and a line with
+    every total each time the metrics are flushed), or in the Prometheus text format (the totals, rewritten each time the metrics are
+    flushed, e.g. for the node exporter's textfile collector).
+
+    Parameters:
+        path (str): file to write the metrics to, or None
+        format (str): one of Metrics.FORMATS
+    '''
+
+    FORMATS = ['jsonl', 'prometheus']
+
+    def __init__(self, path=None, format='jsonl'):
+        self.path = path
+        self.format = format
+        self.counters = dict() #name -> count
+        self.stages = dict() #(stage, page type) -> [runs, total seconds, longest seconds]
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._file = open(path, 'a', encoding='utf-8') if path is not None and format == 'jsonl' else None
+
+    @contextmanager
+    def stage(self, name, page_type=None, **fields):
+        '''
+        Times a stage of the run for the duration of a with block. The time is added even if the block raises.
+
+        Parameters:
+            name (str): name of the stage, e.g. 'fetch' or 'parse'
+            page_type (str): one of PAGE_TYPES, for stages timed separately for each type of page, or None
+            fields: extra fields for the stage's JSON line only, e.g. the search query
+        '''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start, page_type, **fields)
+
+    def add_time(self, name, seconds, page_type=None, **fields):
+        '''
+        Adds time spent in a stage, for time which is not spent in a with block, e.g. waiting for the request budget.
+
+        Parameters:
+            name (str): name of the stage
+            seconds (float): time spent in the stage
+            page_type (str): one of PAGE_TYPES, or None
+            fields: extra fields for the stage's JSON line only
+        '''
+        with self._lock:
+            totals = self.stages.setdefault((name, page_type), [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] = max(totals[2], seconds)
+
+            if self._file is not None:
+                line = {'time': round(time.time(), 3), 'stage': name, 'page_type': page_type, 'seconds': round(seconds, 6), **fields}
+                self._file.write(json.dumps(line) + '\n')
+
+    def count(self, name, n=1):
+        '''
+        Adds n to a counter, e.g. 'pages_fetched'.
+        '''
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def totals(self):
+        '''
+        Gets every total so far.
+
+        Returns:
+            totals (dict): seconds since the metrics were started, each counter, and the runs, total seconds and longest seconds of each stage
+        '''
+        with self._lock:
+            stages = [{'stage': name, 'page_type': page_type, 'runs': runs, 'seconds': total, 'max_seconds': longest}
+                      for (name, page_type), (runs, total, longest) in self.stages.items()]
+            return {'elapsed': time.monotonic() - self._started, 'counters': dict(self.counters), 'stages': stages}
+
+    def flush(self):
+        '''
+        Writes the totals so far to the metrics file, if there is one.
+        '''
+        if self.path is None:
+            return
+
+        totals = self.totals()
+        with self._lock:
+            if self._file is not None:
+                self._file.write(json.dumps({'time': round(time.time(), 3), 'totals': totals}) + '\n')
+                self._file.flush()
+                return
+
+        lines = ['# TYPE scholar_scraper_elapsed_seconds gauge', f'scholar_scraper_elapsed_seconds {totals["elapsed"]:.3f}']
+        for name, value in sorted(totals['counters'].items()):
+            lines += [f'# TYPE scholar_scraper_{name}_total counter', f'scholar_scraper_{name}_total {value}']
+        for metric, key in [('stage_runs_total', 'runs'), ('stage_seconds_total', 'seconds'), ('stage_seconds_max', 'max_seconds')]:
+            lines.append(f'# TYPE scholar_scraper_{metric} {"gauge" if key == "max_seconds" else "counter"}')
+            for stage in totals['stages']:
+                labels = f'stage="{stage["stage"]}"' + (f',page_type="{stage["page_type"]}"' if stage['page_type'] is not None else '')
+                lines.append(f'scholar_scraper_{metric}{{{labels}}} {stage[key]:.6g}')
+
+        #Write to a temporary file, then rename it over the old one, so the file is never read half-written
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+        os.replace(temp_path, self.path)
+
+    def close(self):
+        '''
+        Writes the final totals to the metrics file, if there is one. Safe to call more than once.
+        '''
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self.path = None
+
+    def report(self):
+        '''
+        Prints a table of the time spent in each stage, longest first, and every counter.
+        '''
+        totals = self.totals()
+        print(f'{Fore.BLUE}Stage timings ({totals["elapsed"]:.0f} seconds in total):{Style.RESET_ALL}')
+        print(f'{Fore.BLUE}-->{Style.RESET_ALL} {"stage":<24}{"runs":>8}{"total s":>10}{"mean s":>10}{"max s":>10}')
+        for stage in sorted(totals['stages'], key=lambda stage: -stage['seconds']):
+            name = stage['stage'] + (f' ({stage["page_type"]})' if stage['page_type'] is not None else '')
+            print(f'{Fore.BLUE}-->{Style.RESET_ALL} {name:<24}{stage["runs"]:>8}{stage["seconds"]:>10.2f}'
+                  f'{stage["seconds"]/stage["runs"]:>10.3f}{stage["max_seconds"]:>10.3f}')
+        if len(totals['counters']) > 0:
+            print(f'{Fore.BLUE}-->{Style.RESET_ALL}', ', '.join(f'{value} {name.replace("_", " ")}' for name, value in sorted(totals['counters'].items())))
+
+class RequestBudget:
+    '''
+    A politeness budget shared by every thread fetching pages from Google Scholar. It limits the number of requests in flight at once, and
+    schedules the start of each request with a token bucket for each host and page type, so that each kind of page is requested at no more
+    than its rate (allowing up to burst requests at once after a quiet spell). The gap before each request is randomly lengthened or
+    shortened by up to jitter (as a fraction), so requests are not evenly spaced. With an hourly_limit, the start times of the last
+    hourly_limit requests of every host and page type are also kept, and a request is only started once the oldest of them is more than an
+    hour ago, so no more than hourly_limit requests are started in any hour (a sliding window, not a bucket that refills).
+
+    The budget also adapts to Google Scholar. When a page comes back throttled (see is_throttled), no more requests are made to that host
+    and page type for a pause which doubles each time it happens again (up to max_backoff), its rate is halved, and the page is retried.
+    The rate is doubled again after every 20 pages in a row that come back fine.
+
+    Parameters:
+        max_in_flight (int): maximum number of page requests in progress at the same time
+        max_per_second (float): maximum number of page requests started per second, for each host and page type without a rate in rates
+        rates (dict): rates for particular pages, keyed by page type (e.g. 'paper'), host (e.g. 'scholar.google.com') or both
+                      ('scholar.google.com:paper'), the most specific of which is used
+        jitter (float): fraction by which the gap before each request is randomly changed
+        burst (int): number of requests that can be made at once after a quiet spell
+        backoff (float): seconds of the first pause after a page is throttled
+        max_backoff (float): longest pause after a page is throttled, in seconds
+        retries (int): number of times a throttled page is retried before ThrottledError is raised
+        metrics (Metrics): metrics to add waits, page loads and retries to, or None
+        hourly_limit (int): most requests started in an hour, across all hosts and page types, or None for no limit
+    '''
+
+    RECOVERY = 20 #number of pages in a row that must come back fine before a throttled rate is doubled again
+
+    def __init__(self, max_in_flight=2, max_per_second=0.5, rates=None, jitter=0.3, burst=1, backoff=30, max_backoff=15*60, retries=5, metrics=None,
+                 hourly_limit=None):
+        self.max_in_flight = max_in_flight
+        self.max_per_second = max_per_second
+        self.rates = rates or {}
+        self.jitter = jitter
+        self.burst = burst
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retries = retries
+        self.run_metrics = metrics if metrics is not None else Metrics() #metrics() gets the budget's own metrics
+
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._buckets = dict() #(host, page type) -> state of its token bucket and backoff
+        self.hourly_limit = hourly_limit
+        self._hourly = deque(maxlen=hourly_limit) #start times of the last hourly_limit requests, oldest first
+
+        #Metrics
+        self.requests = 0
+        self.wait_time = 0.0 #seconds spent waiting for the budget, summed over all threads
+        self.throttle_events = 0
+        self._first_request = None
+
+    def _bucket(self, url, page_type):
+        host = urlsplit(url).netloc
+        if (host, page_type) not in self._buckets:
+            rate = self.max_per_second
+            for key in [page_type, host, f'{host}:{page_type}']: #least to most specific
+                rate = self.rates.get(key, rate)
+            self._buckets[(host, page_type)] = {'host': host, 'page_type': page_type, 'rate': rate, 'next': 0.0, 'paused_until': 0.0, 'level': 0, 'successes': 0}
+        return self._buckets[(host, page_type)]
+
+    @contextmanager
+    def request(self, url, page_type):
+        '''
+        Waits until a request for url is allowed under the budget, and holds an in-flight slot for the duration of a with block.
+
+        Parameters:
+            url (str): url of the page to be requested
+            page_type (str): one of PAGE_TYPES
+        '''
+        self._slots.acquire()
+        try:
+            #Reserve the next start time under the lock, but sleep outside it so other threads can queue up behind us
+            with self._lock:
+                bucket = self._bucket(url, page_type)
+                interval = 1/(bucket['rate'] * 0.5**bucket['level']) #each backoff level halves the rate
+                gap = interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+                now = time.monotonic()
+                earliest = max(now, self._hourly_start(now))
+                next_start = max(bucket['next'], earliest, bucket['paused_until'])
+                start = max(earliest, next_start - (self.burst-1)*interval, bucket['paused_until'])
+                bucket['next'] = next_start + gap
+                if self.hourly_limit is not None:
+                    self._hourly.append(start)
+
+                self.requests += 1
+                self.wait_time += start - now
+                if self._first_request is None:
+                    self._first_request = start
+
+            time.sleep(start - now)
+            self.run_metrics.add_time('budget_wait', start - now, page_type)
+            yield
+
+        finally:
+            self._slots.release()
+
+    def _hourly_start(self, now, requests=1):
+        #Earliest time the last of a number of requests in a row could start under the hourly limit. Starts are given out in order, so the
+        #request hourly_limit before it is the only one that has to be an hour earlier.
+        if self.hourly_limit is None or len(self._hourly) == 0:
+            return now
+        earliest = max(now, self._hourly[-1])
+        before = len(self._hourly) + requests - 1 - self.hourly_limit
+        if before >= 0:
+            earliest = max(earliest, self._hourly[before] + 3600)
+        return earliest
+
+    def hourly_wait(self, requests):
+        '''
+        Gets how long until the hourly limit has room for a number of requests in a row, with no wait between them.
+
+        Parameters:
+            requests (int): number of requests, which is capped at hourly_limit
+
+        Returns:
+            wait (float): seconds until the requests could be started, or 0 if there is no hourly limit
+        '''
+        if self.hourly_limit is None:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            return self._hourly_start(now, min(requests, self.hourly_limit)) - now
+
+    def fetch(self, url, page_type, load):
+        '''
+        Loads a page under the budget, backing off and retrying while it comes back throttled.
+
+        Parameters:
+            url (str): url of the page
+            page_type (str): one of PAGE_TYPES
+            load (function): loads the page, returning its HTTP status (or None if not known) and its html
+
+        Returns:
+            html (str): html of the page
+        '''
+        for attempt in range(self.retries + 1):
+            if attempt > 0:
+                self.run_metrics.count('retries')
+            with self.request(url, page_type), self.run_metrics.stage('load', page_type):
+                status, html = load()
+
+            if not is_throttled(html, page_type, status):
+                self._succeeded(url, page_type)
+                return html
+
+            pause = self._throttled(url, page_type)
+            print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'{Fore.RED}Throttled by Google Scholar ({page_type} page), backing off for {pause:.0f} seconds.{Style.RESET_ALL}')
+
+        raise ThrottledError(f'{page_type} page still throttled after {self.retries} retries: {url}')
+
+    def _succeeded(self, url, page_type):
+        with self._lock:
+            bucket = self._bucket(url, page_type)
+            bucket['successes'] += 1
+            if bucket['level'] > 0 and bucket['successes'] >= self.RECOVERY:
+                bucket['level'] -= 1
+                bucket['successes'] = 0
+
+    def _throttled(self, url, page_type):
+        #Pauses the host and page type for an exponentially growing time, and returns the pause in seconds
+        with self._lock:
+            bucket = self._bucket(url, page_type)
+            pause = min(self.max_backoff, self.backoff * 2**bucket['level']) * random.uniform(1, 1 + self.jitter)
+            bucket['level'] += 1
+            bucket['successes'] = 0
+            bucket['paused_until'] = max(bucket['paused_until'], time.monotonic() + pause)
+            self.throttle_events += 1
+            self.run_metrics.count('throttled_pages')
+            return pause
+
+    def metrics(self):
+        '''
+        Gets the budget's metrics.
+
+        Returns:
+            metrics (dict): number of requests, seconds spent waiting for the budget, number of throttle events, and requests per minute
+        '''
+        with self._lock:
+            elapsed = time.monotonic() - self._first_request if self._first_request is not None else 0
+            per_minute = self.requests / elapsed * 60 if elapsed > 0 else 0.0
+            return {'requests': self.requests, 'wait_time': self.wait_time, 'throttle_events': self.throttle_events, 'requests_per_minute': per_minute}
+
+    def report(self):
+        '''
+        Prints the budget's metrics.
+        '''
+        metrics = self.metrics()
+        print(f'{Fore.BLUE}Request budget:{Style.RESET_ALL}')
+        print(f'{Fore.BLUE}-->{Style.RESET_ALL} {metrics["requests"]} requests at {metrics["requests_per_minute"]:.1f} per minute, '
+              f'{metrics["wait_time"]:.0f} seconds spent waiting, {metrics["throttle_events"]} throttle events')
+        for bucket in self._buckets.values():
+            if bucket['level'] > 0:
+                print(f'{Fore.BLUE}-->{Style.RESET_ALL} {bucket["page_type"]} pages from {bucket["host"]} are still slowed to {bucket["rate"] * 0.5**bucket["level"]:.3g} per second')
+
+def parse_paper_details(soup):
+    '''
+    Extracts the additional details of a paper from its parsed Google Scholar page. These are: Google Scholar profile name, Publication date,
+    Journal/Source/Conference (an entry will fit in only one of these catagories), Authors, Primary author, and Supporting authors.
+
+    Parameters:
+        soup (bs4): parsed html data for the paper's page
+
+    Returns:
+        details (dict): the additional details of the paper, with np.nan for any that are missing
+    '''
+    details = dict.fromkeys(PAPER_DETAIL_COLUMNS, np.nan)
+
+    #Gets academics name from top of page. For consistency, will add as a feature so that if data is concatenated into a big set, 
+    #it's easy to tell where the paper came from.
+    name_body = soup.find("div",{"class":"gs_bdy_sb_sec"})
+    details['Google Scholar profile name'] = name_body.find_all("a")[1].text
+
+    #This for loop deals with collecting the additional information from the articles specific page
+    page_body = soup.find("div",{"id":"gsc_vcpb"})
+    content = page_body.find_all("div",{"class":"gs_scl"})
+    
+    for item in content:
+        field = item.find("div",{"class":"gsc_oci_field"}).text #gets the name of the field 
+
+        if field in ['Publication date', 'Journal', 'Authors', 'Source', 'Conference']: #ignore fields that are not in this list
+            try:
+                details[field] = item.find("div",{"class":"gsc_oci_value"}).text
+            except:
+                details[field] = 0
+
+    #To prevent errors with lack of author, i.e. for a patent
+    try:
+        details['Authors'] = details['Authors'].split(', ') #split authors string into an actual list of authors
+        details['Primary author'] = details['Authors'][0] #first author is primary
+    except:
+        details['Authors'] = np.nan
+        details['Primary author'] = np.nan
+
+    #Prevents error if paper has only one author
+    if isinstance(details['Authors'], list) and len(details['Authors']) > 1:
+        details['Supporting authors'] = details['Authors'][1:] #supporting are non first
+
+    return details
+
+def fetch_paper_details(paper_url, fetcher):
+    '''
+    Fetches a single paper's page and extracts its additional details.
+
+    Parameters:
+        paper_url (str): url of the paper's Google Scholar page
+        fetcher (PageFetcher): fetcher used to load the page
+
+    Returns:
+        details (dict): the additional details of the paper
+    '''
+    resp = fetcher.fetch(paper_url, 'paper') #grab html
+    with fetcher.metrics.stage('parse', 'paper'):
+        soup=parse_page(resp, 'paper') #parse with bs4
+        return parse_paper_details(soup)
+
+def normalize_title(title):
+    '''
+    Normalises a paper's title for comparing papers: lower case, without punctuation, and with single spaces between words.
+
+    Parameters:
+        title (str): title of the paper
+
+    Returns:
+        normalized_title (str): the normalised title
+    '''
+    return ' '.join(re.sub(r'[^\w\s]', ' ', str(title).lower()).split())
+
+def citation_id(paper_url):
+    '''
+    Gets a paper's Google Scholar citation id (the citation_for_view of its url, e.g. 'AbCdEfGAAAAJ:u5HHmVD_uO8C'), or None if it has none.
+    '''
+    return parse_qs(urlsplit(paper_url).query).get('citation_for_view', [None])[0]
+
+class PaperRegistry:
+    '''
+    A record, for the whole of a run, of every paper whose additional details have been gathered, so that a paper co-authored by several of
+    the academics being scraped has its page fetched once, and is only linked to each of the other academics. A paper is looked up by its
+    citation id (see citation_id), which matches the same profile found by two queries, and by its normalised title and year (see
+    normalize_title), which matches the same paper on different academics' profiles.
+
+    With max_papers, only the papers most recently gathered or found are kept, and the least recently used are forgotten, so a long run
+    such as a crawl does not keep every paper it has seen in memory. A forgotten paper is fetched again if it is found again.
+
+    Parameters:
+        max_papers (int): most papers kept, or None to keep every paper
+    '''
+
+    def __init__(self, max_papers=None):
+        self.max_papers = max_papers
+        self._papers = OrderedDict() #(normalised title, year) -> details and academics of the paper, least recently used first
+        self._by_citation = dict() #citation id -> (normalised title, year)
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.forgotten = 0
+        self._forgotten_shared = 0 #papers found for more than one academic before they were forgotten
+
+    def _paper(self, title, year):
+        #Gets a paper's entry, adding it if it is new, and marks it as recently used
+        key = (normalize_title(title), str(year))
+        if key not in self._papers:
+            self._papers[key] = {'details': None, 'academics': set(), 'citation': None}
+        self._papers.move_to_end(key)
+        return self._papers[key]
+
+    def _evict(self):
+        while self.max_papers is not None and len(self._papers) > self.max_papers:
+            key, paper = self._papers.popitem(last=False)
+            if self._by_citation.get(paper['citation']) == key:
+                del self._by_citation[paper['citation']]
+            self.forgotten += 1
+            self._forgotten_shared += len(paper['academics']) > 1
+
+    def get(self, title, year, url):
+        '''
+        Gets the details of a paper gathered earlier in the run.
+
+        Parameters:
+            title (str): title of the paper
+            year (str): year of the paper
+            url (str): url of the paper's page
+
+        Returns:
+            details (dict): a copy of the paper's details (see parse_paper_details), or None if it has not been gathered
+        '''
+        with self._lock:
+            key = self._by_citation.get(citation_id(url), (normalize_title(title), str(year)))
+            paper = self._papers.get(key)
+            if paper is None or paper['details'] is None:
+                return None
+            self._papers.move_to_end(key)
+            self.reused += 1
+            return dict(paper['details'])
+
+    def add(self, title, year, url, details):
+        '''
+        Records the details gathered for a paper.
+        '''
+        with self._lock:
+            paper = self._paper(title, year)
+            paper['details'] = details
+            cid = citation_id(url)
+            if cid is not None:
+                paper['citation'] = cid
+                self._by_citation[cid] = (normalize_title(title), str(year))
+            self._evict()
+
+    def link(self, title, year, academic):
+        '''
+        Records that a paper was found on an academic's profile.
+        '''
+        with self._lock:
+            self._paper(title, year)['academics'].add(academic)
+            self._evict()
+
+    def report(self):
+        '''
+        Prints the number of papers found for more than one academic, and the number of paper pages that were not fetched again.
+        '''
+        with self._lock:
+            shared = self._forgotten_shared + sum(1 for paper in self._papers.values() if len(paper['academics']) > 1)
+        print(f'{Fore.BLUE}Shared papers:{Style.RESET_ALL}')
+        print(f'{Fore.BLUE}-->{Style.RESET_ALL} {shared} papers found for more than one academic, {self.reused} paper pages not fetched again')
+        if self.forgotten > 0:
+            print(f'{Fore.BLUE}-->{Style.RESET_ALL} {self.forgotten} papers forgotten to keep at most {self.max_papers} in memory')
+
+def get_paper_details(paper_df, fetcher, store=None, search=None, registry=None, academic=None, progress=True):
+    '''
+    Using the paper urls from the passed dataframe, gets additional details from each url and adds them to the paper_df dataframe (see
+    parse_paper_details). Pages are fetched concurrently by fetcher.workers threads, while the fetcher's budget keeps the overall request
+    rate polite. A paper whose page fails to load is reported and left without additional details, rather than failing the whole academic.
+
+    If a job store is given, the details of each paper are saved to it as soon as they are gathered, and papers whose details were already
+    saved (by a run that was interrupted) are not fetched again. If a paper registry is given, papers already gathered for another academic
+    in the run are taken from it rather than fetched again, with the academic as their 'Google Scholar profile name'.
+
+    Parameters:
+        paper_df (pandas df): dataframe of paper information
+        fetcher (PageFetcher): fetcher used to load the paper pages
+        store (JobStore): job store to save progress to, or None
+        search (str): the search query the papers belong to, needed with store
+        registry (PaperRegistry): papers gathered so far in the run, or None
+        academic (str): the academic's Google Scholar profile name, needed with registry
+        progress (bool): whether to show a progress bar
+
+    Returns:
+        detailed_paper_df (pandas df): original dataframe with additional columns
+    '''
+    
+    from tqdm import tqdm
+
+    print(f'{Fore.GREEN}-->{Style.RESET_ALL}', 'Additional information will now be gathered for each paper.')
+
+    paper_urls = paper_df['Paper url'].to_list()
+    titles = paper_df['Title'].to_list()
+    years = paper_df['Year'].to_list()
+    details = [dict.fromkeys(PAPER_DETAIL_COLUMNS, np.nan) for _ in paper_urls] #filled in by position, so rows keep their original order
+    failed = list()
+
+    #Papers gathered by an earlier, interrupted run are taken from the job store
+    saved = store.saved_papers(search) if store is not None else {}
+    for idx, url in enumerate(paper_urls):
+        if url in saved:
+            details[idx] = saved[url]
+    if len(saved) > 0:
+        print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'{len(saved)} papers were already gathered by a previous run.')
+
+    #Papers gathered for another academic earlier in the run are taken from the registry, and only linked to this academic
+    shared = set()
+    if registry is not None:
+        for idx, url in enumerate(paper_urls):
+            registry.link(titles[idx], years[idx], academic)
+            if url in saved:
+                registry.add(titles[idx], years[idx], url, details[idx])
+                continue
+
+            found = registry.get(titles[idx], years[idx], url)
+            if found is not None:
+                found['Google Scholar profile name'] = academic
+                details[idx] = found
+                shared.add(idx)
+
+        if len(shared) > 0:
+            fetcher.metrics.count('shared_papers', len(shared))
+            print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'{len(shared)} papers were already gathered for another academic.')
+
+    with ThreadPoolExecutor(max_workers=fetcher.workers) as executor:
+        futures = {executor.submit(fetch_paper_details, url, fetcher): idx for idx, url in enumerate(paper_urls) if url not in saved and idx not in shared}
+
+        for future in tqdm(as_completed(futures), f'{Fore.GREEN}--> Papers{Style.RESET_ALL}', total=len(futures), leave=None, ncols = 81, disable=not progress):
+            idx = futures[future]
+            try:
+                details[idx] = future.result()
+            except Exception as e:
+                failed.append(paper_urls[idx])
+                if store is not None:
+                    store.paper_failed(search, paper_urls[idx], repr(e))
+                continue
+
+            if store is not None:
+                store.save_paper(search, paper_urls[idx], details[idx])
+            if registry is not None:
+                registry.add(titles[idx], years[idx], paper_urls[idx], details[idx])
+
+    if len(failed) > 0:
+        fetcher.metrics.count('paper_failures', len(failed))
+        print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f"{Fore.RED}Additional information could not be gathered for {len(failed)} paper(s):{Style.RESET_ALL}")
+        for url in failed:
+            print(f'{Fore.RED}    {url}{Style.RESET_ALL}')
+
+    return add_paper_details(paper_df, details)
+
+def add_paper_details(paper_df, details):
+    '''
+    Adds the additional details of each paper (see parse_paper_details) to the dataframe of papers. The details are made into a dataframe in one
+    go and joined on as new columns, rather than being written into the dataframe cell by cell.
+
+    Parameters:
+        paper_df (pandas df): dataframe of paper information
+        details (list dict): additional details of each paper, in the same order as paper_df
+
+    Returns:
+        detailed_paper_df (pandas df): original dataframe with additional columns
+    '''
+    #Copy dataframe as to not overwrite data, and add the additional info for each paper inc. primary author, coauthors, journal
+    detailed_paper_df = paper_df.reset_index(drop=True)
+    detailed_paper_df = pd.concat([detailed_paper_df, pd.DataFrame.from_records(details, columns=PAPER_DETAIL_COLUMNS)], axis=1)
+
+    return detailed_paper_df
+
+def format_dfs(paper_df, academic_df):
+    '''
+    Appropriately formats the paper and academic dataframes. It standardises the publication date, so it is always in the form YYYY/mm/dd, generates a unique id for each
+    paper and academic using a hash created from multiple columns in the data (the wider PaperKey/AcademicKey, which identifies them, and the 8 digit
+    PaperID/AcademicID of earlier versions, see generate_ids), and converts the number of citations to whole numbers, with a lack of citations ("") becoming <NA>. Every column is formatted in one go rather than row by row.
+
+    Parameters:
+        paper_df (pandas df): dataframe containing paper info
+        academic_df (pandas df): dataframe containing academic info
+
+    Returns:
+        formatted_paper_df (pandas df)
+        formatted_academic_df (pandas df)
+    '''
+
+    #Copy dataframes as to not overwrite data
+    formatted_paper_df = paper_df.copy()
+    formatted_academic_df = academic_df.copy()
+
+    #Standardise 'Publication date'
+    formatted_paper_df['Publication date'] = format_dates(formatted_paper_df['Publication date'])
+
+    #Changing lack of citations to correctly be NA
+    formatted_paper_df['Citations'] = citation_counts(formatted_paper_df['Citations'])
+
+    #Generate unique IDs, as the first columns
+    ids, keys = generate_ids(formatted_paper_df['Title'].fillna(''))
+    formatted_paper_df.insert(0, 'PaperID', ids)
+    formatted_paper_df.insert(1, 'PaperKey', keys)
+
+    ids, keys = generate_ids(formatted_academic_df['Academic'].fillna('') + formatted_academic_df['Affiliation'].fillna(''))
+    formatted_academic_df.insert(0, 'AcademicID', ids)
+    formatted_academic_df.insert(1, 'AcademicKey', keys)
+    
+    print(f'{Fore.GREEN}-->{Style.RESET_ALL}', "Dataframes appropriately formatted.")
+    
+    return formatted_paper_df, formatted_academic_df
+
+def searches_from_file(filename):
+    '''
+    Reads multiple search queries to be gathered from a text file named 'filename'. It reads line by line and stores each as an entry in a list, which is returned.
+
+    Parameters:
+        filename (str): name of text file containing Google Scholar profile search queries
+
+    Returns:
+        search_list (list str): list of strings containing search queries
+    '''
+
+    search_list = list()
+    
+    with open(filename) as file:
+        Lines = file.readlines()
+        for line in Lines:
+            if line == '\n': #skips line if it is empty
+                continue
+
+            search_list.append(line.strip())
+
+    return search_list
+
+def get_current_datetime():
+    '''
+    Get's the current date and time using the datetime library and returns as a string
+
+    Parameters:
+
+    Returns:
+        dt (str): string form of datetime object 
+    '''
+
+    now = datetime.now()
+
+    dt = now.strftime("%Y-%m-%d")
+
+    return dt
+
+
+def chrome_options():
+    '''
+    Gets the options Chrome sessions are started with: headless, with the same user agent as the HTTP backend.
+
+    Returns:
+        options (ChromeOptions): options for webdriver.Chrome
+    '''
+    options = webdriver.ChromeOptions()
+    options.add_experimental_option('excludeSwitches', ['enable-logging'])
+    options.add_argument("--headless")
+    options.add_argument(f"--user-agent={USER_AGENT}")
+
+    return options
+
+class PooledSession:
+    '''
+    A long-lived Chrome session belonging to a DriverPool. It can be used in place of a selenium webdriver (anything not defined here
+    is passed through to the driver), but it counts the pages it loads so the pool knows when it is due to be recycled.
+
+    Parameters:
+        slot (int): position of the session in the pool, used when reporting
+        metrics (Metrics): metrics to add Chrome startups to
+    '''
+
+    def __init__(self, slot, metrics):
+        self.slot = slot
+        self.metrics = metrics
+        self.driver = None
+        self.page_loads = 0 #page loads since the current driver was started
+        self.total_page_loads = 0
+        self.startups = 0
+        self.uses = 0
+
+    def __getattr__(self, name):
+        if name == 'driver':
+            raise AttributeError(name)
+        return getattr(self.driver, name)
+
+    def start(self):
+        '''
+        Launches a new headless Chrome driver for this session.
+        '''
+        with self.metrics.stage('chrome_start'):
+            self.driver = webdriver.Chrome(options=chrome_options())
+            self.driver.maximize_window()
+        self.page_loads = 0
+        self.startups += 1
+
+    def get(self, url):
+        '''
+        Loads url in the session's driver and counts the page load.
+
+        Parameters:
+            url (str): url of page to load
+        '''
+        self.driver.get(url)
+        self.page_loads += 1
+        self.total_page_loads += 1
+
+    def is_alive(self):
+        '''
+        Checks that the driver has been started and that the browser is still responding.
+
+        Returns:
+            alive (bool): True if the session can be used
+        '''
+        if self.driver is None:
+            return False
+
+        try:
+            self.driver.current_url #raises if chrome has crashed or been closed
+        except Exception:
+            return False
+
+        return True
+
+    def quit(self):
+        '''
+        Shuts down the session's driver, ignoring errors from a browser that has already crashed.
+        '''
+        if self.driver is None:
+            return
+
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+        self.driver = None
+
+class DriverPool:
+    '''
+    Holds a small number of long-lived headless Chrome sessions which are handed out to search queries, instead of launching and closing a
+    new driver for every query. A session is health checked before it is handed out, and is recycled after max_page_loads page loads or if
+    it has crashed. All sessions are shut down when the pool is closed, or when the program exits.
+
+    Parameters:
+        size (int): number of Chrome sessions held by the pool
+        max_page_loads (int): number of page loads after which a session is restarted
+        metrics (Metrics): metrics to add Chrome startups to, or None
+    '''
+
+    def __init__(self, size=1, max_page_loads=200, metrics=None):
+        self.size = size
+        self.max_page_loads = max_page_loads
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.sessions = [PooledSession(slot, self.metrics) for slot in range(size)]
+
+        #Sessions are only started when first needed, and idle sessions are handed out most recently used first
+        self._idle = queue.LifoQueue()
+        for session in self.sessions:
+            self._idle.put(session)
+
+        atexit.register(self.close)
+
+    @contextmanager
+    def session(self):
+        '''
+        Borrows a session from the pool for the duration of a with block, waiting for one to become free if they are all in use.
+
+        Returns:
+            session (PooledSession): a running Chrome session
+        '''
+        session = self._idle.get()
+        try:
+            if not session.is_alive():
+                if session.driver is not None:
+                    print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f"{Fore.RED}Chrome session {session.slot+1} stopped responding and will be restarted.{Style.RESET_ALL}")
+                session.quit()
+                session.start()
+                print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f"Chrome session {session.slot+1} launched...")
+
+            session.uses += 1
+            yield session
+
+        finally:
+            #Sessions that have crashed or loaded too many pages are shut down here, and restarted the next time they are needed
+            if session.page_loads >= self.max_page_loads or not session.is_alive():
+                session.quit()
+
+            self._idle.put(session)
+
+    def close(self):
+        '''
+        Shuts down every session in the pool. Safe to call more than once.
+        '''
+        for session in self.sessions:
+            session.quit()
+
+    def report(self):
+        '''
+        Prints the number of startups, uses and page loads for each session in the pool.
+        '''
+        print(f'{Fore.BLUE}Chrome sessions:{Style.RESET_ALL}')
+        for session in self.sessions:
+            print(f'{Fore.BLUE}-->{Style.RESET_ALL} Session {session.slot+1}: {session.startups} startups, {session.uses} uses, {session.total_page_loads} page loads')
+
+
+def wait_for_page(driver, page_type, timeout=10):
+    '''
+    Waits until a page loaded in Chrome shows the element every complete page of its type contains (see PAGE_SELECTORS), or a CAPTCHA form,
+    rather than sleeping for a fixed time. Gives up quietly after timeout seconds, leaving the page to be checked by whoever reads it.
+
+    Parameters:
+        driver (selenium): webdriver the page was loaded in
+        page_type (str): one of PAGE_TYPES
+        timeout (float): maximum number of seconds to wait
+    '''
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
+    selector = f'{PAGE_SELECTORS[page_type]}, {THROTTLE_SELECTOR}'
+    try:
+        WebDriverWait(driver, timeout).until(lambda driver: len(driver.find_elements(By.CSS_SELECTOR, selector)) > 0)
+    except TimeoutException:
+        pass
+
+class SeleniumFetcher:
+    '''
+    Fetch backend which loads pages in Chrome sessions borrowed from a DriverPool, for pages that should be loaded in a real browser. After
+    each page load the browser's cookies are copied into a cookie jar that can be shared with the HTTP backend.
+
+    Parameters:
+        pool (DriverPool): pool of Chrome sessions to load pages with
+        budget (RequestBudget): politeness budget shared by all backends
+        cookies (RequestsCookieJar): jar the browser's cookies are copied into, or None to not share them
+    '''
+
+    def __init__(self, pool, budget, cookies=None):
+        self.pool = pool
+        self.budget = budget
+        self.cookies = cookies
+
+    def fetch(self, url, page_type):
+        '''
+        Loads url in a Chrome session and returns its html.
+
+        Parameters:
+            url (str): url of page to load
+            page_type (str): one of PAGE_TYPES
+
+        Returns:
+            html (str): page source of the loaded page
+        '''
+        with self.pool.session() as driver:
+            def load():
+                driver.get(url)
+                wait_for_page(driver, page_type)
+                return None, driver.page_source
+
+            html = self.budget.fetch(url, page_type, load)
+
+            if self.cookies is not None:
+                for cookie in driver.get_cookies():
+                    self.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'))
+
+            return html
+
+    def close(self):
+        self.pool.close()
+
+class HttpFetcher:
+    '''
+    Fetch backend which requests pages with plain HTTP, for pages that do not need javascript such as a paper's page. It uses a single
+    keep-alive session with a pool of connections, accepts gzip responses, and can share its cookie jar with the Selenium backend.
+
+    Parameters:
+        budget (RequestBudget): politeness budget shared by all backends
+        cookies (RequestsCookieJar): cookie jar shared with the Selenium backend, or None for a private jar
+        base_url (str): if given, requests are sent here instead of https://scholar.google.com, e.g. to a local fixture server
+        pool_size (int): number of keep-alive connections to hold open
+        timeout (float): seconds to wait for a response
+    '''
+
+    def __init__(self, budget, cookies=None, base_url=None, pool_size=4, timeout=30):
+        self.budget = budget
+        self.base_url = base_url
+        self.timeout = timeout
+
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip, deflate', 'Accept-Language': 'en'})
+        if cookies is not None:
+            self.session.cookies = cookies
+
+    def fetch(self, url, page_type):
+        '''
+        Requests url and returns its html.
+
+        Parameters:
+            url (str): url of page to request
+            page_type (str): one of PAGE_TYPES
+
+        Returns:
+            html (str): body of the response
+        '''
+        if self.base_url is not None:
+            parts = urlsplit(url)
+            url = self.base_url.rstrip('/') + parts.path + ('?' + parts.query if parts.query else '')
+
+        def load():
+            response = self.session.get(url, timeout=self.timeout)
+            if response.status_code not in THROTTLE_STATUSES: #throttled responses are backed off from and retried by the budget
+                response.raise_for_status()
+            return response.status_code, response.text
+
+        return self.budget.fetch(url, page_type, load)
+
+    def close(self):
+        self.session.close()
+
+class ReplayFetcher:
+    '''
+    Fetch backend which reads pages previously saved with PageFetcher's record_dir, so that the program can be run offline.
+
+    Given a budget, pages are instead replayed as if they were being fetched from Google Scholar, to test or benchmark the program without
+    it. Each page is loaded under the budget and takes between half and one and a half times latency seconds, and a throttle fraction of
+    page loads come back throttled (as HTTP 429), which the budget backs off from and retries.
+
+    Parameters:
+        directory (str): directory of recorded pages
+        budget (RequestBudget): request budget pages are replayed under, or None to read pages straight from disk
+        latency (float): average seconds a replayed page takes to load, with budget
+        throttle (float): fraction of page loads that are throttled, with budget
+        seed (int): seed of the simulated latencies and throttling, so a replay can be repeated
+    '''
+
+    def __init__(self, directory, budget=None, latency=0.0, throttle=0.0, seed=0):
+        self.directory = directory
+        self.budget = budget
+        self.latency = latency
+        self.throttle = throttle
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def fetch(self, url, page_type):
+        '''
+        Reads the recorded html for url. Raises FileNotFoundError if the page was never recorded.
+
+        Parameters:
+            url (str): url of page
+            page_type (str): one of PAGE_TYPES
+
+        Returns:
+            html (str): recorded html
+        '''
+        path = recording_path(self.directory, url, page_type)
+        if self.budget is None:
+            with open(path, encoding='utf-8') as file:
+                return file.read()
+
+        def load():
+            with self._lock:
+                delay = self.latency * self._random.uniform(0.5, 1.5)
+                throttled = self._random.random() < self.throttle
+            time.sleep(delay)
+
+            if throttled:
+                return 429, ''
+            with open(path, encoding='utf-8') as file:
+                return 200, file.read()
+
+        return self.budget.fetch(url, page_type, load)
+
+    def close(self):
+        pass
+
+def recording_path(directory, url, page_type):
+    '''
+    Gets the file a page is recorded to/replayed from, named by its page type and a hash of its url.
+
+    Parameters:
+        directory (str): directory of recorded pages
+        url (str): url of page
+        page_type (str): one of PAGE_TYPES
+
+    Returns:
+        path (str): path of the recording
+    '''
+    return os.path.join(directory, f'{page_type}_{hashlib.sha1(url.encode("utf-8")).hexdigest()}.html')
+
+class PageCache:
+    '''
+    A persistent cache of fetched pages on disk, keyed by url, so that a re-run (or a run resumed after a crash) does not fetch every page
+    again. Each page is stored zlib-compressed in its own file, and is only used while it is younger than the time to live for its page type.
+    When the cache grows past max_bytes, the least recently used pages are evicted. Pages are written to a temporary file which is then
+    renamed into place, so a crash can never leave a half-written page behind.
+
+    Parameters:
+        directory (str): directory to store cached pages in
+        max_bytes (int): size the cache is kept under, in bytes of compressed pages
+        ttls (dict): page type -> time to live in seconds
+    '''
+
+    def __init__(self, directory, max_bytes=500*1024*1024, ttls=CACHE_TTLS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = ttls
+        self.hits = dict.fromkeys(PAGE_TYPES, 0)
+        self.misses = dict.fromkeys(PAGE_TYPES, 0)
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+
+        #Cached files from previous runs, least recently used first. A file's access time is its last use and its modified time is when it was stored.
+        self._entries = OrderedDict()
+        self._size = 0
+        files = [entry for entry in os.scandir(directory) if entry.name.endswith('.z')]
+        for entry in sorted(files, key=lambda entry: entry.stat().st_atime):
+            self._entries[entry.path] = entry.stat().st_size
+            self._size += entry.stat().st_size
+        self._evict() #in case the cache was left larger by a run with a bigger max_bytes
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.z')
+
+    def get(self, url, page_type):
+        '''
+        Gets a page from the cache, if it is there and still fresh.
+
+        Parameters:
+            url (str): url of page
+            page_type (str): one of PAGE_TYPES
+
+        Returns:
+            html (str): cached html of the page, or None on a cache miss
+        '''
+        path = self._path(url)
+        try:
+            stored = os.stat(path).st_mtime
+            if time.time() - stored > self.ttls[page_type]:
+                raise FileNotFoundError(path) #stale pages count as misses, and are replaced when the page is fetched again
+
+            with open(path, 'rb') as file:
+                html = zlib.decompress(file.read()).decode('utf-8')
+            os.utime(path, (time.time(), stored)) #mark as recently used
+
+        except (OSError, zlib.error):
+            with self._lock:
+                self.misses[page_type] += 1
+            return None
+
+        with self._lock:
+            self.hits[page_type] += 1
+            if path in self._entries:
+                self._entries.move_to_end(path)
+
+        return html
+
+    def put(self, url, page_type, html):
+        '''
+        Stores a page in the cache, evicting the least recently used pages if the cache is now too large.
+
+        Parameters:
+            url (str): url of page
+            page_type (str): one of PAGE_TYPES
+            html (str): html of the page
+        '''
+        path = self._path(url)
+        data = zlib.compress(html.encode('utf-8'))
+
+        #Write to a temporary file in the same directory, then rename it over the old page in one step
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._size += len(data) - self._entries.pop(path, 0)
+            self._entries[path] = len(data)
+            self._evict()
+
+    def _evict(self):
+        #Removes the least recently used pages until the cache fits in max_bytes. Called with the lock held (or before other threads exist).
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            old_path, old_size = self._entries.popitem(last=False)
+            self._size -= old_size
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+    def report(self):
+        '''
+        Prints the number of cache hits and misses, and the hit ratio, for each page type.
+        '''
+        print(f'{Fore.BLUE}Page cache:{Style.RESET_ALL}')
+        for page_type in PAGE_TYPES:
+            total = self.hits[page_type] + self.misses[page_type]
+            ratio = self.hits[page_type] / total if total > 0 else 0
+            print(f'{Fore.BLUE}-->{Style.RESET_ALL} {page_type.capitalize()} pages: {self.hits[page_type]} hits, {self.misses[page_type]} misses ({ratio:.0%} hit ratio)')
+
+class PageFetcher:
+    '''
+    Routes each page request to the backend configured for its page type (see PAGE_TYPES), so e.g. profile pages can be loaded with Selenium
+    while paper pages are requested over plain HTTP. If a cache is given, it is checked before any backend is used, and complete pages are
+    stored in it. If record_dir is given, every fetched page is also saved there for ReplayFetcher.
+
+    Parameters:
+        backends (dict): backend name -> backend object with fetch(url, page_type) and close() methods
+        routes (dict): page type -> backend name
+        workers (int): number of threads that should fetch paper pages at the same time
+        cache (PageCache): cache of previously fetched pages, or None
+        record_dir (str): directory to save fetched pages to, or None
+        budget (RequestBudget): request budget used by the backends, or None. Only used to report on it.
+        pool (DriverPool): pool of Chrome sessions used by the backends, or None. It is closed with the fetcher.
+        metrics (Metrics): metrics for the whole run, which pages fetched are counted in, or None. It is closed with the fetcher.
+    '''
+
+    def __init__(self, backends, routes, workers=1, cache=None, record_dir=None, budget=None, pool=None, metrics=None):
+        self.backends = backends
+        self.routes = routes
+        self.workers = workers
+        self.cache = cache
+        self.record_dir = record_dir
+        self.budget = budget
+        self.pool = pool
+        self.metrics = metrics if metrics is not None else Metrics()
+
+        if record_dir is not None:
+            os.makedirs(record_dir, exist_ok=True)
+
+    def fetch(self, url, page_type):
+        '''
+        Fetches url from the cache, or with the backend for page_type.
+
+        Parameters:
+            url (str): url of page
+            page_type (str): one of PAGE_TYPES
+
+        Returns:
+            html (str): html of the page
+        '''
+        html = self.cache.get(url, page_type) if self.cache is not None else None
+
+        if html is not None:
+            self.metrics.count('cache_hits')
+        else:
+            with self.metrics.stage('fetch', page_type):
+                html = self.backends[self.routes[page_type]].fetch(url, page_type)
+            self.metrics.count('pages_fetched')
+            self.metrics.count('page_bytes', len(html.encode('utf-8')))
+
+            if self.cache is not None and PAGE_MARKERS[page_type] in html:
+                self.cache.put(url, page_type, html)
+
+        if self.record_dir is not None:
+            with open(recording_path(self.record_dir, url, page_type), 'w', encoding='utf-8') as file:
+                file.write(html)
+
+        return html
+
+    def close(self):
+        for backend in self.backends.values():
+            backend.close()
+        if self.pool is not None:
+            self.pool.close()
+        self.metrics.close()
+
+    def report(self):
+        '''
+        Prints how the Chrome sessions, request budget and page cache were used, and the time spent in each stage of the run.
+        '''
+        for part in [self.pool, self.budget, self.cache, self.metrics]:
+            if part is not None:
+                part.report()
+
+def make_fetcher(sessions=1, session_page_loads=200, max_in_flight=2, max_rate=0.5, rates=None, jitter=0.3, backoff=30, search_backend='selenium',
+                 profile_backend='selenium', paper_backend='http', http_base_url=None, cache_dir='page cache', cache_size=500, record=None, replay=None,
+                 replay_latency=0.0, replay_throttle=0.0, metrics=None, metrics_format='jsonl', hourly_limit=None):
+    '''
+    Sets up everything pages are fetched with: a pool of Chrome sessions, a request budget, a backend for each type of page, and the page
+    cache. Each option is the same as the command line option with the same name (see parse_args), except that a cache_dir of None turns
+    off the page cache, and hourly_limit is --hourly-budget, which only --daemon uses (see RequestBudget). Chrome is only started if a page is
+    fetched with it. With a replay_latency or replay_throttle, replayed pages are loaded under the request budget as if they were being
+    fetched (see ReplayFetcher).
+
+    Returns:
+        fetcher (PageFetcher): fetcher using the options, which should be closed once finished with
+    '''
+    run_metrics = Metrics(metrics, metrics_format)
+
+    #Chrome sessions are shared between all queries rather than launched for each one
+    pool = DriverPool(size=sessions, max_page_loads=session_page_loads, metrics=run_metrics)
+    budget = RequestBudget(max_in_flight=max_in_flight, max_per_second=max_rate, rates=rates, jitter=jitter, backoff=backoff, metrics=run_metrics,
+                           hourly_limit=hourly_limit)
+
+    #Each type of page is routed to its own backend. The browser's cookies are shared with the HTTP backend.
+    if replay is not None:
+        simulate = replay_latency > 0 or replay_throttle > 0
+        backends = {'replay': ReplayFetcher(replay, budget if simulate else None, replay_latency, replay_throttle)}
+        routes = dict.fromkeys(PAGE_TYPES, 'replay')
+    else:
+        cookies = requests.cookies.RequestsCookieJar()
+        backends = {'selenium': SeleniumFetcher(pool, budget, cookies), 'http': HttpFetcher(budget, cookies, base_url=http_base_url)}
+        routes = {'search': search_backend, 'profile': profile_backend, 'paper': paper_backend}
+
+    #Pages are cached between runs, except when they are being replayed from disk anyway
+    cache = None
+    if cache_dir is not None and replay is None:
+        cache = PageCache(cache_dir, max_bytes=cache_size*1024*1024)
+
+    return PageFetcher(backends, routes, workers=max_in_flight, cache=cache, record_dir=record, budget=budget, pool=pool, metrics=run_metrics)
+
+def get_profile_url(soup):
+    '''
+    Gets the url of the most relevant profile (the top result) from the Google Scholar author search page, with its papers sorted by year
+    instead of citation count.
+
+    Parameters:
+        soup (bs4): parsed html data for the search results page
+
+    Returns:
+        profile_url (str): url of the profile page
+    '''
+    link = soup.find("a",{"class":"gs_ai_pho"}) #the profile picture of each result links to the profile
+    return "https://scholar.google.com" + link.get("href") + "&view_op=list_works&sortby=pubdate"
+
+def search_candidates(soup):
+    '''
+    Gets every profile in the Google Scholar author search results, most relevant first.
+
+    Parameters:
+        soup (bs4): parsed html data for the search results page
+
+    Returns:
+        candidates (list dict): the 'user' id, profile 'url' (as from get_profile_url), 'name', 'affiliation' and 'cited_by' count of each
+                                profile, with None for any that are missing
+    '''
+    candidates = list()
+    for link in soup.find_all("a",{"class":"gs_ai_pho"}):
+        if link.get("href") is None:
+            continue
+
+        result = link.find_parent("div",{"class":"gsc_1usr"})
+        fields = dict()
+        for field, tag, cls in [('name', 'h3', 'gs_ai_name'), ('affiliation', 'div', 'gs_ai_aff'), ('cited_by', 'div', 'gs_ai_cby')]:
+            found = result.find(tag,{"class":cls}) if result is not None else None
+            fields[field] = found.text.strip() if found is not None else None
+        cited_by = re.sub(r'\D', '', fields['cited_by'] or '')
+
+        candidates.append({'user': parse_qs(urlsplit(link.get("href")).query).get('user', [None])[0],
+                           'url': "https://scholar.google.com" + link.get("href") + "&view_op=list_works&sortby=pubdate",
+                           'name': fields['name'], 'affiliation': fields['affiliation'], 'cited_by': int(cited_by) if cited_by else None})
+
+    return candidates
+
+def match_confidence(search, candidates):
+    '''
+    Gets how confident we can be that the top search result is the profile a query was meant to find: the fraction of the query's words
+    found in the top result's name and affiliation, halved if another result matches at least as well.
+
+    Parameters:
+        search (str): Google Scholar profile search query
+        candidates (list dict): search results (see search_candidates)
+
+    Returns:
+        confidence (float): between 0 and 1, or 0 if there are no results
+    '''
+    words = normalize_title(search).split()
+    if len(candidates) == 0 or len(words) == 0:
+        return 0.0
+
+    def score(candidate):
+        found = set(normalize_title(f"{candidate['name'] or ''} {candidate['affiliation'] or ''}").split())
+        return sum(word in found for word in words) / len(words)
+
+    scores = [score(candidate) for candidate in candidates]
+    if any(other >= scores[0] for other in scores[1:]):
+        return scores[0] / 2
+    return scores[0]
+
+def find_profiles(search, fetcher):
+    '''
+    Fetches the Google Scholar author search results for a query.
+
+    Parameters:
+        search (str): Google Scholar profile search query
+        fetcher (PageFetcher): fetcher used to load the page
+
+    Returns:
+        candidates (list dict): every profile found, most relevant first (see search_candidates)
+    '''
+    resp = fetcher.fetch(get_scholar_search_url(search), 'search')
+    with fetcher.metrics.stage('parse', 'search'):
+        return search_candidates(parse_page(resp, 'search'))
+
+def profile_user(profile_url):
+    '''
+    Gets the Google Scholar user id from the url of a profile.
+
+    Parameters:
+        profile_url (str): url of the profile page
+
+    Returns:
+        user (str): the user id, or None if the url has none
+    '''
+    return parse_qs(urlsplit(profile_url).query).get('user', [None])[0]
+
+def get_coauthors(soup):
+    '''
+    Gets the co-authors listed in the side bar of a profile page.
+
+    Parameters:
+        soup (bs4): parsed html data for the academics page
+
+    Returns:
+        coauthors (list dict): the 'user' id, profile 'url' (as from get_profile_url), 'name' and 'affiliation' of each co-author
+    '''
+    coauthors = list()
+    panel = soup.find("div",{"id":"gsc_rsb_co"})
+    if panel is None:
+        return coauthors
+
+    for item in panel.find_all("span",{"class":"gsc_rsb_a_desc"}):
+        link = item.find("a")
+        if link is None or link.get("href") is None:
+            continue
+        affiliation = item.find("span",{"class":"gsc_rsb_a_ext"})
+
+        coauthors.append({'user': profile_user(link.get("href")),
+                          'url': "https://scholar.google.com" + link.get("href") + "&view_op=list_works&sortby=pubdate",
+                          'name': link.text.strip(), 'affiliation': affiliation.text.strip() if affiliation is not None else None})
+
+    return coauthors
+
+class ProfileCache:
+    '''
+    A persistent record, kept in an SQLite database, of the Google Scholar profile each search query resolved to, so that later runs go
+    straight to the profile instead of loading the author search page again. The search results and the confidence of the match (see
+    match_confidence) are recorded with each query. A query is resolved again once its record is older than ttl days, or if its match was
+    ambiguous (a confidence under AMBIGUOUS), since the right profile may have been created or renamed since.
+
+    Parameters:
+        path (str): path of the SQLite database
+        ttl (float): days after which a query is resolved again
+    '''
+
+    AMBIGUOUS = 0.75
+
+    def __init__(self, path, ttl=30):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.resolved = 0
+        self._lock = threading.Lock() #the connection is shared by the threads of resolve_all
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=60)
+        with self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS profiles (
+                    query TEXT PRIMARY KEY, user_id TEXT, profile_url TEXT, confidence REAL, candidates TEXT, resolved TEXT)''')
+
+    def _execute(self, sql, parameters=()):
+        with self._lock, self._conn:
+            return self._conn.execute(sql, parameters).fetchall()
+
+    def lookup(self, search):
+        '''
+        Gets the profile a query resolved to, if it was resolved confidently within the last ttl days.
+
+        Parameters:
+            search (str): Google Scholar profile search query
+
+        Returns:
+            profile_url (str): url of the profile page, or None if the query needs resolving
+        '''
+        rows = self._execute('SELECT profile_url, confidence, resolved FROM profiles WHERE query = ?', (search,))
+        if len(rows) == 0:
+            return None
+
+        profile_url, confidence, resolved = rows[0]
+        age = datetime.now() - datetime.fromisoformat(resolved)
+        if confidence < self.AMBIGUOUS or age.total_seconds() > self.ttl*24*60*60:
+            return None
+        return profile_url
+
+    def resolve(self, search, fetcher):
+        '''
+        Resolves a query to its top search result, and records it with every result and the confidence of the match. Raises ValueError
+        if the search found no profiles.
+
+        Parameters:
+            search (str): Google Scholar profile search query
+            fetcher (PageFetcher): fetcher used to load the search page
+
+        Returns:
+            profile_url (str): url of the profile page
+        '''
+        candidates = find_profiles(search, fetcher)
+        if len(candidates) == 0:
+            raise ValueError(f'No Google Scholar profile found for "{search}"')
+
+        confidence = match_confidence(search, candidates)
+        self._execute('INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?, ?)',
+                      (search, candidates[0]['user'], candidates[0]['url'], confidence, json.dumps(candidates), datetime.now().isoformat(timespec='seconds')))
+        with self._lock:
+            self.resolved += 1
+
+        return candidates[0]['url']
+
+    def profile_url(self, search, fetcher):
+        '''
+        Gets the profile a query resolves to, from the cache if possible, otherwise by resolving it (see resolve).
+
+        Parameters:
+            search (str): Google Scholar profile search query
+            fetcher (PageFetcher): fetcher used to load the search page, if needed
+
+        Returns:
+            profile_url (str): url of the profile page
+        '''
+        profile_url = self.lookup(search)
+        if profile_url is None:
+            return self.resolve(search, fetcher)
+
+        with self._lock:
+            self.hits += 1
+        print(f'{Fore.GREEN}-->{Style.RESET_ALL}', 'Profile found in the profile cache.')
+        return profile_url
+
+    def resolve_all(self, searches, fetcher):
+        '''
+        Resolves every query that is not already in the cache, up front, fetching up to fetcher.workers search pages at the same time.
+
+        Parameters:
+            searches (list str): Google Scholar profile search queries
+            fetcher (PageFetcher): fetcher used to load the search pages
+
+        Returns:
+            errors (list str): queries that could not be resolved
+        '''
+        from tqdm import tqdm
+
+        pending = [search for search in searches if self.lookup(search) is None]
+        print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'{len(searches) - len(pending)} queries are already in the profile cache, {len(pending)} will be resolved.')
+
+        errors = list()
+        with ThreadPoolExecutor(max_workers=fetcher.workers) as executor:
+            futures = {executor.submit(self.resolve, search, fetcher): search for search in pending}
+            for future in tqdm(as_completed(futures), f'{Fore.GREEN}--> Queries{Style.RESET_ALL}', total=len(futures), leave=None, ncols = 81):
+                try:
+                    future.result()
+                except Exception:
+                    errors.append(futures[future])
+
+        return errors
+
+    def ambiguous(self, searches):
+        '''
+        Gets the queries whose match was ambiguous, for the user to make more specific.
+
+        Parameters:
+            searches (list str): Google Scholar profile search queries
+
+        Returns:
+            ambiguous (list): (search query, confidence, candidates) for every ambiguous query in searches
+        '''
+        rows = self._execute('SELECT query, confidence, candidates FROM profiles WHERE confidence < ?', (self.AMBIGUOUS,))
+        wanted = set(searches)
+        return [(search, confidence, json.loads(candidates)) for search, confidence, candidates in rows if search in wanted]
+
+    def report(self):
+        '''
+        Prints the number of queries found in the cache and resolved.
+        '''
+        total = self._execute('SELECT COUNT(*) FROM profiles')[0][0]
+        print(f'{Fore.BLUE}Profile cache ({self.path}):{Style.RESET_ALL}')
+        print(f'{Fore.BLUE}-->{Style.RESET_ALL} {self.hits} queries found in the cache, {self.resolved} resolved, {total} queries recorded')
+
+    def close(self):
+        self._conn.close()
+
+
+class RefreshSchedule:
+    '''
+    A persistent priority queue of the search queries kept up to date by --daemon, kept in an SQLite database ordered by when each query is
+    next due to be refreshed. After each refresh, the query's citation velocity (the change in its academic's citations and number of papers
+    per day, smoothed over refreshes) sets how long until it is due again: about long enough for REFRESH_CHANGE changes, between
+    min_interval and max_interval days. A profile that has not changed at all backs off, doubling its interval each time.
+
+    Each page load is kept within the hourly limit of the fetcher's request budget (see RequestBudget), and a query is only started once
+    that limit has room for the pages its last refresh took, so a refresh does not stall part way through.
+
+    Parameters:
+        path (str): path of the SQLite database
+        min_interval (float): fewest days between two refreshes of a query
+        max_interval (float): most days between two refreshes of a query
+    '''
+
+    REFRESH_CHANGE = 10 #changes a refresh should find, in citations (a new paper counts as PAPER_WEIGHT citations)
+    PAPER_WEIGHT = 10
+
+    def __init__(self, path, min_interval=1, max_interval=90):
+        self.path = path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.refreshes = 0
+        self.pages = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=60)
+        with self._conn:
+            self._conn.executescript('''
+                CREATE TABLE IF NOT EXISTS schedule (
+                    query TEXT PRIMARY KEY, due TEXT, interval REAL, velocity REAL, citations INTEGER, papers INTEGER, pages INTEGER,
+                    refreshed TEXT, failures INTEGER DEFAULT 0);
+                CREATE INDEX IF NOT EXISTS schedule_due ON schedule (due);
+            ''')
+
+    def _execute(self, sql, parameters=()):
+        with self._lock, self._conn:
+            return self._conn.execute(sql, parameters).fetchall()
+
+    def sync(self, searches):
+        '''
+        Makes the scheduled queries match a list of queries. New queries are due straight away, and queries no longer in the list are
+        dropped along with their history.
+
+        Parameters:
+            searches (list str): Google Scholar profile search queries
+
+        Returns:
+            added (int): number of queries added
+            removed (int): number of queries removed
+        '''
+        wanted = set(searches)
+        scheduled = {search for search, in self._execute('SELECT query FROM schedule')}
+        now = datetime.now().isoformat(timespec='seconds')
+
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT INTO schedule (query, due, interval) VALUES (?, ?, ?)',
+                                   [(search, now, self.min_interval) for search in wanted - scheduled])
+            self._conn.executemany('DELETE FROM schedule WHERE query = ?', [(search,) for search in scheduled - wanted])
+
+        return len(wanted - scheduled), len(scheduled - wanted)
+
+    def next(self, budget=None):
+        '''
+        Gets the query due to be refreshed soonest, and how long until it can be started, which is the longer of the wait until it is due
+        and the wait for the budget's hourly limit to have room for it.
+
+        Parameters:
+            budget (RequestBudget): request budget the query's pages will be fetched under, or None
+
+        Returns:
+            search (str): the query, or None if there are no queries
+            wait (float): seconds until the query can be refreshed
+        '''
+        rows = self._execute('SELECT query, due, pages FROM schedule ORDER BY due LIMIT 1')
+        if len(rows) == 0:
+            return None, 0.0
+
+        search, due, pages = rows[0]
+        wait = (datetime.fromisoformat(due) - datetime.now()).total_seconds()
+
+        #A query's first refresh is guessed to take a couple of pages, the search and the first profile page
+        budget_wait = budget.hourly_wait(pages or 2) if budget is not None else 0.0
+
+        return search, max(wait, budget_wait, 0.0)
+
+    def _spend(self, pages):
+        with self._lock:
+            self.pages += pages
+
+    def refreshed(self, search, paper_df, academic_df, pages):
+        '''
+        Records a refresh of a query, and schedules its next one from its citation velocity.
+
+        Parameters:
+            search (str): Google Scholar profile search query
+            paper_df (pandas df): every one of the academic's papers, as returned by scrape_many
+            academic_df (pandas df): the academic's information, as returned by scrape_many
+            pages (int): number of pages the refresh fetched
+
+        Returns:
+            interval (float): days until the query is next refreshed
+        '''
+        self._spend(pages)
+        citations = int(pd.to_numeric(academic_df['Citations'], errors='coerce').fillna(0).sum())
+        papers = len(paper_df)
+        now = datetime.now()
+
+        interval, velocity, old_citations, old_papers, refreshed = self._execute(
+            'SELECT interval, velocity, citations, papers, refreshed FROM schedule WHERE query = ?', (search,))[0]
+
+        if refreshed is None:
+            #Before there is a previous refresh to compare with, the velocity is taken from the citations of the last full year
+            change = None
+            year = f'Citations in {now.year - 1}'
+            velocity = float(pd.to_numeric(academic_df[year], errors='coerce').fillna(0).sum()) / 365 if year in academic_df else 0.0
+        else:
+            days = max((now - datetime.fromisoformat(refreshed)).total_seconds() / (24*60*60), 1/24)
+            change = abs(citations - old_citations) + self.PAPER_WEIGHT * abs(papers - old_papers)
+            velocity = (velocity + change / days) / 2
+
+        if change == 0:
+            interval = min(interval * 2, self.max_interval) #nothing changed, so back off
+        elif velocity > 0:
+            interval = min(max(self.REFRESH_CHANGE / velocity, self.min_interval), self.max_interval)
+        else:
+            interval = self.max_interval
+
+        self._execute('''UPDATE schedule SET due = ?, interval = ?, velocity = ?, citations = ?, papers = ?, pages = ?, refreshed = ?, failures = 0
+                         WHERE query = ?''',
+                      ((now + timedelta(days=interval)).isoformat(timespec='seconds'), interval, velocity, citations, papers, pages,
+                       now.isoformat(timespec='seconds'), search))
+        self.refreshes += 1
+        return interval
+
+    def failed(self, search, pages):
+        '''
+        Records a failed refresh of a query, which is tried again after min_interval days, doubling with each failure in a row.
+
+        Parameters:
+            search (str): Google Scholar profile search query
+            pages (int): number of pages fetched before it failed
+
+        Returns:
+            interval (float): days until the query is tried again
+        '''
+        self._spend(pages)
+        failures = self._execute('SELECT failures FROM schedule WHERE query = ?', (search,))[0][0] + 1
+        interval = min(self.min_interval * 2**(failures - 1), self.max_interval)
+        due = (datetime.now() + timedelta(days=interval)).isoformat(timespec='seconds')
+        self._execute('UPDATE schedule SET due = ?, failures = ? WHERE query = ?', (due, failures, search))
+        return interval
+
+    def report(self):
+        '''
+        Prints the number of queries scheduled, how many are due within a day, and the refreshes and pages of this run.
+        '''
+        soon = (datetime.now() + timedelta(days=1)).isoformat(timespec='seconds')
+        total, due, interval = self._execute('SELECT COUNT(*), SUM(due <= ?), AVG(interval) FROM schedule', (soon,))[0]
+        print(f'{Fore.BLUE}Refresh schedule ({self.path}):{Style.RESET_ALL}')
+        print(f'{Fore.BLUE}-->{Style.RESET_ALL} {total} queries scheduled, {due or 0} due within a day, refreshed every {interval or 0:.1f} days on average')
+        print(f'{Fore.BLUE}-->{Style.RESET_ALL} {self.refreshes} refreshes this run, {self.pages} pages fetched')
+
+    def close(self):
+        self._conn.close()
+
+
+class BloomFilter:
+    '''
+    A set of strings kept in a fixed amount of memory, which can say for certain that a string has not been added, but only that one
+    probably has: about error_rate of the strings that have not been added are wrongly said to be, once capacity strings have been added.
+
+    Parameters:
+        capacity (int): number of strings the filter is sized for
+        error_rate (float): fraction of false positives once capacity strings have been added
+    '''
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2)**2)) #number of bits
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        #Every position is made from two hashes, which is as good as using a different hash for each
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i*second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class CrawlFrontier:
+    '''
+    The frontier of a co-author crawl (see run_crawl), kept in an SQLite database so that a crawl can be stopped and carried on later, and
+    only takes a bounded amount of memory however many profiles it finds. Every profile found is recorded with its depth (0 for the
+    profiles of the seed queries, 1 for their co-authors and so on), the number of crawled profiles it was found on, and whether it is
+    queued, done or failed. Profiles are crawled breadth first, and within a depth those found on the most crawled profiles go first.
+
+    Whether a profile has already been found is checked against a Bloom filter, so that only profiles it has probably seen are looked up
+    in the database. The filter is rebuilt from the database when the crawl is carried on.
+
+    Parameters:
+        path (str): path of the SQLite database
+        max_depth (int): co-authors of profiles at this depth are not followed
+        institutions (list str): co-authors are only followed if their affiliation contains one of these (ignoring case), or always if empty
+        capacity (int): number of profiles the Bloom filter is sized for
+    '''
+
+    def __init__(self, path, max_depth=1, institutions=(), capacity=100000):
+        self.path = path
+        self.max_depth = max_depth
+        self.institutions = [institution.lower() for institution in institutions]
+        self.followed = 0
+        self.filtered = 0
+        self.false_positives = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=60)
+        with self._conn:
+            self._conn.executescript('''
+                CREATE TABLE IF NOT EXISTS seeds (query TEXT PRIMARY KEY, user TEXT);
+                CREATE TABLE IF NOT EXISTS profiles (
+                    user TEXT PRIMARY KEY, url TEXT, name TEXT, affiliation TEXT, depth INTEGER, found INTEGER, state TEXT, reason TEXT,
+                    parent TEXT);
+                CREATE INDEX IF NOT EXISTS profiles_next ON profiles (state, depth, found DESC);
+            ''')
+
+        self.seen = BloomFilter(capacity)
+        for user, in self._conn.execute('SELECT user FROM profiles'):
+            self.seen.add(user)
+
+    def _execute(self, sql, parameters=()):
+        with self._lock, self._conn:
+            return self._conn.execute(sql, parameters).fetchall()
+
+    def seeded(self, search):
+        '''
+        Gets whether a seed query's profile is already in the frontier.
+        '''
+        return len(self._execute('SELECT user FROM seeds WHERE query = ?', (search,))) > 0
+
+    def add_seed(self, search, profile_url):
+        '''
+        Adds the profile a seed query resolved to, at depth 0. A profile already found as a co-author is moved to depth 0, and if it was
+        crawled too deep for its co-authors to be followed, it is queued to be crawled again.
+
+        Parameters:
+            search (str): Google Scholar profile search query
+            profile_url (str): url of the profile page
+        '''
+        user = profile_user(profile_url)
+        if not self.add(user, profile_url, search, None, 0):
+            self._execute('''UPDATE profiles SET state = CASE WHEN state = 'done' AND depth >= ? THEN 'queued' ELSE state END, depth = 0, parent = NULL
+                             WHERE user = ?''', (self.max_depth, user))
+        self._execute('INSERT OR REPLACE INTO seeds VALUES (?, ?)', (search, user))
+
+    def add(self, user, profile_url, name, affiliation, depth, parent=None):
+        '''
+        Adds a profile to the frontier, or if it was already found, counts it as found once more.
+
+        Parameters:
+            user (str): Google Scholar user id of the profile
+            profile_url (str): url of the profile page
+            name (str): name the profile is crawled under
+            affiliation (str): the academic's affiliation, or None
+            depth (int): number of co-author links from a seed profile
+            parent (str): user id of the profile it was found on, or None
+
+        Returns:
+            new (bool): whether the profile had not been found before
+        '''
+        if user in self.seen:
+            with self._lock, self._conn:
+                updated = self._conn.execute('UPDATE profiles SET found = found + 1 WHERE user = ?', (user,)).rowcount
+            if updated > 0:
+                return False
+            self.false_positives += 1
+
+        self._execute("INSERT OR IGNORE INTO profiles VALUES (?, ?, ?, ?, ?, 1, 'queued', NULL, ?)", (user, profile_url, name, affiliation, depth, parent))
+        self.seen.add(user)
+        return True
+
+    def follows(self, affiliation):
+        '''
+        Gets whether co-authors with an affiliation pass the institution filter.
+        '''
+        return len(self.institutions) == 0 or any(institution in (affiliation or '').lower() for institution in self.institutions)
+
+    def next(self):
+        '''
+        Gets the next profile to crawl.
+
+        Returns:
+            profile (tuple): user id, profile url, name and depth of the profile, or None if the frontier is empty
+        '''
+        rows = self._execute("SELECT user, url, name, depth FROM profiles WHERE state = 'queued' ORDER BY depth, found DESC LIMIT 1")
+        return rows[0] if len(rows) > 0 else None
+
+    def done(self, user, depth, coauthors):
+        '''
+        Records a crawled profile, and adds its co-authors to the frontier if it is not at max_depth and they pass the institution filter.
+
+        Parameters:
+            user (str): Google Scholar user id of the profile
+            depth (int): depth of the profile
+            coauthors (list dict): the profile's co-authors (see get_coauthors)
+
+        Returns:
+            added (int): number of co-authors that had not been found before
+        '''
+        added = 0
+        if depth < self.max_depth:
+            for coauthor in coauthors:
+                if coauthor['user'] is None:
+                    continue
+                if not self.follows(coauthor['affiliation']):
+                    self.filtered += 1
+                    continue
+                added += self.add(coauthor['user'], coauthor['url'], coauthor['name'], coauthor['affiliation'], depth + 1, user)
+                self.followed += 1
+
+        self._execute("UPDATE profiles SET state = 'done' WHERE user = ?", (user,))
+        return added
+
+    def failed(self, user, reason):
+        '''
+        Records a profile that could not be crawled.
+        '''
+        self._execute("UPDATE profiles SET state = 'failed', reason = ? WHERE user = ?", (reason, user))
+
+    def crawled(self):
+        '''
+        Gets the number of profiles crawled so far, including those that failed.
+        '''
+        return self._execute("SELECT COUNT(*) FROM profiles WHERE state != 'queued'")[0][0]
+
+    def report(self):
+        '''
+        Prints the number of profiles in each state and at each depth, and how many co-authors were followed.
+        '''
+        states = dict(self._execute('SELECT state, COUNT(*) FROM profiles GROUP BY state'))
+        depths = self._execute('SELECT depth, COUNT(*) FROM profiles GROUP BY depth ORDER BY depth')
+        print(f'{Fore.BLUE}Crawl frontier ({self.path}):{Style.RESET_ALL}')
+        print(f'{Fore.BLUE}-->{Style.RESET_ALL} {states.get("done", 0)} profiles crawled, {states.get("failed", 0)} failed, {states.get("queued", 0)} still queued')
+        print(f'{Fore.BLUE}-->{Style.RESET_ALL} profiles at each depth: ' + ', '.join(f'{depth}: {count}' for depth, count in depths))
+        print(f'{Fore.BLUE}-->{Style.RESET_ALL} {self.followed} co-author links followed, {self.filtered} filtered out by institution, '
+              f'{self.false_positives} visited set false positives')
+
+    def close(self):
+        self._conn.close()
+
+
+class JobStore:
+    '''
+    A durable record of a run's progress, kept in an SQLite database, so that a run that crashes or is stopped can be resumed with --resume
+    without fetching any completed pages again. It records the state of each search query (pending, profile-done, writing, done or failed
+    with a reason), the paper list and academic information of each profile, and the details of every paper as soon as they are gathered.
+
+    Parameters:
+        path (str): path of the SQLite database
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock() #the connection is shared by the threads fetching paper details
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=60)
+        with self._conn:
+            self._conn.executescript('''
+                CREATE TABLE IF NOT EXISTS run (key TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE IF NOT EXISTS queries (
+                    position INTEGER PRIMARY KEY, query TEXT UNIQUE, state TEXT, reason TEXT,
+                    paper_list TEXT, academic TEXT, updated TEXT);
+                CREATE TABLE IF NOT EXISTS papers (
+                    query TEXT, url TEXT, state TEXT, details TEXT, reason TEXT, PRIMARY KEY (query, url));
+            ''')
+
+    def _execute(self, sql, parameters=()):
+        with self._lock, self._conn:
+            return self._conn.execute(sql, parameters).fetchall()
+
+    def new_run(self, searches, run_date):
+        '''
+        Clears any previous run and records a new one, with every search query pending.
+
+        Parameters:
+            searches (list str): search queries of the run, in order
+            run_date (str): date of the run, used in the names of its output files
+        '''
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM run')
+            self._conn.execute('DELETE FROM queries')
+            self._conn.execute('DELETE FROM papers')
+            self._conn.execute("INSERT INTO run VALUES ('date', ?)", (run_date,))
+            self._conn.executemany("INSERT OR IGNORE INTO queries (position, query, state) VALUES (?, ?, 'pending')", enumerate(searches))
+
+    def run_date(self):
+        '''
+        Returns:
+            run_date (str): date of the recorded run, or None if no run has been recorded
+        '''
+        rows = self._execute("SELECT value FROM run WHERE key = 'date'")
+        return rows[0][0] if len(rows) > 0 else None
+
+    def searches(self):
+        '''
+        Returns:
+            searches (list): (search query, state) for every query of the recorded run, in order
+        '''
+        return self._execute('SELECT query, state FROM queries ORDER BY position')
+
+    def set_state(self, search, state, reason=None):
+        '''
+        Records the state of a search query: 'pending', 'profile-done', 'writing' (to the outputs), 'done' or 'failed' (with a reason).
+        '''
+        self._execute('UPDATE queries SET state = ?, reason = ?, updated = ? WHERE query = ?', (state, reason, datetime.now().isoformat(), search))
+
+    def state(self, search):
+        '''
+        Returns:
+            state (str): state of a search query (see set_state), or None if it is not in the recorded run
+        '''
+        rows = self._execute('SELECT state FROM queries WHERE query = ?', (search,))
+        return rows[0][0] if len(rows) > 0 else None
+
+    def save_profile(self, search, paper_df, academic_df):
+        '''
+        Saves the paper list and academic information gathered from a query's profile, and marks the query 'profile-done'.
+
+        Parameters:
+            search (str): search query
+            paper_df (pandas df): the academic's paper list, before extra details have been gathered
+            academic_df (pandas df): the academic's information
+        '''
+        self._execute("UPDATE queries SET paper_list = ?, academic = ?, state = 'profile-done', updated = ? WHERE query = ?",
+                      (paper_df.to_json(orient='split'), academic_df.to_json(orient='split'), datetime.now().isoformat(), search))
+
+    def saved_profile(self, search):
+        '''
+        Returns:
+            profile (tuple): (paper_df, academic_df) saved for the query by save_profile, or None if the profile has not been gathered
+        '''
+        rows = self._execute('SELECT paper_list, academic FROM queries WHERE query = ? AND paper_list IS NOT NULL', (search,))
+        if len(rows) == 0:
+            return None
+
+        paper_list, academic = rows[0]
+        return pd.read_json(StringIO(paper_list), orient='split', dtype=False), pd.read_json(StringIO(academic), orient='split', dtype=False)
+
+    def save_paper(self, search, url, details):
+        '''
+        Saves the details gathered for a single paper.
+
+        Parameters:
+            search (str): search query the paper belongs to
+            url (str): url of the paper
+            details (dict): the paper's details (see parse_paper_details)
+        '''
+        self._execute("INSERT OR REPLACE INTO papers VALUES (?, ?, 'done', ?, NULL)", (search, url, json.dumps(details)))
+
+    def paper_failed(self, search, url, reason):
+        '''
+        Records that a paper's details could not be gathered, and why.
+        '''
+        self._execute("INSERT OR REPLACE INTO papers VALUES (?, ?, 'failed', NULL, ?)", (search, url, reason))
+
+    def saved_papers(self, search):
+        '''
+        Returns:
+            saved (dict): url -> details, for every paper of the query whose details have been saved
+        '''
+        rows = self._execute("SELECT url, details FROM papers WHERE query = ? AND state = 'done'", (search,))
+        return {url: json.loads(details) for url, details in rows}
+
+    def report(self):
+        '''
+        Prints the number of search queries in each state, and the number of papers gathered.
+        '''
+        states = self._execute('SELECT state, COUNT(*) FROM queries GROUP BY state ORDER BY state')
+        papers = self._execute("SELECT COUNT(*) FROM papers WHERE state = 'done'")[0][0]
+        print(f'{Fore.BLUE}Job store ({self.path}):{Style.RESET_ALL}')
+        print(f'{Fore.BLUE}-->{Style.RESET_ALL} ' + ', '.join(f'{count} {state}' for state, count in states) + f' queries, {papers} papers gathered')
+
+    def close(self):
+        self._conn.close()
+
+class CsvSink:
+    '''
+    Writes the combined csv of all queries by appending each academic's rows as they are completed, rather than holding every row in memory
+    and rewriting the whole file after each query. Each append is flushed to disk before returning. If an academic has columns the file does
+    not have yet (e.g. an earlier "Citations in YYYY"), the header is extended by copying the file to a temporary file with the new columns
+    and renaming it into place, so the file is never left half-written.
+
+    Parameters:
+        path (str): path of the csv file
+        append (bool): if True, rows are added to an existing file (e.g. when resuming a run), otherwise any existing file is replaced
+    '''
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.header = list()
+
+        if append and os.path.exists(path):
+            self._repair()
+            with open(path, newline='', encoding='utf-8') as file:
+                self.header = next(csv.reader(file), [])
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def _repair(self):
+        #Drops a partly written last row, which is only possible if the program was killed during an append
+        with open(self.path, 'rb+') as file:
+            position = file.seek(0, os.SEEK_END)
+            if position == 0 or (file.seek(position - 1) >= 0 and file.read(1) == b'\n'):
+                return
+
+            #Search backwards from the end, a block at a time, for the end of the last complete row
+            while position > 0:
+                step = min(64*1024, position)
+                file.seek(position - step)
+                newline = file.read(step).rfind(b'\n')
+                if newline != -1:
+                    file.truncate(position - step + newline + 1)
+                    return
+                position -= step
+
+            file.truncate(0)
+
+    def _extend_header(self, columns):
+        self._rewrite(columns)
+
+    def _rewrite(self, columns=(), drop=None):
+        #Rewrites the file with extra (empty) columns, one row at a time, leaving out rows whose drop column has one of the values given
+        columns = list(columns)
+        dropped = self.header.index(drop[0]) if drop is not None and drop[0] in self.header else None
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.tmp')
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as temp_file:
+            writer = csv.writer(temp_file, lineterminator=os.linesep)
+            writer.writerow(self.header + columns)
+
+            if os.path.exists(self.path):
+                with open(self.path, newline='', encoding='utf-8') as file:
+                    reader = csv.reader(file)
+                    next(reader, None)
+                    for row in reader:
+                        if dropped is not None and dropped < len(row) and row[dropped] in drop[1]:
+                            continue
+                        writer.writerow(row + [''] * len(columns))
+
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+
+        os.replace(temp_path, self.path)
+        self.header = self.header + columns
+
+    def append(self, df):
+        '''
+        Appends the rows of a dataframe to the file.
+
+        Parameters:
+            df (pandas df): rows to append
+        '''
+        new_columns = [column for column in df.columns if column not in self.header]
+        if len(new_columns) > 0 or not os.path.exists(self.path):
+            self._extend_header(new_columns)
+
+        with open(self.path, 'a', newline='', encoding='utf-8') as file:
+            file.write(df.reindex(columns=self.header).to_csv(index=False, header=False))
+            file.flush()
+            os.fsync(file.fileno())
+
+    def remove(self, column, values):
+        '''
+        Removes the rows whose value in a column is one of values, by rewriting the file.
+
+        Parameters:
+            column (str): name of the column
+            values (list str): values of the rows to remove, as they are written in the file
+        '''
+        if os.path.exists(self.path) and column in self.header:
+            self._rewrite(drop=(column, set(values)))
+
+class CsvOutput:
+    '''
+    The combined "all papers YYYY-mm-dd.csv" and "all academics YYYY-mm-dd.csv" output of a run (see CsvSink).
+
+    Parameters:
+        run_date (str): date of the run, used in the file names
+        append (bool): if True, carry on appending to existing files from the same run
+        replace (bool): if True, an academic's rows already in the files are replaced when they are written again (used by --daemon, which
+                        refreshes the same academics over and over)
+    '''
+
+    def __init__(self, run_date, append=False, replace=False):
+        self.paper_sink = CsvSink(f'all papers {run_date}.csv', append=append)
+        self.academic_sink = CsvSink(f'all academics {run_date}.csv', append=append)
+        self.replace = replace
+
+    def write(self, f_paper_df, f_academic_df):
+        '''
+        Adds an academic's formatted papers and information to the output.
+        '''
+        if self.replace:
+            self.remove(f_academic_df)
+        self.paper_sink.append(f_paper_df)
+        self.academic_sink.append(f_academic_df)
+
+    def remove(self, f_academic_df):
+        '''
+        Removes the rows of an academic (or academics) already in the output.
+        '''
+        academics = f_academic_df['Academic'].dropna().astype(str).to_list()
+        self.paper_sink.remove('Google Scholar profile name', academics)
+        self.academic_sink.remove('Academic', academics)
+
+    def close(self):
+        pass
+
+def as_author_list(authors):
+    '''
+    Gets a list of authors as a real list, whether it is already one, is NaN (no authors), or has been read back from a csv as a string.
+
+    Parameters:
+        authors (list, str or float): list of authors
+
+    Returns:
+        authors (list str): list of authors (empty for a blank string), or None if there are none
+    '''
+    if isinstance(authors, str):
+        if authors.strip() == '':
+            return []
+        return ast.literal_eval(authors) if authors.startswith('[') else [authors]
+    if isinstance(authors, (list, tuple, np.ndarray)):
+        return list(authors)
+    return None
+
+class ParquetOutput:
+    '''
+    Writes the output of a run as two Parquet datasets, "papers" and "academics", under directory. Both are partitioned by AcademicKey and
+    scrape date (i.e. directory/papers/AcademicKey=.../scrape_date=.../), so that later jobs can read only the academics, dates and columns
+    they need. Columns have proper types: citation counts and years are integers, the publication date is a date, authors are lists of
+    strings, and an academic's citations per year are a list of (year, citations) pairs instead of one column per year.
+
+    Parameters:
+        directory (str): directory to write the datasets to
+        scrape_date (str): date of the run, YYYY-mm-dd
+    '''
+
+    def __init__(self, directory, scrape_date):
+        self.directory = directory
+        self.scrape_date = scrape_date
+
+        #The schemas are made here rather than on the class, so pyarrow is only imported when the Parquet output is used
+        self.paper_schema = pa.schema([
+            ('PaperID', pa.int64()), ('PaperKey', pa.int64()), ('Title', pa.string()), ('Citations', pa.int64()), ('Year', pa.int32()),
+            ('Paper url', pa.string()), ('Google Scholar profile name', pa.string()), ('Publication date', pa.date32()), ('Journal', pa.string()),
+            ('Source', pa.string()), ('Conference', pa.string()), ('Authors', pa.list_(pa.string())), ('Primary author', pa.string()),
+            ('Supporting authors', pa.list_(pa.string()))])
+
+        self.academic_schema = pa.schema([
+            ('AcademicID', pa.int64()), ('Academic', pa.string()), ('Affiliation', pa.string()), ('Citations', pa.int64()), ('h-index', pa.int32()),
+            ('i10-index', pa.int32()), ('Citations per year', pa.list_(pa.struct([('year', pa.int32()), ('citations', pa.int64())])))])
+
+    def _write(self, table, dataset, academic_key):
+        #Each academic and date has its own partition, so re-running a query on the same day simply replaces its file
+        path = os.path.join(self.directory, dataset, f'AcademicKey={academic_key}', f'scrape_date={self.scrape_date}')
+        os.makedirs(path, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=path, suffix='.tmp')
+        os.close(fd)
+        pq.write_table(table, temp_path)
+        os.replace(temp_path, os.path.join(path, 'part-0.parquet'))
+
+    def write(self, f_paper_df, f_academic_df):
+        '''
+        Writes an academic's formatted papers and information to their partitions of the datasets.
+        '''
+        academic_key = f_academic_df['AcademicKey'].iloc[0]
+
+        papers = dict()
+        for column in ['PaperID', 'PaperKey', 'Citations', 'Year']:
+            papers[column] = pd.to_numeric(f_paper_df[column], errors='coerce').astype('Int64')
+        papers['Publication date'] = parse_dates(f_paper_df['Publication date']).dt.date
+        for column in ['Title', 'Paper url', 'Google Scholar profile name', 'Journal', 'Source', 'Conference', 'Primary author']:
+            papers[column] = f_paper_df[column].map(lambda value: None if pd.isna(value) else str(value))
+        for column in ['Authors', 'Supporting authors']:
+            papers[column] = f_paper_df[column].map(as_author_list)
+
+        papers = pd.DataFrame(papers)[self.paper_schema.names]
+        self._write(pa.Table.from_pandas(papers, schema=self.paper_schema, preserve_index=False), 'papers', academic_key)
+
+        academic = dict()
+        for column in ['Academic', 'Affiliation']:
+            academic[column] = f_academic_df[column].astype(str)
+        for column in ['AcademicID', 'Citations', 'h-index', 'i10-index']:
+            academic[column] = pd.to_numeric(f_academic_df[column], errors='coerce').astype('Int64')
+
+        year_columns = [column for column in f_academic_df.columns if column.startswith('Citations in ')]
+        academic['Citations per year'] = [[{'year': int(column[len('Citations in '):]), 'citations': int(row[column])}
+                                           for column in year_columns if not pd.isna(row[column])]
+                                          for _, row in f_academic_df.iterrows()]
+
+        academic = pd.DataFrame(academic)[self.academic_schema.names]
+        self._write(pa.Table.from_pandas(academic, schema=self.academic_schema, preserve_index=False), 'academics', academic_key)
+
+    def close(self):
+        pass
+
+class DatabaseOutput:
+    '''
+    Writes the output of a run into a normalized database: academics, papers, authors, which authors wrote each paper, which papers are
+    listed on each academic's profile, and each academic's citations per year. Rows are upserted on their PaperKey/AcademicKey (and a key
+    generated from each author's name, see generate_key), so re-scraping an academic updates their rows in place instead of adding
+    duplicates. Each academic is written in a single transaction.
+
+    SQLite is used by default, so it works locally with no setup. If the connection string contains '=', e.g. "DSN=scholar" or
+    "DRIVER={ODBC Driver 18 for SQL Server};SERVER=...", it is used to connect through ODBC instead.
+
+    Parameters:
+        connection (str): path of an SQLite database file, or an ODBC connection string
+        scrape_date (str): date of the run, YYYY-mm-dd
+    '''
+
+    TABLES = {
+        'academics': '''(academic_key BIGINT PRIMARY KEY, academic_id BIGINT, name VARCHAR(500), affiliation VARCHAR(1000), citations INTEGER,
+                        h_index INTEGER, i10_index INTEGER, scrape_date DATE)''',
+        'papers': '''(paper_key BIGINT PRIMARY KEY, paper_id BIGINT, title VARCHAR(2000), year INTEGER, citations INTEGER, url VARCHAR(2000),
+                     publication_date DATE, journal VARCHAR(1000), source VARCHAR(1000), conference VARCHAR(1000), scrape_date DATE)''',
+        'authors': '''(author_key BIGINT PRIMARY KEY, name VARCHAR(500))''',
+        'paper_authors': '''(paper_key BIGINT, position INTEGER, author_key BIGINT, PRIMARY KEY (paper_key, position))''',
+        'academic_papers': '''(academic_key BIGINT, paper_key BIGINT, PRIMARY KEY (academic_key, paper_key))''',
+        'academic_citations': '''(academic_key BIGINT, year INTEGER, citations INTEGER, PRIMARY KEY (academic_key, year))''',
+    }
+
+    def __init__(self, connection, scrape_date):
+        self.scrape_date = scrape_date
+
+        if '=' in connection:
+            self.dialect = 'odbc'
+            import pyodbc
+            self._conn = pyodbc.connect(connection, autocommit=False)
+            existing = {row.table_name.lower() for row in self._conn.cursor().tables(tableType='TABLE')}
+        else:
+            self.dialect = 'sqlite'
+            self._conn = sqlite3.connect(connection, timeout=60) #shards of a run (see run_shards) may be writing to the same file
+            existing = {row[0] for row in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+        #SQLite can skip tables created in the meantime by another shard, which ODBC databases do not all support
+        create = 'CREATE TABLE IF NOT EXISTS' if self.dialect == 'sqlite' else 'CREATE TABLE'
+        cursor = self._conn.cursor()
+        for table, columns in self.TABLES.items():
+            if table not in existing:
+                cursor.execute(f'{create} {table} {columns}')
+        self._conn.commit()
+
+    def _upsert(self, cursor, table, keys, columns, rows):
+        #Inserts rows, or updates the non-key columns of rows whose keys already exist
+        if len(rows) == 0:
+            return
+
+        values = ', '.join('?' * len(columns))
+        others = [column for column in columns if column not in keys]
+
+        if self.dialect == 'sqlite':
+            action = 'DO UPDATE SET ' + ', '.join(f'{column} = excluded.{column}' for column in others) if len(others) > 0 else 'DO NOTHING'
+            cursor.executemany(f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({values}) ON CONFLICT ({", ".join(keys)}) {action}', rows)
+            return
+
+        #ODBC has no portable upsert, so try an update first and insert if nothing was updated
+        where = ' AND '.join(f'{key} = ?' for key in keys)
+        for row in rows:
+            row = dict(zip(columns, row))
+            key_values = [row[key] for key in keys]
+            if len(others) > 0:
+                cursor.execute(f'UPDATE {table} SET {", ".join(f"{column} = ?" for column in others)} WHERE {where}', [row[column] for column in others] + key_values)
+                found = cursor.rowcount > 0
+            else:
+                found = cursor.execute(f'SELECT 1 FROM {table} WHERE {where}', key_values).fetchone() is not None
+
+            if not found:
+                cursor.execute(f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({values})', [row[column] for column in columns])
+
+    def write(self, f_paper_df, f_academic_df):
+        '''
+        Upserts an academic's formatted papers and information.
+        '''
+        def value(x):
+            return None if pd.isna(x) else x
+
+        def number(x):
+            x = pd.to_numeric(x, errors='coerce')
+            return None if pd.isna(x) else int(x)
+
+        academic = f_academic_df.iloc[0]
+        academic_key = int(academic['AcademicKey'])
+        year_columns = [column for column in f_academic_df.columns if column.startswith('Citations in ')]
+
+        papers = list()
+        paper_authors = list()
+        authors = dict()
+        dates = parse_dates(f_paper_df['Publication date']).dt.strftime('%Y-%m-%d').to_list() #all parsed at once, NaN where missing
+        for (_, paper), date in zip(f_paper_df.iterrows(), dates):
+            paper_key = int(paper['PaperKey'])
+            papers.append((paper_key, number(paper['PaperID']), value(paper['Title']), number(paper['Year']), number(paper['Citations']), value(paper['Paper url']),
+                           value(date), value(paper['Journal']), value(paper['Source']), value(paper['Conference']), self.scrape_date))
+
+            for position, name in enumerate(as_author_list(paper['Authors']) or []):
+                authors[name] = generate_key(name)
+                paper_authors.append((paper_key, position, authors[name]))
+
+        cursor = self._conn.cursor()
+        try:
+            self._upsert(cursor, 'academics', ['academic_key'], ['academic_key', 'academic_id', 'name', 'affiliation', 'citations', 'h_index', 'i10_index', 'scrape_date'],
+                         [(academic_key, number(academic['AcademicID']), value(academic['Academic']), value(academic['Affiliation']), number(academic['Citations']),
+                           number(academic['h-index']), number(academic['i10-index']), self.scrape_date)])
+            self._upsert(cursor, 'academic_citations', ['academic_key', 'year'], ['academic_key', 'year', 'citations'],
+                         [(academic_key, int(column[len('Citations in '):]), number(academic[column])) for column in year_columns if number(academic[column]) is not None])
+            self._upsert(cursor, 'papers', ['paper_key'], ['paper_key', 'paper_id', 'title', 'year', 'citations', 'url', 'publication_date', 'journal', 'source', 'conference', 'scrape_date'], papers)
+            self._upsert(cursor, 'authors', ['author_key'], ['author_key', 'name'], [(author_key, name) for name, author_key in authors.items()])
+            self._upsert(cursor, 'academic_papers', ['academic_key', 'paper_key'], ['academic_key', 'paper_key'], [(academic_key, paper[0]) for paper in papers])
+
+            #A paper's author list is replaced as a whole, in case it has become shorter
+            cursor.executemany('DELETE FROM paper_authors WHERE paper_key = ?', [(paper[0],) for paper in papers])
+            self._upsert(cursor, 'paper_authors', ['paper_key', 'position'], ['paper_key', 'position', 'author_key'], paper_authors)
+
+            self._conn.commit()
+        except:
+            self._conn.rollback()
+            raise
+
+    def close(self):
+        self._conn.close()
+
+def normalize_author(name):
+    '''
+    Normalises an author's name for the author index: lower case, without full stops or commas, and with single spaces between words.
+
+    Parameters:
+        name (str): name of the author as listed on a paper
+
+    Returns:
+        normalized_name (str): the normalised name
+    '''
+    return ' '.join(re.sub(r'[.,]', ' ', str(name).lower()).split())
+
+class AuthorIndex:
+    '''
+    A compact index of who wrote which papers, kept in directory next to the other outputs. Each distinct author (by normalize_author) is
+    given an integer id, in the order they are first found, and each paper's authors are stored as one array of author ids with the offset
+    at which each paper's authors start (compressed sparse rows), instead of a list of name strings per row. From these, the co-authorship
+    graph (how many papers each pair of authors wrote together) and an inverted index from each author to their PaperKeys are made, also as
+    compressed sparse rows, and kept in graph.npz. Papers with more than GRAPH_AUTHOR_LIMIT authors (large collaborations) are left out of
+    the co-authorship graph, as they would pair thousands of authors with each other, but are still in the inverted index.
+
+    Adding an academic's papers only appends to the end of each array and file, so the index is cheap to update after every academic. A
+    paper already in the index is not added again. The graph and inverted index are brought up to date when they are next queried, or the
+    index is closed: only the papers added since they were saved are paired, and merged into them. The files are:
+
+        authors.txt: each author's name as first found, one per line, in order of id
+        paper_keys.bin: PaperKey of each paper (64 bit integers)
+        offsets.bin: where each paper's authors end in author_ids.bin (64 bit integers)
+        author_ids.bin: author id of every author of every paper, in order (32 bit integers)
+        graph.npz: the co-authorship graph and inverted index, and the number of papers they were made from
+
+    Parameters:
+        directory (str): directory of the index, which is made if it does not exist
+    '''
+
+    GRAPH_AUTHOR_LIMIT = 100 #papers with more authors than this are left out of the co-authorship graph
+    GRAPH_CHUNK_PAIRS = 10**7 #most author pairs made at once when building the co-authorship graph
+
+    def __init__(self, directory='author index'):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        self.names = list()
+        if os.path.exists(self._path('authors.txt')):
+            with open(self._path('authors.txt'), 'rb') as file:
+                data = file.read()
+            self.names = data[:data.rfind(b'\n') + 1].decode('utf-8').split('\n')[:-1] #a name cut off part way by an interrupted write is left out
+
+        self.paper_keys = array('q')
+        self.offsets = array('q', [0])
+        self.author_ids = array('i')
+        for name, values in [('paper_keys.bin', self.paper_keys), ('offsets.bin', self.offsets), ('author_ids.bin', self.author_ids)]:
+            if os.path.exists(self._path(name)):
+                with open(self._path(name), 'rb') as file:
+                    data = file.read()
+                values.frombytes(data[:len(data) - len(data) % values.itemsize])
+
+        #A write that was interrupted part way may have left a file longer than the others, so every file is cut back to the papers in all of them
+        papers = min(len(self.paper_keys), len(self.offsets) - 1)
+        del self.paper_keys[papers:]
+        del self.offsets[papers + 1:]
+        del self.author_ids[self.offsets[-1]:]
+        for name, values in [('paper_keys.bin', self.paper_keys), ('offsets.bin', self.offsets[1:]), ('author_ids.bin', self.author_ids)]:
+            if os.path.exists(self._path(name)):
+                os.truncate(self._path(name), len(values) * values.itemsize)
+
+        #Names are written before the papers they were first found in, so names past the last author of the papers kept belong to papers that were cut
+        del self.names[max(self.author_ids, default=-1) + 1:]
+        if os.path.exists(self._path('authors.txt')):
+            os.truncate(self._path('authors.txt'), sum(len(name.encode('utf-8')) + 1 for name in self.names))
+        self.ids = {normalize_author(name): author_id for author_id, name in enumerate(self.names)}
+
+        self.indexed = set(self.paper_keys)
+        self._built = None #co-authorship graph and inverted index, loaded when first queried (see _build)
+
+        #A graph made from papers that have since been cut back is made again
+        if os.path.exists(self._path('graph.npz')):
+            try:
+                with np.load(self._path('graph.npz')) as graph:
+                    stale = int(graph['papers']) > len(self.paper_keys) or int(graph['authors']) > len(self.names)
+            except Exception:
+                stale = True
+            if stale:
+                os.remove(self._path('graph.npz'))
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def write(self, f_paper_df, f_academic_df):
+        '''
+        Adds an academic's formatted papers to the index, appending them to its files.
+        '''
+        names = list()
+        paper_keys = array('q')
+        offsets = array('q')
+        author_ids = array('i')
+
+        for paper_key, authors in zip(f_paper_df['PaperKey'], f_paper_df['Authors']):
+            paper_key = int(paper_key)
+            authors = as_author_list(authors)
+            if paper_key in self.indexed or authors is None:
+                continue
+
+            listed = list()
+            for name in authors:
+                key = normalize_author(name)
+                if key == '':
+                    continue
+                if key not in self.ids:
+                    self.ids[key] = len(self.names)
+                    self.names.append(name.strip())
+                    names.append(name.strip())
+                if self.ids[key] not in listed: #an author listed twice is only counted once
+                    listed.append(self.ids[key])
+
+            self.indexed.add(paper_key)
+            paper_keys.append(paper_key)
+            author_ids.extend(listed)
+            offsets.append(self.offsets[-1] + len(author_ids))
+
+        if len(paper_keys) == 0:
+            return
+
+        #The authors and their ids are written before the papers' offsets, so an interrupted write is cut back to the last whole paper
+        with open(self._path('authors.txt'), 'a', encoding='utf-8', newline='\n') as file:
+            file.writelines(name + '\n' for name in names)
+        for name, values in [('author_ids.bin', author_ids), ('paper_keys.bin', paper_keys), ('offsets.bin', offsets)]:
+            with open(self._path(name), 'ab') as file:
+                values.tofile(file)
+
+        self.paper_keys.extend(paper_keys)
+        self.author_ids.extend(author_ids)
+        self.offsets.extend(offsets)
+
+    def _load(self):
+        #The saved graph and inverted index, or empty ones if there are none or they were made with another GRAPH_AUTHOR_LIMIT
+        if os.path.exists(self._path('graph.npz')):
+            with np.load(self._path('graph.npz')) as graph:
+                built = {name: graph[name] for name in graph.files}
+            if int(built['limit']) == self.GRAPH_AUTHOR_LIMIT:
+                return built
+
+        empty = np.zeros(0, dtype=np.int64)
+        return {'papers': np.int64(0), 'authors': np.int64(0), 'limit': np.int64(self.GRAPH_AUTHOR_LIMIT), 'paper_starts': np.zeros(1, dtype=np.int64),
+                'paper_positions': empty, 'neighbour_starts': np.zeros(1, dtype=np.int64), 'neighbours': empty, 'weights': empty}
+
+    def _save(self, built):
+        #Written to a temporary file then renamed into place, so an interrupted save leaves the previous graph
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            np.savez(file, **{name: value for name, value in built.items() if name != 'paper_order'})
+        os.replace(temp_path, self._path('graph.npz'))
+
+    def _build(self):
+        '''
+        Brings the co-authorship graph and the inverted index up to date with the papers' author arrays, pairing only the papers added since
+        they were last saved and merging them in, then saves them.
+
+        Returns:
+            built (dict): the graph and inverted index, as compressed sparse rows
+        '''
+        papers = len(self.paper_keys)
+        if self._built is None:
+            self._built = self._load()
+        built = self._built
+        done = int(built['papers'])
+        if done == papers:
+            if 'paper_order' not in built:
+                built['paper_order'] = np.argsort(np.frombuffer(self.paper_keys, dtype=np.int64), kind='stable')
+            return built
+
+        authors = len(self.names)
+        old_authors = len(built['paper_starts']) - 1
+        offsets = np.frombuffer(self.offsets, dtype=np.int64)
+        author_ids = np.frombuffer(self.author_ids, dtype=np.int32).astype(np.int64)
+        lengths = np.diff(offsets)
+
+        #Inverted index: the positions of each author's papers, grouped by author. New papers come after the old ones, so the sort (which
+        #keeps ties in order) leaves each author's papers in the order they were added.
+        slot_authors = np.concatenate([np.repeat(np.arange(old_authors), np.diff(built['paper_starts'])), author_ids[offsets[done]:]])
+        slot_papers = np.concatenate([built['paper_positions'], np.repeat(np.arange(done, papers), lengths[done:])])
+        paper_positions = slot_papers[np.argsort(slot_authors, kind='stable')]
+        paper_starts = np.concatenate([[0], np.cumsum(np.bincount(slot_authors, minlength=authors))])
+
+        #Co-authorship graph: every author of a new paper is paired with every other author of it, and the pairs counted along with the
+        #saved ones. A paper's pairs grow with the square of its authors, so papers with more than GRAPH_AUTHOR_LIMIT authors are left out,
+        #and the rest are paired a chunk at a time.
+        graphed = np.where(lengths <= self.GRAPH_AUTHOR_LIMIT, lengths, 0)
+        chunk_ends = np.cumsum(graphed ** 2)
+        width = max(authors, 1) #each pair is made into one number, first * width + second, to be counted
+        edges = [np.repeat(np.arange(old_authors), np.diff(built['neighbour_starts'])) * width + built['neighbours']]
+        weights = [built['weights']]
+        start = done
+        while start < papers:
+            end = max(int(np.searchsorted(chunk_ends, chunk_ends[start] - graphed[start] ** 2 + self.GRAPH_CHUNK_PAIRS, 'right')), start + 1)
+            slots = author_ids[offsets[start]:offsets[end]]
+            slot_paper = np.repeat(np.arange(end - start), lengths[start:end])
+            pairs = graphed[start:end][slot_paper] #each author slot is paired with every slot of its paper
+            first = np.repeat(slots, pairs)
+            slot_starts = np.repeat(offsets[start:end][slot_paper] - offsets[start], pairs)
+            within = np.arange(pairs.sum()) - np.repeat(np.cumsum(pairs) - pairs, pairs)
+            second = slots[slot_starts + within]
+            keep = first != second
+            chunk_edges, chunk_weights = np.unique(first[keep] * width + second[keep], return_counts=True)
+            edges.append(chunk_edges)
+            weights.append(chunk_weights)
+            start = end
+        edges, inverse = np.unique(np.concatenate(edges), return_inverse=True)
+        weights = np.bincount(inverse, weights=np.concatenate(weights), minlength=len(edges)).astype(np.int64)
+        neighbours = edges % width
+        neighbour_starts = np.searchsorted(edges // width, np.arange(authors + 1))
+
+        self._built = {'papers': np.int64(papers), 'authors': np.int64(authors), 'limit': np.int64(self.GRAPH_AUTHOR_LIMIT),
+                       'paper_starts': paper_starts, 'paper_positions': paper_positions, 'neighbour_starts': neighbour_starts,
+                       'neighbours': neighbours, 'weights': weights}
+        self._save(self._built)
+        self._built['paper_order'] = np.argsort(np.frombuffer(self.paper_keys, dtype=np.int64), kind='stable') #only used by authors_of
+        return self._built
+
+    def author_id(self, name):
+        '''
+        Gets the id of an author, or None if they are not in the index.
+        '''
+        return self.ids.get(normalize_author(name))
+
+    def papers_of(self, name):
+        '''
+        Gets the PaperKeys of every paper an author wrote.
+
+        Parameters:
+            name (str): name of the author
+
+        Returns:
+            paper_keys (list int): PaperKeys of the author's papers, in the order they were added
+        '''
+        author_id = self.author_id(name)
+        if author_id is None:
+            return []
+
+        built = self._build()
+        positions = built['paper_positions'][built['paper_starts'][author_id]:built['paper_starts'][author_id + 1]]
+        paper_keys = np.frombuffer(self.paper_keys, dtype=np.int64)
+        return paper_keys[positions].tolist()
+
+    def coauthors(self, name):
+        '''
+        Gets everyone who wrote a paper with an author.
+
+        Parameters:
+            name (str): name of the author
+
+        Returns:
+            coauthors (list): (name, number of papers written together) of each co-author, most papers first
+        '''
+        author_id = self.author_id(name)
+        if author_id is None:
+            return []
+
+        built = self._build()
+        start, end = built['neighbour_starts'][author_id], built['neighbour_starts'][author_id + 1]
+        coauthors = [(self.names[neighbour], int(weight)) for neighbour, weight in zip(built['neighbours'][start:end], built['weights'][start:end])]
+        return sorted(coauthors, key=lambda coauthor: -coauthor[1])
+
+    def authors_of(self, paper_key):
+        '''
+        Gets the authors of a paper, in the order they are listed, or an empty list if the paper is not in the index.
+        '''
+        built = self._build()
+        paper_keys = np.frombuffer(self.paper_keys, dtype=np.int64)
+        found = np.searchsorted(paper_keys[built['paper_order']], int(paper_key))
+        if found == len(paper_keys) or paper_keys[built['paper_order'][found]] != int(paper_key):
+            return []
+
+        position = built['paper_order'][found]
+        return [self.names[author_id] for author_id in self.author_ids[self.offsets[position]:self.offsets[position + 1]]]
+
+    def report(self):
+        '''
+        Prints the number of authors, papers and co-author pairs in the index.
+        '''
+        built = self._build()
+        print(f'{Fore.BLUE}Author index ({self.directory}):{Style.RESET_ALL}')
+        print(f'{Fore.BLUE}-->{Style.RESET_ALL} {len(self.names)} authors, {len(self.paper_keys)} papers, {len(self.author_ids)} paper authors, '
+              f'{len(built["neighbours"]) // 2} co-author pairs')
+
+    def close(self):
+        if self._built is None or int(self._built['papers']) < len(self.paper_keys):
+            self._build() #so the saved graph is up to date for the next query
+
+def query_stages(fetcher, known_papers=None, store=None, sheets=True, registry=None, profiles=None, progress=True):
+    '''
+    Gets the stages of scraping the profile found for a search query. Each stage is a function which takes the query's job, a dict of the
+    'search' query and everything gathered for it so far, adds to it and returns it. The stages are run one after another by dfs_by_query,
+    or each on its own threads by Pipeline, so that different queries can be at different stages at the same time.
+
+        resolve: finds the query's profile (unless the job already has its 'profile_url'), or takes the profile gathered by an interrupted
+                 run from the job store
+        list: gets the list of papers, the academic's information and their co-authors from the profile
+        details: gets the additional details of each paper
+        format: formats the dataframes, adds existing papers for an incremental run, and exports the individual sheets
+
+    Parameters:
+        fetcher, known_papers, store, sheets, registry, profiles: see dfs_by_query
+        progress (bool): whether to show a progress bar while the details of papers are gathered
+
+    Returns:
+        stages (list): (name, function) of each stage, in order
+    '''
+    known_ids = None if known_papers is None else set(known_papers.index)
+
+    def resolve(job):
+        search = job['search']
+
+        #A profile gathered by an interrupted run is taken from the job store
+        saved = store.saved_profile(search) if store is not None else None
+        if saved is not None:
+            job['paper_df'], job['academic_df'] = saved
+            print(f'{Fore.GREEN}-->{Style.RESET_ALL}', 'Profile was already gathered by a previous run.')
+            return job
+
+        #A profile found by following a link, e.g. to a co-author (see run_crawl), needs no search
+        if 'profile_url' in job:
+            return job
+
+        #This loads the Google Scholar seach page, unless the query is in the profile cache. The results are shown on the page with the most
+        #relevant user at the top, whose profile we load sorted by year instead of citation count
+        if profiles is not None:
+            job['profile_url'] = profiles.profile_url(search, fetcher)
+        else:
+            url = get_scholar_search_url(search) #gets Google Scholar url for searched name
+            resp = fetcher.fetch(url, 'search')
+            with fetcher.metrics.stage('parse', 'search'):
+                soup=parse_page(resp, 'search')
+                job['profile_url'] = get_profile_url(soup)
+
+        return job
+
+    def list_papers(job):
+        if 'paper_df' not in job:
+            # GET PAPER TABLE 
+            with fetcher.metrics.stage('paper_list'):
+                paper_df, soup = get_paper_list(job['profile_url'], fetcher, known_ids)
+
+            # GET ACADEMIC TABLE 
+            with fetcher.metrics.stage('parse', 'profile'):
+                academic_df = get_academic_table(soup)
+                job['coauthors'] = get_coauthors(soup)
+
+            if store is not None:
+                store.save_profile(job['search'], paper_df, academic_df)
+            job['paper_df'], job['academic_df'] = paper_df, academic_df
+
+        # CHECK IF PAPERS ALREADY EXIST
+        if known_papers is not None:
+            is_new = check_new_papers(known_ids, job['paper_df'])
+            job['seen_df'] = job['paper_df'][~is_new]
+            job['paper_df'] = job['paper_df'][is_new]
+            print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'{len(job["paper_df"])} new papers found.')
+
+        return job
+
+    def details(job):
+        # GET PAPER DETAILS 
+        with fetcher.metrics.stage('paper_details'):
+            job['paper_df'] = get_paper_details(job['paper_df'], fetcher, store, job['search'], registry, job['academic_df']['Academic'][0], progress)
+
+        return job
+
+    def normalize(job):
+        search = job['search']
+
+        # APPROPRIATE FORMATTING
+        with fetcher.metrics.stage('format'):
+            f_paper_df, f_academic_df = format_dfs(job.pop('paper_df'), job.pop('academic_df'))
+
+            # ADD EXISTING PAPERS
+            if known_papers is not None:
+                f_paper_df = add_known_papers(f_paper_df, job.pop('seen_df'), known_papers, f_academic_df['Academic'][0])
+
+        
+        # EXPORT DATAFRAMES TO CSV
+        if sheets:
+            directory = 'Individual sheets\\'
+            parent_dir = os.getcwd()
+            path = os.path.join(parent_dir, directory)
+
+            os.makedirs(path, exist_ok=True) #creates subdirectory if it doesn't already exist
+
+            current_datetime = get_current_datetime()
+
+            with fetcher.metrics.stage('sheets'):
+                f_paper_df.to_csv(path + f'{search}_papers {current_datetime}.csv', index=False, index_label=False)
+            print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'Successfully exported "{search} papers {current_datetime}.csv"')
+
+            with fetcher.metrics.stage('sheets'):
+                f_academic_df.to_csv(path + f'{search}_info {current_datetime}.csv', index=False, index_label=False)
+            print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'Successfully exported "{search} info {current_datetime}.csv"')
+
+        job['f_paper_df'], job['f_academic_df'] = f_paper_df, f_academic_df
+        return job
+
+    return [('resolve', resolve), ('list', list_papers), ('details', details), ('format', normalize)]
+
+def dfs_by_query(search, fetcher, known_papers=None, store=None, sheets=True, registry=None, profiles=None): #add name + university 
+    '''
+    Fetches html data from Google Scholar urls, parses with bs4, and then extracts information for the Paper and Academic tables, which are stored in a pandas df. 
+    This is the core function, at almost the highest level. It will be used in a loop to gather data for multiple search queries. It runs each
+    of the query's stages (see query_stages) one after another.
+
+    Parameters:
+        search (str): Google Scholar profile search query
+        fetcher (PageFetcher): fetcher used to load each page
+        known_papers (pandas df): existing papers indexed by PaperKey (see load_known_papers). If given, only the details of new papers are
+                                  fetched, and the academic's existing papers are updated from their profile
+        store (JobStore): job store to record progress in, so an interrupted query can be resumed, or None
+        sheets (bool): whether to export the dataframes to csv files in the 'Individual sheets' folder
+        registry (PaperRegistry): papers gathered so far in the run, which are not fetched again, or None
+        profiles (ProfileCache): profiles previous runs resolved queries to, so the search page is not loaded again, or None
+
+    Returns:
+        paper_df (pandas df): a dataframe containing paper information
+        academic_df (pandas df): a dataframe containing academic information
+    '''
+    job = {'search': search}
+    for name, stage in query_stages(fetcher, known_papers, store, sheets, registry, profiles):
+        job = stage(job)
+
+    return job['f_paper_df'], job['f_academic_df']
+
+class Pipeline:
+    '''
+    Runs a list of items through a series of stages, each with its own worker threads, so that e.g. one query's papers are fetched while the
+    next query's profile is listed and the previous query's results are formatted and written. Stages are connected by queues of at most
+    queue_size items, so a stage that gets ahead waits for the next one to catch up (backpressure), and at most window items are in the
+    pipeline at once however many items there are, which keeps memory use flat. Results come out in the same order as the items went in.
+
+    Parameters:
+        stages (list): (name, function) of each stage. Each function is given the result of the previous stage, or the item for the first.
+        workers (dict): stage name -> number of worker threads (default: 1 for each stage)
+        queue_size (int): number of items that can wait between two stages
+        sink (str): name of the final stage, which is whatever the caller does with each result (see run)
+    '''
+
+    def __init__(self, stages, workers=None, queue_size=2, sink='write'):
+        self.stages = stages
+        self.names = [name for name, _ in stages] + [sink]
+        self.workers = [max(1, (workers or {}).get(name, 1)) for name in self.names[:-1]] + [1]
+        self.queue_size = queue_size
+        self.window = sum(self.workers) + queue_size * len(stages)
+        self._lock = threading.Lock()
+
+        #Metrics for each stage, including the sink
+        self.items = [0] * len(self.names)
+        self.busy = [0.0] * len(self.names) #seconds spent working, summed over the stage's workers
+        self.depths = [[0, 0, 0] for _ in self.names] #items waiting for the stage: sum of samples, number of samples, most
+        self.elapsed = 0.0
+
+    def _sample(self, stage, depth):
+        with self._lock:
+            self.depths[stage][0] += depth
+            self.depths[stage][1] += 1
+            self.depths[stage][2] = max(self.depths[stage][2], depth)
+
+    def run(self, items):
+        '''
+        Runs items through the stages. This is a generator, which gives each item's result as soon as it and every earlier item are done. The
+        time the caller spends on each result, before asking for the next, is counted as the sink stage's work.
+
+        Parameters:
+            items (list): items to run through the stages
+
+        Yields:
+            item: the item
+            result: the result of the last stage, or None if a stage failed
+            error (Exception): the error raised by the stage that failed, or None
+        '''
+        items = list(items)
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages] + [queue.Queue()] #the last queue is bounded by the window
+        window = threading.BoundedSemaphore(self.window)
+        finished = [0] * len(self.stages)
+        stopped = threading.Event()
+
+        def put(stage, entry):
+            #Waits for room in the stage's queue, unless the pipeline is stopped early
+            while True:
+                try:
+                    queues[stage].put(entry, timeout=0.1)
+                    break
+                except queue.Full:
+                    if stopped.is_set():
+                        return
+            if entry is not None and stage < len(self.stages):
+                self._sample(stage, queues[stage].qsize())
+
+        def feed():
+            for idx, item in enumerate(items):
+                while not window.acquire(timeout=0.1):
+                    if stopped.is_set():
+                        return
+                put(0, (idx, item, item, None))
+            for _ in range(self.workers[0]):
+                put(0, None)
+
+        def work(stage):
+            function = self.stages[stage][1]
+            while True:
+                try:
+                    entry = queues[stage].get(timeout=0.1)
+                except queue.Empty:
+                    if stopped.is_set():
+                        return
+                    continue
+                if entry is None:
+                    break
+
+                idx, item, value, error = entry
+                if error is None and not stopped.is_set():
+                    start = time.perf_counter()
+                    try:
+                        value = function(value)
+                    except Exception as e:
+                        value, error = None, e
+                    with self._lock:
+                        self.busy[stage] += time.perf_counter() - start
+                        self.items[stage] += 1
+                put(stage + 1, (idx, item, value, error))
+
+            #The last worker of a stage to finish tells the next stage's workers to finish
+            with self._lock:
+                finished[stage] += 1
+                last = finished[stage] == self.workers[stage]
+            if last and stage + 1 < len(self.stages):
+                for _ in range(self.workers[stage + 1]):
+                    put(stage + 1, None)
+
+        threads = [threading.Thread(target=feed, daemon=True)]
+        for stage in range(len(self.stages)):
+            threads += [threading.Thread(target=work, args=(stage,), daemon=True) for _ in range(self.workers[stage])]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        #Results can finish out of order, so they wait here until every earlier item has been given to the caller
+        done = dict()
+        try:
+            for idx in range(len(items)):
+                while idx not in done:
+                    entry = queues[-1].get()
+                    done[entry[0]] = entry
+                    self._sample(len(self.stages), len(done))
+
+                _, item, value, error = done.pop(idx)
+                start = time.perf_counter()
+                yield item, value, error
+                self.busy[-1] += time.perf_counter() - start
+                self.items[-1] += 1
+                window.release()
+
+        finally:
+            stopped.set() #if the caller stopped early, the workers stop taking on new work
+            self.elapsed = time.perf_counter() - started
+
+    def report(self):
+        '''
+        Prints the number of workers, items, time spent working, utilisation (the fraction of the run the stage's workers spent working) and
+        queue depth of each stage.
+        '''
+        print(f'{Fore.BLUE}Pipeline ({self.elapsed:.0f} seconds):{Style.RESET_ALL}')
+        print(f'{Fore.BLUE}-->{Style.RESET_ALL} {"stage":<12}{"workers":>8}{"items":>8}{"busy s":>10}{"used":>8}{"mean queue":>12}{"max queue":>11}')
+        for stage, name in enumerate(self.names):
+            used = self.busy[stage] / (self.workers[stage] * self.elapsed) if self.elapsed > 0 else 0
+            total, samples, most = self.depths[stage]
+            mean = total / samples if samples > 0 else 0
+            print(f'{Fore.BLUE}-->{Style.RESET_ALL} {name:<12}{self.workers[stage]:>8}{self.items[stage]:>8}{self.busy[stage]:>10.1f}{used:>8.0%}{mean:>12.1f}{most:>11}')
+
+def scrape_profile(query, fetcher=None, known_papers=None, **options):
+    '''
+    Scrapes the Google Scholar profile found for a search query, for use as a library, e.g.
+
+        import scholar_scraper
+        paper_df, academic_df = scholar_scraper.scrape_profile('john doe york', paper_backend='http')
+
+    Parameters:
+        query (str): Google Scholar profile search query
+        fetcher (PageFetcher): fetcher used to load each page, or None to make one from options (see make_fetcher) just for this query
+        known_papers (pandas df): existing papers indexed by PaperKey (see dfs_by_query), or None
+        options: options for make_fetcher, if no fetcher is given
+
+    Returns:
+        paper_df (pandas df): the academic's formatted papers
+        academic_df (pandas df): the academic's formatted information
+    '''
+    own_fetcher = fetcher is None
+    if own_fetcher:
+        fetcher = make_fetcher(**options)
+
+    try:
+        return dfs_by_query(query, fetcher, known_papers, sheets=False)
+    finally:
+        if own_fetcher:
+            fetcher.close()
+
+def scrape_many(queries, fetcher=None, outputs=(), known_papers=None, store=None, done=(), collect=True, sheets=False, registry=None, profiles=None,
+                pipeline=None, queue_size=2, **options):
+    '''
+    Scrapes the Google Scholar profile found for each of a list of search queries, for use as a library or by the program itself. Each
+    query's papers and information are written to every output as soon as they are gathered. A query that fails is reported and skipped,
+    rather than stopping the others.
+
+    Queries are scraped one after another, unless pipeline is given. Each stage of a query (see query_stages) is then run on its own worker
+    threads, with several queries at different stages at the same time (see Pipeline), while the results are still written in query order.
+
+    Parameters:
+        queries (list str): Google Scholar profile search queries
+        fetcher (PageFetcher): fetcher used to load each page, or None to make one from options (see make_fetcher) just for these queries
+        outputs (list): outputs to write each query's results to, e.g. CsvOutput, ParquetOutput or DatabaseOutput
+        known_papers (pandas df): existing papers indexed by PaperKey (see dfs_by_query), or None
+        store (JobStore): job store to record progress in, or None
+        done (set str): queries already completed by a previous run, which are skipped
+        collect (bool): whether to also gather every query's results into the returned dataframes. Turn off for large runs that only
+                        need the outputs, to save memory.
+        sheets (bool): whether to export each query's dataframes to csv files in the 'Individual sheets' folder
+        registry (PaperRegistry): registry of papers gathered so far, so a paper shared by several academics is only fetched once, or None
+        profiles (ProfileCache): profiles previous runs resolved queries to, or None
+        pipeline (dict): stage name (see query_stages) -> number of worker threads, to pipeline the queries, or None
+        queue_size (int): number of queries that can wait between two stages of the pipeline
+        options: options for make_fetcher, if no fetcher is given
+
+    Returns:
+        paper_df (pandas df): every query's papers, or None if collect is False
+        academic_df (pandas df): every query's academic information, or None if collect is False
+        errors (list str): queries that failed
+    '''
+    own_fetcher = fetcher is None
+    if own_fetcher:
+        fetcher = make_fetcher(**options)
+
+    papers = list()
+    academics = list()
+    errors = list()
+    search_length = len(queries)
+
+    def failed(search, e):
+        print(f'{Fore.RED}An error occured with this query: {Style.RESET_ALL}"{search}"')
+        errors.append(search)
+        fetcher.metrics.count('query_failures')
+        if store is not None:
+            store.set_state(search, 'failed', repr(e))
+        fetcher.metrics.flush()
+
+    def completed(search, p_df, a_df):
+        if len(outputs) > 0:
+            print(f'{Fore.BLUE}--> Adding this query to the main file output...{Style.RESET_ALL}') 
+        #A query left 'writing' by a run stopped part way through writing it may already be in the csv files, so its rows there are replaced
+        rewrite = store is not None and store.state(search) == 'writing'
+        if store is not None:
+            store.set_state(search, 'writing')
+        with fetcher.metrics.stage('write'):
+            for output in outputs:
+                if rewrite and isinstance(output, CsvOutput):
+                    output.remove(a_df)
+                output.write(p_df, a_df)
+        if store is not None:
+            store.set_state(search, 'done')
+        fetcher.metrics.count('queries_done')
+        fetcher.metrics.flush() #so the metrics file is up to date while the run is in progress
+
+        if collect:
+            papers.append(p_df)
+            academics.append(a_df)
+
+    try:
+        if pipeline is None:
+            for idx, search in enumerate(queries):
+                print(f'{Fore.GREEN}─{Style.RESET_ALL}' * 81) 
+                print(f'Profile search {idx+1}/{search_length}: {Fore.GREEN}{search}{Style.RESET_ALL}')
+                print(f'{Fore.GREEN}─{Style.RESET_ALL}' * 81) 
+
+                if search in done:
+                    print(f'{Fore.GREEN}-->{Style.RESET_ALL}', 'Already completed by a previous run.')
+                    continue
+            
+                try:
+                    with fetcher.metrics.stage('query', search=search):
+                        p_df, a_df = dfs_by_query(search, fetcher, known_papers, store, sheets=sheets, registry=registry, profiles=profiles)
+                except Exception as e:
+                    failed(search, e)
+                    continue
+            
+                print(f'{Fore.GREEN}─{Style.RESET_ALL}' * 81) 
+                completed(search, p_df, a_df)
+
+        else:
+            jobs = [{'search': search, 'position': idx} for idx, search in enumerate(queries) if search not in done]
+            if len(jobs) < search_length:
+                print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'{search_length - len(jobs)} queries were already completed by a previous run.')
+
+            #Several progress bars at once would be drawn over each other
+            stages = query_stages(fetcher, known_papers, store, sheets, registry, profiles, progress=pipeline.get('details', 1) == 1)
+            resolve = stages[0][1]
+            def start(job):
+                print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'Started profile search {job["position"]+1}/{search_length}: {Fore.GREEN}{job["search"]}{Style.RESET_ALL}')
+                job['started'] = time.perf_counter()
+                return resolve(job)
+            stages[0] = ('resolve', start)
+
+            runner = Pipeline(stages, pipeline, queue_size)
+            for job, result, error in runner.run(jobs):
+                search = job['search']
+                print(f'{Fore.GREEN}─{Style.RESET_ALL}' * 81) 
+                print(f'Profile search {job["position"]+1}/{search_length}: {Fore.GREEN}{search}{Style.RESET_ALL}')
+                print(f'{Fore.GREEN}─{Style.RESET_ALL}' * 81) 
+
+                if error is not None:
+                    failed(search, error)
+                    continue
+
+                fetcher.metrics.add_time('query', time.perf_counter() - job['started'], search=search)
+                completed(search, result.pop('f_paper_df'), result.pop('f_academic_df'))
+
+            runner.report()
+
+    finally:
+        if own_fetcher:
+            fetcher.close()
+
+    if not collect:
+        return None, None, errors
+    if len(papers) == 0:
+        return pd.DataFrame(), pd.DataFrame(), errors
+    return pd.concat(papers, ignore_index=True), pd.concat(academics, ignore_index=True), errors
+
+def run_daemon(queries_file, fetcher, schedule, outputs=(), known_papers=None, profiles=None, sheets=False, poll=60):
+    '''
+    Keeps the profiles of the queries in a file up to date until it is interrupted, refreshing each query when the schedule says it is due
+    (see RefreshSchedule). The file is checked for added and removed queries every poll seconds, so queries can be changed without a restart.
+    Refreshes are incremental: only papers not gathered before have their details fetched.
+
+    Parameters:
+        queries_file (str): file of search queries, one per line
+        fetcher (PageFetcher): fetcher used to load each page
+        schedule (RefreshSchedule): when each query is due
+        outputs (list): outputs to write each refresh's results to
+        known_papers (pandas df): papers gathered before, indexed by PaperKey (see load_known_papers), or None
+        profiles (ProfileCache): profiles previous runs resolved queries to, or None
+        sheets (bool): whether to export each refresh's dataframes to csv files in the 'Individual sheets' folder
+        poll (float): most seconds between checks of the queries file
+    '''
+    modified = None
+    while True:
+        #Queries added to or removed from the file are picked up without restarting
+        try:
+            mtime = os.path.getmtime(queries_file)
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime != modified:
+            modified = mtime
+            added, removed = schedule.sync(searches_from_file(queries_file))
+            if added > 0 or removed > 0:
+                print(f'{Fore.BLUE}--> {added} queries added to and {removed} removed from the refresh schedule.{Style.RESET_ALL}')
+
+        search, wait = schedule.next(fetcher.budget)
+        if search is None or wait > 0:
+            time.sleep(poll if search is None else min(wait, poll))
+            continue
+
+        before = fetcher.metrics.counters.get('pages_fetched', 0)
+        papers, academics, errors = scrape_many([search], fetcher, outputs, known_papers, sheets=sheets, profiles=profiles)
+        pages = fetcher.metrics.counters.get('pages_fetched', 0) - before
+
+        if len(errors) > 0:
+            interval = schedule.failed(search, pages)
+        else:
+            interval = schedule.refreshed(search, papers, academics, pages)
+
+            #The academic's papers are now known as they are on the profile, for their next refresh
+            if known_papers is not None:
+                academic = academics['Academic'][0]
+                known_papers = pd.concat([known_papers[known_papers['Google Scholar profile name'] != academic], papers.set_index('PaperKey')])
+            else:
+                known_papers = papers.set_index('PaperKey')
+
+        print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'{pages} pages fetched, next refresh of "{search}" in {interval:.1f} days.')
+
+def run_crawl(seeds, fetcher, frontier, outputs=(), known_papers=None, registry=None, profiles=None, sheets=False, limit=None):
+    '''
+    Crawls outwards from the profiles of seed queries to their co-authors' profiles, breadth first, scraping each profile like a query
+    and writing it to the outputs. The frontier (see CrawlFrontier) decides which co-authors are followed and in which order, and records
+    the crawl's progress, so running the crawl again carries on where it stopped.
+
+    Parameters:
+        seeds (list str): Google Scholar profile search queries to start from
+        fetcher (PageFetcher): fetcher used to load each page
+        frontier (CrawlFrontier): profiles found so far, and whether they have been crawled
+        outputs (list): outputs to write each profile's results to
+        known_papers (pandas df): existing papers indexed by PaperKey (see load_known_papers), or None
+        registry (PaperRegistry): papers gathered so far, so a paper shared by several co-authors is only fetched once, or None
+        profiles (ProfileCache): profiles previous runs resolved the seed queries to, or None
+        sheets (bool): whether to export each profile's dataframes to csv files in the 'Individual sheets' folder
+        limit (int): most profiles to crawl, including those crawled before, or None for no limit
+
+    Returns:
+        errors (list str): names of the profiles that failed
+    '''
+    stages = query_stages(fetcher, known_papers, None, sheets, registry, profiles)
+    errors = list()
+
+    #Seed queries are resolved to their profiles first, as everything else in the frontier is a profile
+    for search in seeds:
+        if frontier.seeded(search):
+            continue
+        try:
+            frontier.add_seed(search, stages[0][1]({'search': search})['profile_url'])
+        except Exception:
+            print(f'{Fore.RED}No profile could be found for: {Style.RESET_ALL}"{search}"')
+            errors.append(search)
+
+    while limit is None or frontier.crawled() < limit:
+        profile = frontier.next()
+        if profile is None:
+            break
+        user, url, name, depth = profile
+
+        print(f'{Fore.GREEN}─{Style.RESET_ALL}' * 81) 
+        print(f'Profile {frontier.crawled()+1} (depth {depth}): {Fore.GREEN}{name}{Style.RESET_ALL}')
+        print(f'{Fore.GREEN}─{Style.RESET_ALL}' * 81) 
+
+        try:
+            with fetcher.metrics.stage('query', search=name):
+                job = {'search': name, 'profile_url': url}
+                for _, stage in stages:
+                    job = stage(job)
+        except Exception as e:
+            print(f'{Fore.RED}An error occured with this profile: {Style.RESET_ALL}"{name}"')
+            errors.append(name)
+            fetcher.metrics.count('query_failures')
+            frontier.failed(user, repr(e))
+            fetcher.metrics.flush()
+            continue
+
+        #The profile is only marked done once it has been written, so a crawl stopped in between writes it again rather than losing it
+        with fetcher.metrics.stage('write'):
+            for output in outputs:
+                output.write(job['f_paper_df'], job['f_academic_df'])
+
+        added = frontier.done(user, depth, job.get('coauthors', []))
+        print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'{added} new co-authors added to the frontier.')
+        fetcher.metrics.count('queries_done')
+        fetcher.metrics.flush()
+
+    return errors
+
+def shard_of(search, shards):
+    '''
+    Gets the shard a search query belongs to, from a hash of the query. Unlike Python's hash(), this is the same in every process and on every
+    machine, so each shard always gets the same queries.
+
+    Parameters:
+        search (str): Google Scholar profile search query
+        shards (int): number of shards
+
+    Returns:
+        shard (int): the query's shard, from 0 to shards-1
+    '''
+    digest = hashlib.sha256(search.strip().lower().encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % shards
+
+def shard_directory(shard, shards):
+    '''
+    Gets the directory a shard of a run keeps its csv files, job store, page cache and log in.
+
+    Parameters:
+        shard (int): the shard, from 0 to shards-1
+        shards (int): number of shards
+
+    Returns:
+        directory (str): the shard's directory
+    '''
+    return os.path.join('shards', f'shard {shard} of {shards}')
+
+def run_shards(args):
+    '''
+    Splits the search queries into args.shards shards (see shard_of) and runs each in its own process, with its own Chrome sessions and request
+    budget, by running this program again with --shard. Each shard's output is logged to "log.txt" in its directory. Once every shard has
+    finished, their csv files are merged (see merge_shards), whichever formats were chosen, as every shard writes csv files, and with
+    --format index the author index of the whole run is made from the merged papers.
+
+    Parameters:
+        args (argparse.Namespace): parsed command line options
+    '''
+    processes = list()
+    for shard in range(args.shards):
+        directory = shard_directory(shard, args.shards)
+        os.makedirs(directory, exist_ok=True)
+
+        log = open(os.path.join(directory, 'log.txt'), 'w', encoding='utf-8')
+        command = [sys.executable, os.path.abspath(__file__)] + sys.argv[1:] + ['--shard', str(shard), '--output-dir', '.', '--queries', args.queries]
+        if args.replay is not None:
+            command += ['--replay', args.replay]
+        processes.append((shard, subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT), log))
+        print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'Started shard {shard} of {args.shards}, logging to "{os.path.join(directory, "log.txt")}".')
+
+    for shard, process, log in processes:
+        code = process.wait()
+        log.close()
+        if code == 0:
+            print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'Shard {shard} finished.')
+        else:
+            print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'{Fore.RED}Shard {shard} failed (exit code {code}), see its log.{Style.RESET_ALL}')
+
+    merge_shards(args.shards, args.job_store, args.index_dir if 'index' in args.format else None)
+
+def merge_shards(shards, job_store, index_dir=None):
+    '''
+    Merges the "all papers" and "all academics" csv files of each shard's most recent run into "all papers YYYY-mm-dd.csv" and "all academics
+    YYYY-mm-dd.csv". Shards are merged in order, and an academic (AcademicKey) or academic's paper (PaperKey and Google Scholar profile name)
+    found in more than one shard is only kept the first time, so merging gives the same files however and wherever the shards were run. A
+    single shard can be re-run and the shards merged again with --merge. Values are merged as text, exactly as the shards wrote them.
+
+    Parameters:
+        shards (int): number of shards
+        job_store (str): file name of each shard's job store, in its directory
+        index_dir (str): directory of the author index to add the merged papers to, or None
+
+    Returns:
+        paper_df (pandas df): merged papers
+        academic_df (pandas df): merged academics
+    '''
+    papers = list()
+    academics = list()
+    for shard in range(shards):
+        directory = shard_directory(shard, shards)
+
+        run_date = None
+        if os.path.exists(os.path.join(directory, job_store)):
+            store = JobStore(os.path.join(directory, job_store))
+            run_date = store.run_date()
+            store.close()
+
+        paper_path = os.path.join(directory, f'all papers {run_date}.csv')
+        academic_path = os.path.join(directory, f'all academics {run_date}.csv')
+        if run_date is None or not os.path.exists(paper_path) or not os.path.exists(academic_path):
+            print(f'{Fore.GREEN}-->{Style.RESET_ALL}', f'{Fore.RED}Shard {shard} has no results to merge.{Style.RESET_ALL}')
+            continue
+
+        papers.append(pd.read_csv(paper_path, dtype=str, keep_default_na=False))
+        academics.append(pd.read_csv(academic_path, dtype=str, keep_default_na=False))
+
+    paper_df = pd.concat(papers, ignore_index=True) if len(papers) > 0 else pd.DataFrame()
+    academic_df = pd.concat(academics, ignore_index=True).fillna('') if len(academics) > 0 else pd.DataFrame()
+    total = len(paper_df) + len(academic_df)
+
+    if len(paper_df) > 0:
+        paper_df = paper_df.drop_duplicates(['PaperKey', 'Google Scholar profile name'], keep='first', ignore_index=True)
+    if len(academic_df) > 0:
+        academic_df = academic_df.drop_duplicates('AcademicKey', keep='first', ignore_index=True)
+
+    #Written to a temporary file then renamed into place, so a merge that fails part way leaves the previous files as they were
+    run_date = get_current_datetime()
+    for df, path in [(paper_df, f'all papers {run_date}.csv'), (academic_df, f'all academics {run_date}.csv')]:
+        df.to_csv(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+
+    print(f'{Fore.BLUE}--> Merged {len(papers)} shards into "all papers {run_date}.csv" and "all academics {run_date}.csv": {len(academic_df)} academics '
+          f'and {len(paper_df)} papers ({total - len(paper_df) - len(academic_df)} duplicates dropped).{Style.RESET_ALL}')
+
+    #Each shard indexes its own authors, so the index of the whole run is made from the merged papers
+    if index_dir is not None and len(paper_df) > 0:
+        index = AuthorIndex(index_dir)
+        index.write(paper_df, academic_df)
+        index.close()
+
+    return paper_df, academic_df
+
+def make_outputs(args, run_date, append=False, replace=False):
+    '''
+    Makes the outputs chosen with --format.
+
+    Parameters:
+        args (argparse.Namespace): parsed command line options
+        run_date (str): date of the run, used in the names of its output files
+        append (bool): whether to carry on appending to the csv files of a run from the same day
+        replace (bool): whether an academic's rows already in the csv files are replaced when they are written again (see CsvOutput)
+
+    Returns:
+        outputs (list): the outputs, e.g. CsvOutput, ParquetOutput or DatabaseOutput
+    '''
+    outputs = list()
+    if 'csv' in args.format:
+        outputs.append(CsvOutput(run_date, append=append, replace=replace))
+    if 'parquet' in args.format:
+        outputs.append(ParquetOutput(args.dataset_dir, run_date))
+    if 'database' in args.format:
+        outputs.append(DatabaseOutput(args.database, run_date))
+    if 'index' in args.format:
+        outputs.append(AuthorIndex(args.index_dir))
+    return outputs
+
+def rate_option(value):
+    '''
+    Reads a --rate option of the form KEY=N.
+
+    Parameters:
+        value (str): the option's value
+
+    Returns:
+        rate (tuple): the key and the rate
+    '''
+    key, _, rate = value.rpartition('=')
+    try:
+        return key, float(rate)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected KEY=N, e.g. paper=0.2, not "{value}"')
+
+def workers_option(value):
+    '''
+    Reads a --stage-workers option of the form STAGE=N.
+
+    Parameters:
+        value (str): the option's value
+
+    Returns:
+        workers (tuple): the stage and its number of workers
+    '''
+    stage, _, workers = value.rpartition('=')
+    if stage not in PIPELINE_WORKERS:
+        raise argparse.ArgumentTypeError(f'expected one of {", ".join(PIPELINE_WORKERS)} as the stage, not "{stage}"')
+    try:
+        return stage, int(workers)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected STAGE=N, e.g. details=2, not "{value}"')
+
+def parse_args():
+    '''
+    Reads the command line options for the program. Every option has a default, so the program can still be run without any arguments.
+
+    Returns:
+        args (argparse.Namespace): parsed command line options
+    '''
+    parser = argparse.ArgumentParser(description='Scrapes academic and paper details from the Google Scholar profiles found for each query in "search queries.txt".')
+    parser.add_argument('--queries', default='search queries.txt', help='file of search queries, one per line (default: "search queries.txt")')
+    parser.add_argument('--output-dir', default='.', help='directory every output file is written to, and the job store and page cache are kept in (default: the current directory)')
+    parser.add_argument('--sessions', type=int, default=1, help='number of Chrome sessions kept open for the whole run (default: 1)')
+    parser.add_argument('--session-page-loads', type=int, default=200, help='number of page loads after which a Chrome session is restarted (default: 200)')
+    parser.add_argument('--max-in-flight', type=int, default=2, help='maximum number of pages being fetched at the same time (default: 2)')
+    parser.add_argument('--max-rate', type=float, default=0.5, help='maximum number of pages of each type requested per second, across all sessions (default: 0.5)')
+    parser.add_argument('--rate', metavar='KEY=N', type=rate_option, action='append', default=[],
+                        help='maximum number of pages requested per second for a page type, host, or host:page type, e.g. paper=0.2 (can be repeated)')
+    parser.add_argument('--jitter', type=float, default=0.3, help='fraction by which the gap between requests is randomly changed (default: 0.3)')
+    parser.add_argument('--backoff', type=float, default=30, help='seconds to wait after the first throttled page, doubling each time (default: 30)')
+    parser.add_argument('--search-backend', choices=['selenium', 'http'], default='selenium', help='how author search pages are fetched (default: selenium)')
+    parser.add_argument('--profile-backend', choices=['selenium', 'http'], default='selenium', help='how profile pages are fetched (default: selenium)')
+    parser.add_argument('--paper-backend', choices=['selenium', 'http'], default='http', help='how paper pages are fetched (default: http)')
+    parser.add_argument('--http-base-url', default=None, help='send HTTP backend requests to this address instead of Google Scholar, e.g. a local fixture server')
+    parser.add_argument('--cache-dir', default='page cache', help='directory of the page cache (default: "page cache")')
+    parser.add_argument('--cache-size', type=int, default=500, help='size the page cache is kept under, in MB (default: 500)')
+    parser.add_argument('--no-cache', action='store_true', help='always fetch pages, without reading or writing the page cache')
+    parser.add_argument('--profile-cache', default='profile ids.sqlite', help='database of the profile each query resolved to, so later runs skip the search page (default: "profile ids.sqlite")')
+    parser.add_argument('--profile-ttl', metavar='DAYS', type=float, default=30, help='days after which a query is resolved to a profile again (default: 30)')
+    parser.add_argument('--no-profile-cache', action='store_true', help='load the search page for every query, without reading or writing the profile cache')
+    parser.add_argument('--resolve', action='store_true', help='only resolve every query to a profile, up front, and record them in the profile cache')
+    parser.add_argument('--no-dedup', action='store_true', help="fetch each academic's papers, even those already fetched for another academic in the run")
+    parser.add_argument('--incremental', action='store_true', help='only fetch details for papers not in the most recent "all papers" file, and update the rest from profiles')
+    parser.add_argument('--resume', action='store_true', help='carry on from where the last run stopped, without fetching completed pages again')
+    parser.add_argument('--job-store', default='scrape jobs.sqlite', help='database recording the progress of the run, used by --resume (default: "scrape jobs.sqlite")')
+    parser.add_argument('--format', nargs='+', choices=['csv', 'parquet', 'database', 'index'], default=['csv'],
+                        help='output formats to write, where index is the author index (default: csv)')
+    parser.add_argument('--index-dir', default='author index', help='directory the author index is kept in (default: "author index")')
+    parser.add_argument('--coauthors', metavar='NAME', default=None, help='only print the co-authors and number of papers of NAME, from the author index')
+    parser.add_argument('--dataset-dir', default='scholar dataset', help='directory the parquet datasets are written to (default: "scholar dataset")')
+    parser.add_argument('--database', default='scholar.db', help='SQLite database file, or ODBC connection string, for the database output (default: "scholar.db")')
+    parser.add_argument('--record', metavar='DIR', default=None, help='save every fetched page to DIR')
+    parser.add_argument('--replay', metavar='DIR', default=None, help='read every page from DIR (saved with --record) instead of fetching it')
+    parser.add_argument('--replay-latency', metavar='SECONDS', type=float, default=0.0, help='with --replay, make each page take about SECONDS to load, under the request budget (default: 0)')
+    parser.add_argument('--replay-throttle', metavar='FRACTION', type=float, default=0.0, help='with --replay, make this fraction of page loads come back throttled (default: 0)')
+    parser.add_argument('--metrics', metavar='FILE', default=None, help='write timings of each stage of the run and counts of pages fetched, retries etc. to FILE')
+    parser.add_argument('--metrics-format', choices=Metrics.FORMATS, default='jsonl', help='format of the --metrics file: JSON lines, or Prometheus text (default: jsonl)')
+    parser.add_argument('--pipeline', action='store_true', help='overlap the stages of different queries, each stage with its own workers (see --stage-workers)')
+    parser.add_argument('--stage-workers', metavar='STAGE=N', type=workers_option, action='append', default=[],
+                        help=f'number of workers for a stage of --pipeline, one of {", ".join(PIPELINE_WORKERS)} (default: ' + ', '.join(f'{stage}={workers}' for stage, workers in PIPELINE_WORKERS.items()) + ')')
+    parser.add_argument('--queue-size', type=int, default=2, help='number of queries that can wait between two stages of --pipeline (default: 2)')
+    parser.add_argument('--daemon', action='store_true', help='keep running, refreshing each query when it is due, with the fastest changing profiles refreshed most often')
+    parser.add_argument('--schedule', default='refresh schedule.sqlite', help='database of when each query is next refreshed by --daemon (default: "refresh schedule.sqlite")')
+    parser.add_argument('--hourly-budget', metavar='PAGES', type=int, default=600, help='most pages --daemon fetches per hour (default: 600)')
+    parser.add_argument('--min-refresh', metavar='DAYS', type=float, default=1, help='fewest days between two refreshes of a query by --daemon (default: 1)')
+    parser.add_argument('--max-refresh', metavar='DAYS', type=float, default=90, help='most days between two refreshes of a query by --daemon (default: 90)')
+    parser.add_argument('--poll', metavar='SECONDS', type=float, default=60, help='how often --daemon checks the queries file for changes (default: 60)')
+    parser.add_argument('--crawl', action='store_true', help='crawl outwards from the profiles of the queries to their co-authors, breadth first, carrying on from any earlier crawl')
+    parser.add_argument('--crawl-depth', metavar='N', type=int, default=1, help='follow co-authors up to N links from the profiles of the queries (default: 1)')
+    parser.add_argument('--crawl-institution', metavar='TEXT', action='append', default=[],
+                        help='only follow co-authors whose affiliation contains TEXT, ignoring case (can be repeated)')
+    parser.add_argument('--crawl-limit', metavar='N', type=int, default=None, help='stop the crawl once N profiles have been crawled (default: no limit)')
+    parser.add_argument('--frontier', default='crawl frontier.sqlite', help='database of the profiles found by --crawl and its progress (default: "crawl frontier.sqlite")')
+    parser.add_argument('--crawl-capacity', metavar='N', type=int, default=100000, help='number of profiles the visited set of --crawl is sized for (default: 100000)')
+    parser.add_argument('--crawl-papers', metavar='N', type=int, default=20000,
+                        help='most papers --crawl keeps in memory so they are not fetched again for another co-author (default: 20000)')
+    parser.add_argument('--shards', type=int, default=1, help='split the queries into this many shards, each run in its own process, and merge their results (default: 1)')
+    parser.add_argument('--shard', type=int, default=None, help='only run this shard (0 to --shards - 1), e.g. on another machine')
+    parser.add_argument('--merge', action='store_true', help='only merge the results of the shards in the "shards" directory')
+
+    return parser.parse_args()
+
+TITLE = '''\
+   _____      __          __                                                     
+  / ___/_____/ /_  ____  / /___ ______      ___________________ _____  ___  _____
+  \__ \/ ___/ __ \/ __ \/ / __ `/ ___/_____/ ___/ ___/ ___/ __ `/ __ \/ _ \/ ___/
+ ___/ / /__/ / / / /_/ / / /_/ / /  /_____(__  ) /__/ /  / /_/ / /_/ /  __/ /    
+/____/\___/_/ /_/\____/_/\__,_/_/        /____/\___/_/   \__,_/ .___/\___/_/     
+                                                             /_/                 '''
+
+def main():
+    '''
+    Runs the program: reads the command line options and search queries, scrapes the profile for each query, and writes the outputs.
+    '''
+    args = parse_args()
+
+    #Everything is written to the output directory. The queries file and replayed pages are read from where they were given.
+    args.queries = os.path.abspath(args.queries)
+    if args.replay is not None:
+        args.replay = os.path.abspath(args.replay)
+    os.makedirs(args.output_dir, exist_ok=True)
+    os.chdir(args.output_dir)
+
+    #The author index can be queried without running anything
+    if args.coauthors is not None:
+        index = AuthorIndex(args.index_dir)
+        papers = index.papers_of(args.coauthors)
+        print(f'{Fore.BLUE}--> "{args.coauthors}" wrote {len(papers)} papers in the author index, with these co-authors:{Style.RESET_ALL}')
+        for name, together in index.coauthors(args.coauthors):
+            print(f'{Fore.GREEN}-->{Style.RESET_ALL} {name} ({together} papers)')
+        return
+
+    #A sharded run starts a process for each shard (see run_shards), which runs this function again with --shard
+    if args.merge:
+        merge_shards(args.shards, args.job_store, args.index_dir if 'index' in args.format else None)
+        return
+    if args.shards > 1 and args.shard is None and not (args.resolve or args.daemon or args.crawl): #resolving only loads search pages, and the daemon and crawl keep their own progress
+        run_shards(args)
+        return
+
+    #A shard works in its own directory, while sharing the Parquet and database outputs with the other shards
+    if args.shard is not None:
+        args.dataset_dir = os.path.abspath(args.dataset_dir)
+        if '=' not in args.database:
+            args.database = os.path.abspath(args.database)
+        if args.record is not None:
+            args.record = os.path.abspath(args.record)
+        args.profile_cache = os.path.abspath(args.profile_cache)
+        if 'csv' not in args.format:
+            args.format.append('csv') #the shards' csv files are what is merged
+
+        directory = shard_directory(args.shard, args.shards)
+        os.makedirs(directory, exist_ok=True)
+        os.chdir(directory)
+        print(f'{Fore.BLUE}--> Running shard {args.shard} of {args.shards} in "{directory}".{Style.RESET_ALL}')
+
+    fetcher = make_fetcher(sessions=args.sessions, session_page_loads=args.session_page_loads, max_in_flight=args.max_in_flight, max_rate=args.max_rate,
+                           rates=dict(args.rate), jitter=args.jitter, backoff=args.backoff, search_backend=args.search_backend,
+                           profile_backend=args.profile_backend, paper_backend=args.paper_backend, http_base_url=args.http_base_url,
+                           cache_dir=None if args.no_cache else args.cache_dir, cache_size=args.cache_size, record=args.record, replay=args.replay,
+                           replay_latency=args.replay_latency, replay_throttle=args.replay_throttle, metrics=args.metrics, metrics_format=args.metrics_format,
+                           hourly_limit=args.hourly_budget if args.daemon else None)
+
+    #The profile each query resolved to in previous runs
+    profiles = None if args.no_profile_cache else ProfileCache(args.profile_cache, ttl=args.profile_ttl)
+
+    #Resolving the queries up front only loads their search pages, and records the profiles they resolve to
+    if args.resolve:
+        Searches = searches_from_file(args.queries)
+        if args.shard is not None:
+            Searches = [search for search in Searches if shard_of(search, args.shards) == args.shard]
+        if profiles is None:
+            profiles = ProfileCache(args.profile_cache, ttl=args.profile_ttl)
+
+        try:
+            errors = profiles.resolve_all(Searches, fetcher)
+        finally:
+            fetcher.close()
+
+        for search, confidence, candidates in profiles.ambiguous(Searches):
+            print(f'{Fore.RED}Ambiguous query ({confidence:.0%} confident), which will be resolved again next run: {Style.RESET_ALL}"{search}"')
+            for candidate in candidates[:5]:
+                print(f'{Fore.RED}    {candidate["name"]}, {candidate["affiliation"]} (user {candidate["user"]}){Style.RESET_ALL}')
+        for search in errors:
+            print(f'{Fore.RED}No profile could be found for: {Style.RESET_ALL}"{search}"')
+
+        profiles.report()
+        profiles.close()
+        return
+
+    #The daemon refreshes queries from the previous results, writing to outputs dated the day it started, until it is interrupted
+    if args.daemon:
+        known_papers = load_known_papers()
+
+        #Each refresh replaces the academic's rows in the csv files, which start as a copy of the most recent results, so they always hold
+        #the latest rows of every academic, once each. A daemon restarted on the same day carries on with the same files.
+        run_date = get_current_datetime()
+        if 'csv' in args.format:
+            for kind in ['papers', 'academics']:
+                paths = sorted(glob.glob(f'all {kind} *.csv'))
+                if len(paths) > 0 and not os.path.exists(f'all {kind} {run_date}.csv'):
+                    shutil.copyfile(paths[-1], f'all {kind} {run_date}.csv')
+        outputs = make_outputs(args, run_date, append=True, replace=True)
+
+        schedule = RefreshSchedule(args.schedule, args.min_refresh, args.max_refresh)
+        print(f'{Fore.BLUE}--> Refreshing the queries in "{args.queries}" as they become due. Press Ctrl+C to stop.{Style.RESET_ALL}')
+        try:
+            run_daemon(args.queries, fetcher, schedule, outputs, known_papers, profiles, sheets='csv' in args.format, poll=args.poll)
+        except KeyboardInterrupt:
+            print(f'{Fore.BLUE}--> Stopped refreshing.{Style.RESET_ALL}')
+        finally:
+            fetcher.close()
+            for output in outputs:
+                output.close()
+
+        fetcher.report()
+        schedule.report()
+        schedule.close()
+        if profiles is not None:
+            profiles.report()
+            profiles.close()
+        return
+
+    #Papers from the previous run, for an incremental run
+    known_papers = load_known_papers() if args.incremental else None
+
+    #Papers gathered earlier in this run, so a paper shared by several academics is only fetched once
+    registry = None if args.no_dedup else PaperRegistry(max_papers=args.crawl_papers if args.crawl else None)
+
+    #A crawl starts from the queries and follows co-authors, carrying on from the frontier of an earlier crawl
+    if args.crawl:
+        frontier = CrawlFrontier(args.frontier, args.crawl_depth, args.crawl_institution, args.crawl_capacity)
+        outputs = make_outputs(args, get_current_datetime(), append=True) #a crawl carried on the same day carries on with the same files
+        try:
+            errors = run_crawl(searches_from_file(args.queries), fetcher, frontier, outputs, known_papers, registry, profiles, sheets='csv' in args.format,
+                               limit=args.crawl_limit)
+        finally:
+            fetcher.close()
+            for output in outputs:
+                output.close()
+
+        fetcher.report()
+        if registry is not None:
+            registry.report()
+        frontier.report()
+        frontier.close()
+        if profiles is not None:
+            profiles.report()
+            profiles.close()
+        if len(errors) > 0:
+            print(f'{Fore.RED}Errors occurred with the following profiles:{Style.RESET_ALL}')
+            for e in errors:
+                print(f'{Fore.RED}-->{Style.RESET_ALL} {e}')
+        return
+
+    #Progress of the run is recorded in the job store. A resumed run carries on with the queries (and output files) of the last run.
+    store = JobStore(args.job_store)
+    run_date = store.run_date()
+    if args.resume and run_date is not None:
+        print(f'{Fore.BLUE}--> Resuming the run started on {run_date}.{Style.RESET_ALL}')
+        Searches = [search for search, state in store.searches()]
+        done = {search for search, state in store.searches() if state == 'done'}
+
+    else:
+        if args.resume:
+            print(f'{Fore.BLUE}--> There is no previous run to resume, so a new run will be started.{Style.RESET_ALL}')
+
+        #Generate search list, of only this shard's queries if the run is sharded
+        Searches = searches_from_file(args.queries)
+        if args.shard is not None:
+            Searches = [search for search in Searches if shard_of(search, args.shards) == args.shard]
+        done = set()
+        run_date = get_current_datetime()
+        store.new_run(Searches, run_date)
+
+    #Each completed query's rows are added to every output. A resumed run carries on appending to the csv files of the run it resumes.
+    outputs = make_outputs(args, run_date, append=args.resume)
+
+    print(f'{Fore.BLUE}─{Style.RESET_ALL}' * 81)
+    print(f'{Fore.BLUE}{TITLE}{Style.RESET_ALL}')
+    print(f'{Fore.BLUE}─{Style.RESET_ALL}' * 81)
+
+    print(f'''\
+      {Fore.BLUE}v1.1{Style.RESET_ALL}
+      Created by Ted Binns
+      
+      This program scrapes academic and paper details from the Google Scholar
+      profile pages associated with search queries that are entered in the
+      file "search queries.txt".
+
+      For more information on using this program, please see README.txt ''') 
+
+    try:
+        pipeline = dict(PIPELINE_WORKERS, **dict(args.stage_workers)) if args.pipeline else None
+        _, _, errors = scrape_many(Searches, fetcher, outputs, known_papers, store, done, collect=False, sheets='csv' in args.format, registry=registry,
+                                   profiles=profiles, pipeline=pipeline, queue_size=args.queue_size)
+
+    finally:
+        fetcher.close() #shut down all chrome sessions and connections, even if the run was interrupted
+        for output in outputs:
+            output.close()
+        print(f'{Fore.GREEN}-->{Style.RESET_ALL}', "Chrome sessions successfully closed.")
+
+    print(f'{Fore.GREEN}─{Style.RESET_ALL}' * 81) 
+    print(f'{Fore.BLUE}─{Style.RESET_ALL}' * 81) 
+    print(f'{Fore.BLUE}ALL TASKS COMPLETE{Style.RESET_ALL}')
+    print(f'{Fore.BLUE}─{Style.RESET_ALL}' * 81) 
+
+    fetcher.report()
+    if registry is not None:
+        registry.report()
+    if profiles is not None:
+        profiles.report()
+        profiles.close()
+    store.report()
+    store.close()
+
+    if len(errors) > 0:
+        print(f'{Fore.RED}Errors occurred with the following queries:{Style.RESET_ALL}')
+        for e in errors:
+            print(f'{Fore.RED}-->{Style.RESET_ALL} {e}')
+
+## Driver code for program
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
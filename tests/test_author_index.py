@@ -0,0 +1,76 @@
+'''
+Tests of the author index (see AuthorIndex), and of it being reopened after a write that was interrupted part way.
+'''
+
+import os.path
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import scholar_scraper
+
+def papers(*authors):
+    '''
+    Makes formatted paper rows with the authors given, one list of authors per paper.
+    '''
+    titles = [f'Paper {i}' for i in range(len(authors))]
+    return pd.DataFrame({'PaperKey': [scholar_scraper.generate_key(title) for title in titles], 'Title': titles, 'Authors': list(authors)})
+
+def test_papers_and_coauthors(tmp_path):
+    index = scholar_scraper.AuthorIndex(str(tmp_path))
+    index.write(papers(['Alice', 'Bob'], ['alice', 'Carol', 'Bob']), None)
+
+    assert index.names == ['Alice', 'Bob', 'Carol']
+    assert len(index.papers_of('ALICE')) == 2
+    assert index.coauthors('Alice') == [('Bob', 2), ('Carol', 1)]
+
+def test_names_of_an_interrupted_write_are_dropped(tmp_path):
+    index = scholar_scraper.AuthorIndex(str(tmp_path))
+    index.write(papers(['Alice', 'Bob']), None)
+
+    #The names of a second write reach authors.txt, the last one only part way, but its papers do not
+    with open(tmp_path / 'authors.txt', 'a', encoding='utf-8', newline='\n') as file:
+        file.write('Carol\nDa')
+
+    index = scholar_scraper.AuthorIndex(str(tmp_path))
+    assert index.names == ['Alice', 'Bob']
+    assert (tmp_path / 'authors.txt').read_bytes() == b'Alice\nBob\n'
+
+    index.write(papers(['Alice', 'Bob'], ['Dave']), None)
+    index = scholar_scraper.AuthorIndex(str(tmp_path))
+    assert index.names == ['Alice', 'Bob', 'Dave']
+    assert index.authors_of(scholar_scraper.generate_key('Paper 1')) == ['Dave']
+
+def test_large_collaborations_are_left_out_of_the_coauthorship_graph(tmp_path):
+    collaboration = [f'Author {i}' for i in range(scholar_scraper.AuthorIndex.GRAPH_AUTHOR_LIMIT + 1)]
+    index = scholar_scraper.AuthorIndex(str(tmp_path))
+    index.write(papers(['Author 0', 'Author 1'], collaboration), None)
+
+    assert index.coauthors('Author 0') == [('Author 1', 1)]
+    assert len(index.papers_of('Author 0')) == 2
+    assert index.coauthors('Author 2') == []
+    assert len(index.papers_of('Author 2')) == 1
+
+def test_graph_is_saved_and_brought_up_to_date(tmp_path):
+    index = scholar_scraper.AuthorIndex(str(tmp_path))
+    index.write(papers(['Alice', 'Bob']), None)
+    index.close()
+    assert (tmp_path / 'graph.npz').exists()
+
+    index = scholar_scraper.AuthorIndex(str(tmp_path))
+    assert index.coauthors('Alice') == [('Bob', 1)]
+    more = papers(['Alice', 'Bob'], ['Alice', 'Carol'], ['Alice', 'Bob']).iloc[1:]
+    index.write(more, None)
+
+    assert index.coauthors('Alice') == [('Bob', 2), ('Carol', 1)]
+    assert len(index.papers_of('Bob')) == 2
+    assert index.authors_of(scholar_scraper.generate_key('Paper 2')) == ['Alice', 'Bob']
+
+def test_blank_authors_are_no_authors(tmp_path):
+    assert scholar_scraper.as_author_list('') == []
+
+    index = scholar_scraper.AuthorIndex(str(tmp_path))
+    index.write(papers('', ['Alice']), None)
+    assert index.names == ['Alice']
+    assert index.authors_of(scholar_scraper.generate_key('Paper 0')) == []
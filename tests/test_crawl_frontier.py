@@ -0,0 +1,38 @@
+'''
+Tests of the frontier of a co-author crawl (see CrawlFrontier).
+'''
+
+import os.path
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import scholar_scraper
+
+def url(user):
+    return f'https://scholar.google.com/citations?hl=en&user={user}'
+
+def coauthor(user):
+    return {'user': user, 'url': url(user), 'name': f'Name {user}', 'affiliation': None}
+
+def test_seed_found_as_a_coauthor_is_moved_to_depth_0(tmp_path):
+    frontier = scholar_scraper.CrawlFrontier(str(tmp_path / 'frontier.sqlite'), max_depth=1)
+    frontier.add_seed('first', url('A'))
+    user, _, _, depth = frontier.next()
+    frontier.done(user, depth, [coauthor('B')])
+
+    frontier.add_seed('second', url('B'))
+
+    assert frontier.next()[::3] == ('B', 0)
+    frontier.close()
+
+def test_seed_crawled_too_deep_is_crawled_again(tmp_path):
+    frontier = scholar_scraper.CrawlFrontier(str(tmp_path / 'frontier.sqlite'), max_depth=1)
+    frontier.add_seed('first', url('A'))
+    frontier.done('A', 0, [coauthor('B')])
+    frontier.done('B', 1, [coauthor('C')]) #at max_depth, so C is not followed
+
+    frontier.add_seed('second', url('B'))
+    user, _, _, depth = frontier.next()
+    assert (user, depth) == ('B', 0)
+    assert frontier.done(user, depth, [coauthor('C')]) == 1
+    frontier.close()
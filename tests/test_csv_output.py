@@ -0,0 +1,62 @@
+'''
+Tests of the combined csv output (see CsvOutput and CsvSink), as --daemon writes it, replacing an academic's rows on each refresh.
+'''
+
+import os.path
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import scholar_scraper
+
+def refresh(academic, titles, citations):
+    papers = pd.DataFrame({'Title': titles, 'Citations': citations, 'Google Scholar profile name': academic})
+    academics = pd.DataFrame({'Academic': [academic], 'Citations': [sum(citations)]})
+    return papers, academics
+
+def test_refresh_replaces_the_academics_rows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    output = scholar_scraper.CsvOutput('2024-01-01', append=True, replace=True)
+    output.write(*refresh('Alice', ['A1', 'A2'], [1, 2]))
+    output.write(*refresh('Bob', ['B1'], [5]))
+    output.write(*refresh('Alice', ['A1', 'A2', 'A3'], [3, 4, 1]))
+
+    papers = pd.read_csv('all papers 2024-01-01.csv')
+    academics = pd.read_csv('all academics 2024-01-01.csv')
+    assert papers['Title'].tolist() == ['B1', 'A1', 'A2', 'A3']
+    assert papers['Citations'].tolist() == [5, 3, 4, 1]
+    assert academics['Academic'].tolist() == ['Bob', 'Alice']
+
+def test_rows_are_appended_without_replace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    output = scholar_scraper.CsvOutput('2024-01-01', append=True)
+    output.write(*refresh('Alice', ['A1'], [1]))
+    output.write(*refresh('Alice', ['A1'], [2]))
+
+    assert pd.read_csv('all papers 2024-01-01.csv')['Citations'].tolist() == [1, 2]
+
+class Fetcher:
+    '''
+    Stands in for a PageFetcher, for scrape_many runs whose queries are not fetched.
+    '''
+    metrics = scholar_scraper.Metrics()
+
+def test_resumed_query_stopped_while_writing_is_not_written_twice(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    paper_df, academic_df = refresh('Alice', ['A1', 'A2'], [1, 2])
+    monkeypatch.setattr(scholar_scraper, 'dfs_by_query', lambda search, *args, **kwargs: (paper_df, academic_df))
+
+    #The run was stopped after writing the query, but before recording it as done
+    store = scholar_scraper.JobStore(str(tmp_path / 'jobs.sqlite'))
+    store.new_run(['alice'], '2024-01-01')
+    store.set_state('alice', 'writing')
+    scholar_scraper.CsvOutput('2024-01-01').write(paper_df, academic_df)
+
+    output = scholar_scraper.CsvOutput('2024-01-01', append=True)
+    scholar_scraper.scrape_many(['alice'], Fetcher(), [output], store=store)
+
+    assert pd.read_csv('all papers 2024-01-01.csv')['Title'].tolist() == ['A1', 'A2']
+    assert pd.read_csv('all academics 2024-01-01.csv')['Academic'].tolist() == ['Alice']
+    assert store.state('alice') == 'done'
+    store.close()
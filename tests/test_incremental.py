@@ -0,0 +1,71 @@
+'''
+Tests of merging an academic's newly scraped papers with the papers of previous results, for incremental runs (see add_known_papers).
+'''
+
+import os.path
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import scholar_scraper
+
+def paper(title, academic, citations=1):
+    '''
+    Makes a formatted paper row, with its details filled in.
+    '''
+    ids, keys = scholar_scraper.generate_ids(pd.Series([title]))
+    return {'PaperID': ids[0], 'PaperKey': keys[0], 'Title': title, 'Citations': citations, 'Year': '2020', 'Paper url': f'https://x/{title}',
+            'Google Scholar profile name': academic, 'Publication date': '2020/1/1', 'Journal': 'Journal', 'Source': None, 'Conference': None,
+            'Authors': ['Alice', 'Bob'], 'Primary author': 'Alice', 'Supporting authors': ['Bob']}
+
+def known(*rows):
+    '''
+    Makes the known papers of previous results, as load_known_papers does.
+    '''
+    return pd.DataFrame(list(rows)).set_index('PaperKey')
+
+def test_paper_known_under_another_academic_is_listed_under_this_one():
+    known_papers = known(paper('Shared', 'Alice', citations=3), paper('Alice only', 'Alice'))
+    f_paper_df = pd.DataFrame([paper('Bob new', 'Bob')])
+    seen_df = pd.DataFrame({'Title': ['Shared'], 'Citations': ['5'], 'Year': ['2020'], 'Paper url': ['https://x/Shared']})
+
+    combined = scholar_scraper.add_known_papers(f_paper_df, seen_df, known_papers, 'Bob')
+
+    assert combined['Title'].tolist() == ['Bob new', 'Shared']
+    assert combined['Google Scholar profile name'].tolist() == ['Bob', 'Bob']
+    assert combined['Citations'].tolist() == [1, 5]
+    assert combined.loc[1, 'Authors'] == ['Alice', 'Bob'] #details are still taken from Alice's row
+
+def test_papers_not_listed_again_are_carried_over():
+    known_papers = known(paper('Old', 'Bob'), paper('Alice only', 'Alice'))
+    f_paper_df = pd.DataFrame([paper('Bob new', 'Bob')])
+    seen_df = pd.DataFrame({'Title': [], 'Citations': [], 'Year': [], 'Paper url': []})
+
+    combined = scholar_scraper.add_known_papers(f_paper_df, seen_df, known_papers, 'Bob')
+
+    assert combined['Title'].tolist() == ['Bob new', 'Old']
+    assert combined['Google Scholar profile name'].tolist() == ['Bob', 'Bob']
+
+def test_papers_sharing_an_8_digit_id_are_told_apart():
+    #Two titles whose 8 digit PaperIDs are the same, but whose PaperKeys are not
+    ids, keys = scholar_scraper.generate_ids(pd.Series(['Paper 3026', 'Paper 3137']))
+    assert ids[0] == ids[1] and keys[0] != keys[1]
+
+    known_papers = known(paper('Paper 3026', 'Bob'))
+    new_papers = pd.DataFrame({'Title': ['Paper 3026', 'Paper 3137']})
+
+    is_new = scholar_scraper.check_new_papers(set(known_papers.index), new_papers)
+
+    assert is_new.tolist() == [False, True]
+
+def test_latest_row_of_a_paper_written_twice_is_carried_over():
+    #Results written by an older --daemon could hold an academic's papers once for each refresh
+    known_papers = known(paper('Old', 'Bob', citations=1), paper('Old', 'Bob', citations=7))
+    f_paper_df = pd.DataFrame([paper('Bob new', 'Bob')])
+    seen_df = pd.DataFrame({'Title': [], 'Citations': [], 'Year': [], 'Paper url': []})
+
+    combined = scholar_scraper.add_known_papers(f_paper_df, seen_df, known_papers, 'Bob')
+
+    assert combined['Title'].tolist() == ['Bob new', 'Old']
+    assert combined['Citations'].tolist() == [1, 7]
@@ -0,0 +1,33 @@
+'''
+Tests of the record of papers gathered in a run (see PaperRegistry), and of it being kept to a number of papers.
+'''
+
+import os.path
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import scholar_scraper
+
+def url(n):
+    return f'https://scholar.google.com/citations?view_op=view_citation&hl=en&user=U{n}&citation_for_view=U{n}:c{n}'
+
+def test_paper_is_found_by_title_and_year():
+    registry = scholar_scraper.PaperRegistry()
+    registry.add('A Paper', '2020', url(1), {'Journal': 'J'})
+
+    assert registry.get('a paper.', '2020', url(2)) == {'Journal': 'J'}
+    assert registry.get('A Paper', '2021', url(2)) is None
+    assert registry.reused == 1
+
+def test_least_recently_used_papers_are_forgotten():
+    registry = scholar_scraper.PaperRegistry(max_papers=2)
+    registry.add('First', '2020', url(1), {'Journal': '1'})
+    registry.add('Second', '2020', url(2), {'Journal': '2'})
+    assert registry.get('First', '2020', url(1)) is not None #so Second is now the least recently used
+
+    registry.add('Third', '2020', url(3), {'Journal': '3'})
+
+    assert registry.get('Second', '2020', url(2)) is None
+    assert registry.get('First', '2020', url(1)) == {'Journal': '1'}
+    assert registry.get('Other title', '2020', url(3)) == {'Journal': '3'} #still found by its citation id
+    assert registry.forgotten == 1
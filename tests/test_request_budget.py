@@ -0,0 +1,50 @@
+'''
+Tests of the hourly limit of the request budget (see RequestBudget), which --daemon keeps its page loads within.
+'''
+
+import os.path
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import scholar_scraper
+
+URL = 'https://scholar.google.com/citations?user=x'
+
+def test_each_request_takes_from_the_hourly_limit():
+    budget = scholar_scraper.RequestBudget(max_per_second=1000, jitter=0, hourly_limit=3)
+    assert budget.hourly_wait(3) == 0
+
+    for _ in range(3):
+        with budget.request(URL, 'profile'):
+            pass
+
+    #No more requests can start until the first is an hour old, and the third until the third is
+    assert 3590 < budget.hourly_wait(1) <= 3600
+    assert 3590 < budget.hourly_wait(3) <= 3600
+    assert 3590 < budget.hourly_wait(4) <= 3600 #capped at hourly_limit
+
+def test_no_hour_holds_more_than_the_hourly_limit(monkeypatch):
+    clock = [10000.0]
+    monkeypatch.setattr(scholar_scraper.time, 'monotonic', lambda: clock[0])
+    monkeypatch.setattr(scholar_scraper.time, 'sleep', lambda seconds: clock.__setitem__(0, clock[0] + max(seconds, 0)))
+
+    budget = scholar_scraper.RequestBudget(max_per_second=1000, jitter=0, hourly_limit=10)
+    random.seed(0)
+    starts = list()
+    for _ in range(45):
+        clock[0] += random.choice([0, 5, 600, 4000]) #bursts, and quiet spells longer than an hour
+        with budget.request(URL, random.choice(['profile', 'paper'])):
+            starts.append(clock[0])
+
+    assert starts == sorted(starts)
+    for start in starts:
+        assert sum(1 for other in starts if start <= other < start + 3600) <= 10
+
+def test_no_hourly_limit():
+    budget = scholar_scraper.RequestBudget(max_per_second=1000, jitter=0)
+    for _ in range(5):
+        with budget.request(URL, 'profile'):
+            pass
+
+    assert budget.hourly_wait(100) == 0